@@ -0,0 +1,257 @@
+"""
+Scheduled alert evaluation for every user.
+
+Pulls each user's goals and today's totals in bulk, runs the protein/hydration
+rules as array comparisons and writes the resulting alerts in one upsert.
+Rules are checked against where each user usually is by their local time
+(progress.py curves), not a fixed evening hour. Curves are only built for
+users who could alert at all, and cached per user and local date.
+Run from the repo root (e.g. from cron):
+
+    python -m backend.alert_job [--dry-run] [--every MINUTES]
+
+or set ALERT_JOB_INTERVAL_MINUTES to run it inside the API process.
+"""
+import argparse
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+
+from .config import supabase
+from .alerts import PROTEIN_PACE_ALERT, HYDRATION_PACE_ALERT, check_alerts_batch
+from .cache import TTLCache
+from .progress import CURVE_TTL, HISTORY_DAYS, NUTRIENTS, build_curves, default_curve, expected_shares
+from .log import setup_logging, get_logger
+
+PAGE_SIZE = 1000
+DEFAULT_TIMEZONE = "UTC"
+# Users per history query (user_id IN (...))
+HISTORY_CHUNK = 100
+
+# Curves per (user, local date, timezone); history only grows once a day
+curve_cache = TTLCache(maxsize=int(os.getenv("ALERT_CURVE_CACHE_SIZE", 100_000)), ttl=CURVE_TTL)
+
+logger = get_logger(__name__)
+
+
+def _fetch_all(query_fn) -> list[dict]:
+    # query_fn must order by a unique key, or offset pages can overlap or skip rows
+    rows = []
+    start = 0
+    while True:
+        page = query_fn().range(start, start + PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+    return rows
+
+
+def _zone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def local_clock(timezones, now_utc: datetime):
+    """
+    Resolve each user's local (fractional) hour and local date.
+    Work is done once per distinct timezone, then broadcast back to users.
+    """
+    uniques, inverse = np.unique(np.asarray(timezones, dtype=str), return_inverse=True)
+    hours = np.empty(len(uniques), dtype=np.float64)
+    dates = np.empty(len(uniques), dtype=object)
+
+    for i, name in enumerate(uniques):
+        local = now_utc.astimezone(_zone(name))
+        hours[i] = local.hour + local.minute / 60
+        dates[i] = local.date().isoformat()
+
+    return hours[inverse], dates[inverse]
+
+
+def _timezones(profiles: list[dict]) -> list[str]:
+    return [p.get("timezone") or DEFAULT_TIMEZONE for p in profiles]
+
+
+def _intake(profiles: list[dict], totals: list[dict], local_date) -> tuple:
+    """
+    (protein_intake, protein_goal, water_intake, water_goal) arrays, in profile order.
+    """
+    n = len(profiles)
+    totals_by_key = {(t["user_id"], t["date"]): t for t in totals}
+    protein_intake = np.zeros(n)
+    water_intake = np.zeros(n)
+    for i, key in enumerate(zip((p["id"] for p in profiles), local_date)):
+        t = totals_by_key.get(key)
+        if t:
+            protein_intake[i] = t.get("protein_g") or 0
+            water_intake[i] = t.get("water_ml") or 0
+
+    # Missing goals become NaN, which never compares true, so no alert is raised
+    protein_goal = np.array([p.get("target_protein") for p in profiles], dtype=np.float64)
+    water_goal = np.array([p.get("water_goal") for p in profiles], dtype=np.float64)
+    return protein_intake, protein_goal, water_intake, water_goal
+
+
+def alert_candidates(profiles: list[dict], totals: list[dict], now_utc: datetime) -> list[dict]:
+    """
+    Profiles that would alert at the end of their day (share 1). Nobody else
+    can alert earlier, so only these need curves.
+    """
+    if not profiles:
+        return []
+    _, local_date = local_clock(_timezones(profiles), now_utc)
+    protein_intake, protein_goal, water_intake, water_goal = _intake(profiles, totals, local_date)
+    full = np.ones(len(profiles))
+    protein_alert, hydration_alert = check_alerts_batch(
+        protein_intake, protein_goal, full, water_intake, water_goal, full, min_share=0.0
+    )
+    return [profiles[i] for i in np.flatnonzero(protein_alert | hydration_alert)]
+
+
+def load_curves(profiles: list[dict], now_utc: datetime) -> dict:
+    """
+    progress.build_curves() output per user id, from the HISTORY_DAYS days
+    before each user's local today. History for uncached users is read in
+    bulk, HISTORY_CHUNK users per query.
+    """
+    _, local_date = local_clock(_timezones(profiles), now_utc)
+    curves, missing = {}, []
+    for profile, today in zip(profiles, local_date):
+        key = (profile["id"], today, profile.get("timezone") or DEFAULT_TIMEZONE)
+        cached = curve_cache.get(key)
+        if cached is None:
+            missing.append((key, today))
+        else:
+            curves[profile["id"]] = cached
+    if not missing:
+        return curves
+
+    days = [date.fromisoformat(today) for _, today in missing]
+    since = (min(days) - timedelta(days=HISTORY_DAYS)).isoformat()
+    until = max(days).isoformat()
+    user_ids = [key[0] for key, _ in missing]
+
+    history: dict[str, dict[str, list]] = {}
+    for table in {table for table, _, _ in NUTRIENTS.values()}:
+        columns = ", ".join(["id", "user_id", "date", "logged_at"] + sorted({col for t, col, _ in NUTRIENTS.values() if t == table}))
+        for start in range(0, len(user_ids), HISTORY_CHUNK):
+            chunk = user_ids[start:start + HISTORY_CHUNK]
+            rows = _fetch_all(lambda: supabase.table(table).select(columns).in_("user_id", chunk).gte("date", since).lt("date", until).order("id"))
+            for row in rows:
+                history.setdefault(row["user_id"], {}).setdefault(table, []).append(row)
+
+    for key, today in missing:
+        user_id, _, tz_name = key
+        first = (date.fromisoformat(today) - timedelta(days=HISTORY_DAYS)).isoformat()
+        logs = {
+            table: [row for row in rows if first <= row["date"] < today]
+            for table, rows in history.get(user_id, {}).items()
+        }
+        curves[user_id] = build_curves(logs, _zone(tz_name))
+        curve_cache.set(key, curves[user_id])
+    return curves
+
+
+def evaluate_alerts(profiles: list[dict], totals: list[dict], now_utc: datetime, curves: dict = None) -> list[dict]:
+    """
+    Evaluate alerts for all profiles against their totals for their local "today".
+
+    Args:
+        profiles: Rows with id, target_protein, water_goal, timezone
+        totals: daily_totals rows with user_id, date, protein_g, water_ml
+        curves: load_curves() output; users without one get the default curve
+
+    Returns:
+        user_alerts rows ready for a bulk upsert
+    """
+    if not profiles:
+        return []
+    curves = curves or {}
+
+    user_ids = [p["id"] for p in profiles]
+    local_hour, local_date = local_clock(_timezones(profiles), now_utc)
+    protein_intake, protein_goal, water_intake, water_goal = _intake(profiles, totals, local_date)
+
+    default = default_curve()
+    protein_share = expected_shares(
+        np.array([curves[u]["protein"]["curve"] if u in curves else default for u in user_ids]), local_hour
+    )
+    water_share = expected_shares(
+        np.array([curves[u]["water"]["curve"] if u in curves else default for u in user_ids]), local_hour
+    )
+
+    protein_alert, hydration_alert = check_alerts_batch(
+        protein_intake, protein_goal, protein_share, water_intake, water_goal, water_share
+    )
+
+    rows = []
+    for alert_type, message, mask in (("protein", PROTEIN_PACE_ALERT, protein_alert), ("hydration", HYDRATION_PACE_ALERT, hydration_alert)):
+        for i in np.flatnonzero(mask):
+            rows.append({
+                "user_id": user_ids[i],
+                "date": local_date[i],
+                "alert_type": alert_type,
+                "message": message
+            })
+    return rows
+
+
+def run_alert_job(now_utc: datetime = None, dry_run: bool = False) -> int:
+    """
+    Evaluate and store alerts for every user. Returns the number of alerts.
+    """
+    now_utc = now_utc or datetime.now(timezone.utc)
+
+    profiles = _fetch_all(lambda: supabase.table("profiles").select("id, target_protein, water_goal, timezone").order("id"))
+    if not profiles:
+        return 0
+
+    # Users span at most a couple of local dates, so one IN query covers everyone
+    _, dates = local_clock(_timezones(profiles), now_utc)
+    local_dates = sorted(set(dates))
+    totals = _fetch_all(lambda: supabase.table("daily_totals").select("user_id, date, protein_g, water_ml").in_("date", local_dates).order("user_id").order("date"))
+
+    curves = load_curves(alert_candidates(profiles, totals, now_utc), now_utc)
+    rows = evaluate_alerts(profiles, totals, now_utc, curves)
+    if rows and not dry_run:
+        # One alert per user/day/type; re-runs later in the day are no-ops
+        for start in range(0, len(rows), PAGE_SIZE):
+            supabase.table("user_alerts")\
+                .upsert(rows[start:start + PAGE_SIZE], on_conflict="user_id,date,alert_type", ignore_duplicates=True)\
+                .execute()
+    return len(rows)
+
+
+def run_every(minutes: float, dry_run: bool = False):
+    """
+    Run the job forever, every `minutes`. Errors are logged and retried next round.
+    """
+    while True:
+        try:
+            logger.info("alert_job_done", extra={"alerts": run_alert_job(dry_run=dry_run)})
+        except Exception:
+            logger.exception("alert_job_failed")
+        time.sleep(minutes * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate alerts for all users")
+    parser.add_argument("--dry-run", action="store_true", help="Evaluate but don't write")
+    parser.add_argument("--every", type=float, metavar="MINUTES", help="Keep running on this interval")
+    args = parser.parse_args()
+    setup_logging()
+
+    if args.every:
+        run_every(args.every, dry_run=args.dry_run)
+
+    try:
+        logger.info("alert_job_done", extra={"alerts": run_alert_job(dry_run=args.dry_run)})
+    except Exception:
+        logger.exception("alert_job_failed")
+        raise SystemExit(1)
@@ -1,30 +1,62 @@
+import os
 from datetime import datetime
+import numpy as np
+
+from .progress import default_curve, expected_shares
+
+PROTEIN_ALERT_RATIO = 0.6
+
+# The scheduled job's rules apply once a user's progress curve says this share
+# of the day's intake is usually done (about 18:00 on the default curve)
+ALERT_MIN_SHARE = float(os.getenv("ALERT_MIN_SHARE", 0.75))
+
+PROTEIN_ALERT = "High Protein Alert: You are below 60% of your protein goal."
+HYDRATION_ALERT = "Hydration Warning: You haven't met your daily water goal."
+
+PROTEIN_PACE_ALERT = "High Protein Alert: You are below 60% of the protein you usually have by now."
+HYDRATION_PACE_ALERT = "Hydration Warning: You are behind the water you usually have by now."
 
 def check_alerts(current_time: datetime, protein_intake: float, protein_goal: float, water_intake: float, water_goal: float) -> list[str]:
     """
     Check for health alerts based on daily goals and current time.
     
-    Rules:
-    1. If evening and protein < 60% goal -> High Protein Alert
-    2. If evening and water < goal -> Hydration Warning
+    The check_alerts_batch rules for one user, paced by the default progress
+    curve at `current_time` (the request carries no history for a personal one):
+    1. Protein < 60% of the share of the goal usually eaten by now -> High Protein Alert
+    2. Water < the share of the goal usually drunk by now -> Hydration Warning
+    Nothing fires before ALERT_MIN_SHARE of the day (about 18:15); once the curve
+    reaches 1 (22:00) the shares are the full goals.
     """
+    hour = current_time.hour + current_time.minute / 60
+    share = expected_shares(default_curve()[np.newaxis], [hour])
+    protein_alert, hydration_alert = check_alerts_batch(
+        [protein_intake], [protein_goal], share, [water_intake], [water_goal], share
+    )
+    
     alerts = []
+    full_day = share[0] >= 1
+    if protein_alert[0]:
+        alerts.append(PROTEIN_ALERT if full_day else PROTEIN_PACE_ALERT)
+    if hydration_alert[0]:
+        alerts.append(HYDRATION_ALERT if full_day else HYDRATION_PACE_ALERT)
+    return alerts
+
+def check_alerts_batch(protein_intake, protein_goal, protein_share, water_intake, water_goal, water_share, min_share=ALERT_MIN_SHARE):
+    """
+    The check_alerts rules for many users at once, against each user's own pace
+    instead of a fixed evening hour. At a share of 1 they are the same rules.
     
-    # Define evening as after 18:00 (6 PM)
-    # The prompt implies checking "current_time" which is passed in.
-    is_evening = current_time.hour >= 18
+    Args:
+        protein_share, water_share: Share of the goal each user usually has by
+            their current local time (progress.py curves)
+        min_share: Rules only apply from this share on, so a slow morning doesn't alert
     
-    # Rule 1: Protein check
-    if is_evening and protein_intake < (0.6 * protein_goal):
-        alerts.append("High Protein Alert: You are below 60% of your protein goal.")
-        
-    # Rule 2: Water check
-    # Prompt: "If water < goal -> Hydration Warning"
-    # Assuming this check effectively also meaningful only towards end of day 
-    # OR if the user strictly meant "current_time" is not a factor, it would alert all day.
-    # Given the parallel structure with the previous rule, let's treat it as an evening check 
-    # to avoid spamming the user in the morning.
-    if is_evening and water_intake < water_goal:
-        alerts.append("Hydration Warning: You haven't met your daily water goal.")
-        
-    return alerts
+    Returns:
+        (protein_alert, hydration_alert) boolean arrays
+    """
+    protein_share = np.asarray(protein_share)
+    water_share = np.asarray(water_share)
+    
+    protein_alert = (protein_share >= min_share) & (np.asarray(protein_intake) < PROTEIN_ALERT_RATIO * np.asarray(protein_goal) * protein_share)
+    hydration_alert = (water_share >= min_share) & (np.asarray(water_intake) < np.asarray(water_goal) * water_share)
+    return protein_alert, hydration_alert
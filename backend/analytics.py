@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+
+# daily_totals column -> key used by the analytics charts
+ROLLUP_FIELDS = {
+    "energy_kcal": "calories",
+    "protein_g": "protein",
+    "carbs_g": "carbs",
+    "fat_g": "fat",
+    "fiber_g": "fiber",
+    "water_ml": "water",
+}
+
+ROLLUP_COLUMNS = "date, " + ", ".join(ROLLUP_FIELDS)
+
+
+def date_window(end: date, days: int) -> list[str]:
+    """
+    ISO dates for the last `days` days, oldest first, ending on `end`.
+    """
+    start = end - timedelta(days=days - 1)
+    return [(start + timedelta(days=i)).isoformat() for i in range(days)]
+
+
+def build_daily_series(rows: list[dict], dates: list[str]) -> list[dict]:
+    """
+    Map daily_totals rows onto a continuous date range.
+    Days without any logs are returned as zeros so charts don't have gaps.
+    """
+    by_date = {row["date"]: row for row in rows}
+    series = []
+    for d in dates:
+        row = by_date.get(d, {})
+        day = {"date": d}
+        for column, key in ROLLUP_FIELDS.items():
+            day[key] = round(row.get(column) or 0, 2)
+        series.append(day)
+    return series
@@ -0,0 +1,91 @@
+"""
+Backfill missing nutritional goals on profiles.
+
+Replaces the SQL in database/backfill_goals.sql so the formulas only live in
+calculations.py. The SQL's two defaults are kept: water_goal is a flat 2500 ml
+(the API uses 33 ml/kg) and any gender other than male gets the female offset
+(the API adds none). Run from the repo root:
+
+    python -m backend.backfill_goals [--dry-run]
+"""
+import argparse
+
+from .config import supabase
+from .calculations import calculate_targets_batch
+
+PAGE_SIZE = 1000
+# Full profile rows per upsert request, kept well under PostgREST's payload limit
+UPSERT_CHUNK = 200
+
+# Defaults carried over from database/backfill_goals.sql
+BACKFILL_WATER_GOAL = 2500
+
+TARGET_COLUMNS = ["target_calories", "target_protein", "target_fat", "target_carbs", "target_fiber", "water_goal"]
+
+
+def fetch_profiles_missing_goals() -> list[dict]:
+    rows = []
+    start = 0
+    while True:
+        res = supabase.table("profiles")\
+            .select("*")\
+            .or_("target_calories.is.null,target_calories.eq.0,target_carbs.is.null,target_carbs.eq.0")\
+            .order("id")\
+            .range(start, start + PAGE_SIZE - 1)\
+            .execute()
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+    return rows
+
+
+def compute_updates(profiles: list[dict]) -> list[dict]:
+    """
+    Fill only the goal columns that are missing (null or 0); existing goals are kept.
+    """
+    # Rows without body stats can't be calculated
+    profiles = [p for p in profiles if p.get("weight") and p.get("height") and p.get("age") and p.get("activity_level")]
+    if not profiles:
+        return []
+
+    targets = calculate_targets_batch(
+        [p["weight"] for p in profiles],
+        [p["height"] for p in profiles],
+        [p["age"] for p in profiles],
+        ["male" if (p.get("gender") or "").lower() == "male" else "female" for p in profiles],
+        [float(p["activity_level"]) for p in profiles],
+        [p.get("goal_type") or "" for p in profiles]
+    )
+
+    targets["water_goal"] = [BACKFILL_WATER_GOAL] * len(profiles)
+
+    updates = []
+    for i, profile in enumerate(profiles):
+        row = dict(profile)
+        for col in TARGET_COLUMNS:
+            if not row.get(col):
+                row[col] = round(float(targets[col][i]))
+        updates.append(row)
+    return updates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill missing profile goals")
+    parser.add_argument("--dry-run", action="store_true", help="Compute but don't write")
+    args = parser.parse_args()
+
+    profiles = fetch_profiles_missing_goals()
+    updates = compute_updates(profiles)
+    print(f"Profiles missing goals: {len(profiles)}, computable: {len(updates)}")
+
+    if updates and not args.dry_run:
+        # Full rows so the upsert never trips NOT NULL columns on the insert path
+        for start in range(0, len(updates), UPSERT_CHUNK):
+            supabase.table("profiles").upsert(updates[start:start + UPSERT_CHUNK], on_conflict="id").execute()
+        print(f"Updated {len(updates)} profiles")
+
+
+if __name__ == "__main__":
+    main()
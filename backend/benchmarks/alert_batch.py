@@ -0,0 +1,55 @@
+"""
+Benchmark the batch alert evaluator on synthetic users.
+
+    python -m backend.benchmarks.alert_batch --users 100000
+"""
+import argparse
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+from backend.alert_job import evaluate_alerts, local_clock
+
+TIMEZONES = ["Asia/Kolkata", "UTC", "Europe/London", "America/New_York", "America/Los_Angeles", "Asia/Tokyo"]
+
+
+def synthetic_users(n: int, now_utc: datetime, seed: int = 42):
+    rng = random.Random(seed)
+    profiles = [{
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "target_protein": rng.randint(50, 160),
+        "water_goal": rng.choice([2000, 2500, 3000]),
+        "timezone": rng.choice(TIMEZONES),
+    } for _ in range(n)]
+
+    _, dates = local_clock([p["timezone"] for p in profiles], now_utc)
+    totals = [{
+        "user_id": p["id"],
+        "date": d,
+        "protein_g": rng.uniform(0, 180),
+        "water_ml": rng.uniform(0, 3500),
+    } for p, d in zip(profiles, dates) if rng.random() < 0.9]
+    return profiles, totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    now_utc = datetime(2026, 1, 15, 14, 0, tzinfo=timezone.utc)
+    profiles, totals = synthetic_users(args.users, now_utc)
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        rows = evaluate_alerts(profiles, totals, now_utc)
+        best = min(best, time.perf_counter() - start)
+
+    print(f"users={args.users} alerts={len(rows)} best={best * 1000:.1f}ms ({args.users / best:,.0f} users/s)")
@@ -0,0 +1,105 @@
+"""
+Load benchmark for /search-food with a slow (synchronous) Supabase and a slow USDA API.
+
+Compares the current handler against the old behaviour where the Supabase call
+ran inline on the event loop. Run from the repo root:
+
+    python -m backend.benchmarks.db_concurrency --requests 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+import httpx
+
+from backend import db, main
+from backend.food_index import food_index
+
+
+class SlowQuery:
+    """Mimics a supabase query builder whose execute() blocks like a network call."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        time.sleep(self.delay)
+        return SimpleNamespace(data=[])
+
+
+class SlowSupabase:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def table(self, name):
+        return SlowQuery(self.delay)
+
+
+def usda_transport(delay: float) -> httpx.MockTransport:
+    async def handler(request):
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={"foods": []})
+    return httpx.MockTransport(handler)
+
+
+async def run_load(total: int, concurrency: int) -> list[float]:
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with sem:
+                start = time.perf_counter()
+                res = await client.get("/search-food", params={"q": f"rice {i}"})
+                res.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies
+
+
+def report(label: str, latencies: list[float], elapsed: float):
+    ms = sorted(x * 1000 for x in latencies)
+    q = statistics.quantiles(ms, n=100)
+    print(f"{label:>8}: {len(ms) / elapsed:8.1f} req/s  p50={q[49]:7.1f}ms  p95={q[94]:7.1f}ms  p99={q[98]:7.1f}ms")
+
+
+async def bench(args):
+    food_index.loaded = False
+    main.supabase = SlowSupabase(args.db_delay)
+    main.usda.api_key = "benchmark"
+    main.usda._client = httpx.AsyncClient(transport=usda_transport(args.usda_delay), base_url="http://usda")
+
+    async def inline_execute(query):
+        return query.execute()
+
+    modes = [("before", inline_execute), ("after", db.execute)]
+    for label, execute in modes:
+        db_execute = db.execute
+        db.execute = execute
+        main.usda.search_cache.clear()
+        try:
+            start = time.perf_counter()
+            latencies = await run_load(args.requests, args.concurrency)
+            report(label, latencies, time.perf_counter() - start)
+        finally:
+            db.execute = db_execute
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--db-delay", type=float, default=0.05)
+    parser.add_argument("--usda-delay", type=float, default=0.1)
+    asyncio.run(bench(parser.parse_args()))
@@ -0,0 +1,137 @@
+"""
+Relevance and latency of typo-tolerant food search on a synthetic catalog.
+
+Builds a 10k+ item corpus of IFCT/USDA-style names, then runs clean queries and
+the same queries with injected typos ("paneer" -> "panner"). Relevance is
+measured against the clean query's results: recall@10 and whether the top hit
+is one of them. Compares exact-only matching (the old behaviour) with fuzzy.
+
+    python -m backend.benchmarks.fuzzy_search --items 12000 --queries 500
+"""
+import argparse
+import random
+import statistics
+import time
+
+from backend.food_index import FoodIndex
+
+BASES = [
+    "rice", "paneer", "chicken", "mutton", "lentil", "chickpea", "spinach", "potato",
+    "cauliflower", "okra", "eggplant", "cabbage", "tomato", "onion", "mango", "banana",
+    "papaya", "guava", "coconut", "peanut", "almond", "cashew", "wheat", "millet",
+    "sorghum", "barley", "oats", "yogurt", "milk", "butter", "ghee", "egg", "fish",
+    "prawn", "salmon", "tuna", "beef", "pork", "turkey", "tofu", "soybean", "kidney bean",
+    "mushroom", "carrot", "beetroot", "radish", "pumpkin", "cucumber", "apple", "orange",
+]
+DISHES = [
+    "biryani", "curry", "masala", "tikka", "korma", "pulao", "dal", "paratha", "roti",
+    "kebab", "salad", "soup", "halwa", "kheer", "pakora", "samosa", "fry", "stew",
+    "sandwich", "pickle", "chutney", "raita", "porridge", "bhaji", "vindaloo",
+]
+STYLES = [
+    "raw", "boiled", "roasted", "fried", "steamed", "baked", "dried", "canned",
+    "frozen", "grilled", "homemade", "restaurant style", "low fat", "whole", "cooked",
+]
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def build_corpus(n: int, rng: random.Random) -> list[dict]:
+    names = set()
+    while len(names) < n:
+        parts = [rng.choice(BASES)]
+        if rng.random() < 0.6:
+            parts.append(rng.choice(DISHES))
+        name = " ".join(parts).capitalize()
+        if rng.random() < 0.8:
+            name += ", " + rng.choice(STYLES)
+        if rng.random() < 0.5:
+            name += f" ({rng.choice(BASES)})"
+        if rng.random() < 0.3:
+            name += f" #{rng.randint(1, 99)}"
+        names.add(name)
+    return [{"id": i, "food_name": name} for i, name in enumerate(sorted(names), 1)]
+
+
+def typo(word: str, rng: random.Random) -> str:
+    """
+    One random deletion, insertion, substitution, transposition or doubled letter.
+    """
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.choice(["delete", "insert", "substitute", "transpose", "double"])
+    if kind == "delete":
+        return word[:i] + word[i + 1:]
+    if kind == "insert":
+        return word[:i] + rng.choice(LETTERS) + word[i:]
+    if kind == "substitute":
+        return word[:i] + rng.choice(LETTERS.replace(word[i], "")) + word[i + 1:]
+    if kind == "transpose":
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + word[i] + word[i:]
+
+
+def build_queries(n: int, rng: random.Random) -> list[tuple[str, str]]:
+    """
+    (clean, misspelled) pairs, 1-2 words, sometimes with words reordered.
+    """
+    queries = []
+    while len(queries) < n:
+        words = [rng.choice(BASES).split()[0]]
+        if rng.random() < 0.5:
+            words.append(rng.choice(DISHES))
+        if rng.random() < 0.3:
+            words.reverse()
+        candidates = [i for i, w in enumerate(words) if len(w) >= 4]
+        if not candidates:
+            continue
+        misspelled = list(words)
+        j = rng.choice(candidates)
+        misspelled[j] = typo(words[j], rng)
+        if misspelled[j] != words[j]:
+            queries.append((" ".join(words), " ".join(misspelled)))
+    return queries
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def run(index: FoodIndex, queries: list[tuple[str, str]], fuzzy: bool, k: int = 10):
+    clean_ms, typo_ms, recalls, top1 = [], [], [], 0
+    for clean, misspelled in queries:
+        start = time.perf_counter()
+        expected = {row["id"] for row in index.search(clean, limit=k, fuzzy=fuzzy)}
+        clean_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        got = [row["id"] for row in index.search(misspelled, limit=k, fuzzy=fuzzy)]
+        typo_ms.append((time.perf_counter() - start) * 1000)
+
+        if expected:
+            recalls.append(len(expected & set(got)) / len(expected))
+            top1 += bool(got) and got[0] in expected
+
+    label = "fuzzy" if fuzzy else "exact only"
+    print(f"{label:>10}: recall@{k} {statistics.mean(recalls):.3f}  top-1 {top1 / len(recalls):.3f}  "
+          f"clean p50/p95 {percentile(clean_ms, 50):.2f}/{percentile(clean_ms, 95):.2f} ms  "
+          f"typo p50/p95 {percentile(typo_ms, 50):.2f}/{percentile(typo_ms, 95):.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fuzzy food search benchmark")
+    parser.add_argument("--items", type=int, default=12000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = build_corpus(args.items, rng)
+    queries = build_queries(args.queries, rng)
+
+    start = time.perf_counter()
+    index = FoodIndex()
+    index.load(corpus)
+    print(f"Indexed {len(index)} items in {time.perf_counter() - start:.2f}s, {len(queries)} query pairs")
+
+    run(index, queries, fuzzy=False)
+    run(index, queries, fuzzy=True)
@@ -0,0 +1,256 @@
+"""
+Load-test suite for the hot API paths, run in-process against local stand-ins.
+
+The app is driven through httpx.ASGITransport with a real supabase client
+pointed at FakePostgrest and the USDA client pointed at stub_usda() (see
+standins.py), both serving recorded fixtures with a fixed latency. Every
+scenario runs at each concurrency level and reports throughput and
+p50/p95/p99; results are compared against a saved baseline JSON so
+regressions show up before deploy. Run from the repo root:
+
+    python -m backend.benchmarks.load_suite                   # compare to baseline
+    python -m backend.benchmarks.load_suite --save-baseline   # record a new baseline
+    python -m backend.benchmarks.load_suite --scenarios search-food,profile --concurrency 1,64
+
+Exits 1 if a scenario's p95 or throughput regresses beyond --tolerance, or if
+any request fails.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+import httpx
+
+from backend import db, main
+from backend.food_index import fetch_food_items, food_index
+from backend.benchmarks.standins import FakePostgrest, stub_usda
+
+BASELINE = Path(__file__).parent / "baselines" / "load_suite.json"
+
+QUERIES = ["rice", "dal", "paneer", "chiken", "basmati rice", "idli", "moong dal boiled", "banana", "chapati", "spinch"]
+
+
+class Scenario:
+    """
+    One endpoint under load: request(i) returns (method, url, kwargs) for the
+    i-th request, check(body) raises if a 200 response is not a real result.
+    """
+
+    def __init__(self, name: str, request, check=None):
+        self.name = name
+        self.request = request
+        self.check = check or (lambda body: None)
+
+
+def _expect(condition: bool, message: str):
+    if not condition:
+        raise AssertionError(message)
+
+
+def build_scenarios(fake: FakePostgrest) -> list[Scenario]:
+    # IFCT foods are logged by the food_items id /search-food returns
+    ifct_ids = [row["id"] for row in fake.tables["food_items"] if row["source"] == "IFCT"]
+    user_ids = [row["id"] for row in fake.tables["profiles"]]
+    fdc_ids = [food["fdcId"] for food in json.loads((Path(__file__).parent / "fixtures" / "fdc_search_rice.json").read_text())["foods"]]
+    run = itertools.count()
+
+    return [
+        Scenario(
+            "search-food",
+            lambda i: ("GET", "/search-food", {"params": {"q": QUERIES[i % len(QUERIES)]}}),
+            lambda body: _expect(len(body["results"]) > 0, "no search results"),
+        ),
+        Scenario(
+            "nutrition-ifct",
+            lambda i: ("POST", "/nutrition-details", {"json": {"food_id": str(ifct_ids[i % len(ifct_ids)]), "source": "IFCT", "quantity": "150"}}),
+            lambda body: _expect(body["calories"] > 0, "IFCT macros not resolved"),
+        ),
+        Scenario(
+            "nutrition-usda",
+            lambda i: ("POST", "/nutrition-details", {"json": {"food_id": str(fdc_ids[i % len(fdc_ids)]), "source": "USDA", "quantity": "1 cup"}}),
+            lambda body: _expect(body["calories"] > 0, "USDA macros not resolved"),
+        ),
+        Scenario(
+            # A new name per request, so every import misses the existence check and inserts
+            "import-usda",
+            lambda i: ("POST", "/import-usda", {"json": {"usda_id": str(fdc_ids[i % len(fdc_ids)]), "name": f"Bench import {next(run)}"}}),
+            lambda body: _expect("id" in body, "no id returned"),
+        ),
+        Scenario(
+            "calculate",
+            lambda i: ("POST", "/calculate", {"json": {"weight": 60 + i % 40, "height": 170, "age": 30, "gender": "Male" if i % 2 else "Female", "activity_factor": 1.55}}),
+            lambda body: _expect(body["tdee"] > 0, "no TDEE"),
+        ),
+        Scenario(
+            "alerts",
+            lambda i: ("POST", "/alerts", {"json": {"current_time": f"2024-05-01T{i % 24:02d}:30:00", "protein_intake": 40, "protein_goal": 120, "water_intake": 900, "water_goal": 2500}}),
+            lambda body: _expect(isinstance(body["alerts"], list), "no alerts list"),
+        ),
+        Scenario(
+            "profile",
+            lambda i: ("GET", f"/profile/{user_ids[i % len(user_ids)]}", {}),
+            lambda body: _expect("target_calories" in body, "profile not found"),
+        ),
+    ]
+
+
+def reset_caches():
+    # Each (scenario, concurrency) run starts cold so results don't depend on run order
+    main.read_cache.clear()
+    main.usda.search_cache.clear()
+    main.usda.food_cache.clear()
+
+
+async def run_level(client: httpx.AsyncClient, scenario: Scenario, total: int, concurrency: int) -> dict:
+    latencies, errors = [], []
+    requests = iter(range(total))
+
+    async def worker():
+        # A fixed number of clients each issuing requests back to back (closed loop)
+        for i in requests:
+            method, url, kwargs = scenario.request(i)
+            start = time.perf_counter()
+            try:
+                res = await client.request(method, url, **kwargs)
+                res.raise_for_status()
+                scenario.check(res.json())
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {(str(e).splitlines() or [''])[0]}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    ms = sorted(x * 1000 for x in latencies)
+    q = statistics.quantiles(ms, n=100, method="inclusive")
+    return {
+        "requests": total,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(q[49], 2),
+        "p95_ms": round(q[94], 2),
+        "p99_ms": round(q[98], 2),
+    }
+
+
+async def run_suite(args) -> dict:
+    fake = FakePostgrest(latency=args.db_latency)
+    main.supabase = fake.client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    main.usda.api_key = "benchmark"
+    main.usda._client = stub_usda(args.usda_latency)
+    # Measure the app, not the FDC quota: one client sends everything here
+    main.usda.key_limiter.rate = 0
+    main.usda.client_limiter.rate = 0
+    # What the lifespan does at startup, through the fake
+    food_index.load(await db.run(fetch_food_items, main.supabase))
+
+    scenarios = build_scenarios(fake)
+    if args.scenarios:
+        wanted = set(args.scenarios.split(","))
+        scenarios = [s for s in scenarios if s.name in wanted]
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for scenario in scenarios:
+            results[scenario.name] = {}
+            for concurrency in args.concurrency:
+                reset_caches()
+                await run_level(client, scenario, min(args.warmup, args.requests), concurrency)
+                # Best of --repeat runs (lowest p95) to keep scheduler noise out of the baseline
+                runs = []
+                for _ in range(args.repeat):
+                    reset_caches()
+                    runs.append(await run_level(client, scenario, args.requests, concurrency))
+                stats = min(runs, key=lambda run: run["p95_ms"])
+                stats["errors"] = sum(run["errors"] for run in runs)
+                stats["first_error"] = next((run["first_error"] for run in runs if run["first_error"]), None)
+                results[scenario.name][str(concurrency)] = stats
+                print(
+                    f"{scenario.name:>15} c={concurrency:<3d} {stats['rps']:8.1f} req/s"
+                    f"  p50={stats['p50_ms']:7.2f}ms  p95={stats['p95_ms']:7.2f}ms  p99={stats['p99_ms']:7.2f}ms"
+                    + (f"  errors={stats['errors']} ({stats['first_error']})" if stats["errors"] else "")
+                )
+
+    return {
+        "meta": {
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "repeat": args.repeat,
+            "db_latency_s": args.db_latency,
+            "usda_latency_s": args.usda_latency,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float, slack_ms: float) -> list[str]:
+    """
+    Regressions of `current` against `baseline`: p95 above baseline * (1 + tolerance)
+    plus slack_ms (absolute noise floor for sub-millisecond paths), or throughput
+    below baseline / (1 + tolerance).
+    """
+    regressions = []
+    for name, levels in current["results"].items():
+        for concurrency, stats in levels.items():
+            base = baseline.get("results", {}).get(name, {}).get(concurrency)
+            if not base:
+                continue
+            if stats["p95_ms"] > base["p95_ms"] * (1 + tolerance) + slack_ms:
+                regressions.append(f"{name} c={concurrency}: p95 {stats['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+            if stats["rps"] < base["rps"] / (1 + tolerance):
+                regressions.append(f"{name} c={concurrency}: {stats['rps']} req/s vs baseline {base['rps']} req/s")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backend load-test suite")
+    parser.add_argument("--scenarios", help="Comma-separated subset of scenario names")
+    parser.add_argument("--concurrency", type=lambda s: [int(c) for c in s.split(",")], default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=300, help="Requests per scenario and concurrency level")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per level, the best one is reported")
+    parser.add_argument("--db-latency", type=float, default=0.005)
+    parser.add_argument("--usda-latency", type=float, default=0.05)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="Also write this run's results here")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--slack-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    report = asyncio.run(run_suite(args))
+    failed = sum(stats["errors"] for levels in report["results"].values() for stats in levels.values())
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline saved to {args.baseline}")
+    elif args.baseline.exists():
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance, args.slack_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"OK: within {args.tolerance:.0%} of {args.baseline.name}")
+
+    if failed:
+        print(f"{failed} requests failed")
+        sys.exit(1)
@@ -0,0 +1,80 @@
+"""
+Memory and meal-math cost of nutrient dicts vs. compact nutrient vectors.
+
+Builds a synthetic catalog of full food_items rows (every column in
+NUTRIENT_COLUMNS, ~20% missing), then compares:
+- memory: list of row dicts vs. FoodRecord (__slots__ + float32 vector)
+  vs. one (foods x nutrients) float32 matrix
+- a day of logged items scaled and totalled field by field vs. scale_rows()/total()
+
+    python -m backend.benchmarks.nutrient_vectors --foods 10000
+"""
+import argparse
+import random
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from backend.nutrients import NUTRIENT_COLUMNS, FoodRecord, nutrient_vector, scale_rows, total
+
+
+def synthetic_rows(n: int, rng: random.Random) -> list[dict]:
+    rows = []
+    for i in range(n):
+        row = {"id": i, "food_name": f"Food {i}", "source": "IFCT"}
+        for col in NUTRIENT_COLUMNS:
+            row[col] = None if rng.random() < 0.2 else round(rng.uniform(0, 500), 2)
+        rows.append(row)
+    return rows
+
+
+def measure(build) -> tuple[object, int]:
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def dict_day(rows, factors):
+    # The old per-field approach: round(x * factor, 2) per nutrient, then sum
+    items = [{col: round((row[col] or 0) * factor, 2) for col in NUTRIENT_COLUMNS} for row, factor in zip(rows, factors)]
+    return {col: round(sum(item[col] for item in items), 2) for col in NUTRIENT_COLUMNS}
+
+
+def vector_day(matrix, factors):
+    return total(scale_rows(matrix, factors))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nutrient vector benchmark")
+    parser.add_argument("--foods", type=int, default=10000)
+    parser.add_argument("--day-items", type=int, default=25)
+    args = parser.parse_args()
+    rng = random.Random(3)
+
+    source = synthetic_rows(args.foods, rng)
+    # Rebuild inside measure() so each representation is counted on its own
+    rows, dict_bytes = measure(lambda: [dict(row) for row in source])
+    records, record_bytes = measure(lambda: [FoodRecord.from_row(row) for row in source])
+    matrix, matrix_bytes = measure(lambda: np.vstack([nutrient_vector(row) for row in source]))
+
+    print(f"{args.foods} foods x {len(NUTRIENT_COLUMNS)} nutrients")
+    print(f"{'dict rows':>14}: {dict_bytes / 1e6:7.2f} MB")
+    print(f"{'FoodRecord':>14}: {record_bytes / 1e6:7.2f} MB  ({dict_bytes / record_bytes:.1f}x smaller)")
+    print(f"{'float32 matrix':>14}: {matrix_bytes / 1e6:7.2f} MB  ({dict_bytes / matrix_bytes:.1f}x smaller)")
+
+    picks = rng.sample(range(args.foods), args.day_items)
+    factors = [rng.uniform(0.5, 3) for _ in picks]
+    day_rows = [rows[i] for i in picks]
+    day_matrix = matrix[picks]
+
+    # Same totals (missing counts as 0) before timing
+    expected = dict_day(day_rows, factors)
+    got = dict(zip(NUTRIENT_COLUMNS, vector_day(day_matrix, factors).tolist()))
+    assert all(abs(expected[col] - got[col]) < 0.05 for col in NUTRIENT_COLUMNS)
+
+    for label, fn in (("dict day", lambda: dict_day(day_rows, factors)), ("vector day", lambda: vector_day(day_matrix, factors))):
+        best = min(timeit.repeat(fn, number=200, repeat=5)) / 200
+        print(f"{label:>14}: {best * 1e6:9.1f} us for {args.day_items} items")
@@ -0,0 +1,121 @@
+"""
+Concurrency check for single-flight coalescing.
+
+Fires N concurrent identical requests at /search-food (IFCT via the Supabase
+ILIKE fallback plus USDA search), /nutrition-details (IFCT and USDA) and
+/import-usda against counting upstream stubs, checks every response is a real
+result, then checks that each distinct upstream request was made exactly
+once. Run from the repo root:
+
+    python -m backend.benchmarks.singleflight --requests 200
+
+Exits 1 if any response is wrong or any upstream request was repeated or missing.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+import httpx
+from supabase import ClientOptions, create_client
+
+from backend import main
+from backend.food_index import food_index
+
+UPSTREAM_DELAY = 0.2
+
+# Served for any id lookup; has both the food_items and the ifct_foods macro columns
+FOOD_ROW = {
+    "id": 7, "food_name": "Rice, raw", "source": "IFCT",
+    "energy_kcal": 356, "protein_g": 7.9, "carbs_g": 78.2, "fat_g": 0.5, "fiber_g": 2.8,
+    "calories": 356, "protein": 7.9, "carbs": 78.2, "fat": 0.5, "fiber": 2.8,
+}
+
+
+def counting_supabase(calls: Counter):
+    """
+    A real supabase client whose PostgREST requests go to a slow counting stub.
+    """
+    def handler(request: httpx.Request):
+        time.sleep(UPSTREAM_DELAY)
+        calls[f"supabase {request.method} {request.url.path} {request.url.query.decode()}"] += 1
+        if request.method == "POST":
+            return httpx.Response(201, json=[{"id": 1}])
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            return httpx.Response(200, json=FOOD_ROW)
+        # Lookups by id find the row, searches (ILIKE) find nothing
+        return httpx.Response(200, json=[FOOD_ROW] if "id" in request.url.params else [])
+
+    session = httpx.Client(transport=httpx.MockTransport(handler))
+    return create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"], ClientOptions(httpx_client=session))
+
+
+def counting_usda(calls: Counter) -> httpx.AsyncClient:
+    async def handler(request: httpx.Request):
+        await asyncio.sleep(UPSTREAM_DELAY)
+        calls[f"usda {request.url.path}"] += 1
+        if request.url.path.endswith("/foods/search"):
+            return httpx.Response(200, json={"foods": [{"fdcId": 1, "description": "Rice", "foodNutrients": []}]})
+        return httpx.Response(200, json={"fdcId": 168878, "description": "Rice, white", "foodNutrients": []})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://usda")
+
+
+async def burst(client: httpx.AsyncClient, n: int, failures: list[str], check, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(client.request(method, url, **kwargs) for _ in range(n)))
+    elapsed = time.perf_counter() - start
+    # Coalesced errors would pass the call count; every caller must get the real result
+    bad = [res for res in responses if res.status_code != 200 or not check(res.json())]
+    if bad:
+        failures.append(f"{url}: {len(bad)}/{n} unexpected responses, e.g. {bad[0].status_code} {bad[0].text[:200]}")
+    return elapsed
+
+
+async def main_async(n: int) -> list[str]:
+    calls = Counter()
+    main.supabase = counting_supabase(calls)
+    main.usda.api_key = "benchmark"
+    main.usda._client = counting_usda(calls)
+    # Force the Supabase ILIKE path instead of the in-memory index
+    food_index.loaded = False
+    failures = []
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        elapsed = await burst(client, n, failures, lambda body: len(body["results"]) > 0, "GET", "/search-food", params={"q": "rice"})
+        print(f"/search-food        x{n}: {elapsed:.2f}s")
+        elapsed = await burst(client, n, failures, lambda body: body["calories"] > 0, "POST", "/nutrition-details", json={"food_id": "7", "source": "IFCT", "quantity": "100"})
+        print(f"/nutrition (IFCT)   x{n}: {elapsed:.2f}s")
+        elapsed = await burst(client, n, failures, lambda body: "calories" in body, "POST", "/nutrition-details", json={"food_id": "168878", "source": "USDA", "quantity": "100"})
+        print(f"/nutrition (USDA)   x{n}: {elapsed:.2f}s")
+        elapsed = await burst(client, n, failures, lambda body: body["id"] == 1, "POST", "/import-usda", json={"usda_id": "169756", "name": "Rice, brown, cooked"})
+        print(f"/import-usda        x{n}: {elapsed:.2f}s")
+
+    for key, count in sorted(calls.items()):
+        print(f"  {count:4d}  {key}")
+    repeated = [key for key, count in calls.items() if count != 1]
+    if repeated:
+        failures.append(f"identical concurrent lookups were not coalesced: {', '.join(repeated)}")
+    # Every burst must have reached its upstream, or a count of zero would pass
+    for prefix in ("usda /foods/search", "usda /food/168878", "usda /food/169756", "supabase GET", "supabase POST"):
+        if not any(key.startswith(prefix) for key in calls):
+            failures.append(f"no upstream call matching {prefix!r}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Single-flight coalescing check")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    failures = asyncio.run(main_async(args.requests))
+    for line in failures:
+        print(f"FAIL {line}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: each distinct upstream call made once for {4 * args.requests} requests")
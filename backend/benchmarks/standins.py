@@ -0,0 +1,210 @@
+"""
+Local stand-ins for the app's upstreams, served in-process through httpx.MockTransport.
+
+- FakePostgrest: a small PostgREST over the recorded tables in
+  fixtures/postgrest (select, eq/ilike/in/is/gte/lt and or filters, order,
+  range/limit, .single(), insert, upsert, update and delete), used through a real
+  supabase client.
+- stub_usda(): FDC /foods/search and /food/{fdcId} from the recorded
+  fixtures/fdc_*.json payloads, with optional fault injection (Faults).
+
+Both take a fixed latency to mimic the network round trip.
+"""
+import asyncio
+import copy
+import csv
+import json
+import random
+import threading
+import time
+from pathlib import Path
+
+import httpx
+from supabase import ClientOptions, create_client
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _coerce(value: str):
+    # PostgREST filter values arrive as text; compare numbers as numbers
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+def _matches_any(row: dict, expr: str) -> bool:
+    # or=(a.eq.1,b.is.null): no nesting, values quoted if they hold commas
+    for part in next(csv.reader([expr.strip("()")])):
+        column, _, condition = part.partition(".")
+        if _matches(row, column, condition.replace('"', "")):
+            return True
+    return False
+
+
+def _matches(row: dict, column: str, expr: str) -> bool:
+    op, _, value = expr.partition(".")
+    actual = row.get(column)
+    if op == "eq":
+        return actual == _coerce(value) or str(actual) == value
+    if op == "ilike":
+        needle = value.strip("%*").lower()
+        return actual is not None and needle in str(actual).lower()
+    if op == "is":
+        return actual is None if value == "null" else str(actual).lower() == value
+    if op == "in":
+        return str(actual) in {v.strip('"') for v in value.strip("()").split(",")}
+    if op in ("gte", "gt", "lte", "lt"):
+        if actual is None:
+            return False
+        target = _coerce(value)
+        actual, target = (actual, target) if type(actual) is type(target) else (str(actual), str(target))
+        return {"gte": actual >= target, "gt": actual > target, "lte": actual <= target, "lt": actual < target}[op]
+    raise ValueError(f"unsupported filter: {column}={expr}")
+
+
+class FakePostgrest:
+    """
+    In-memory PostgREST over fixture tables. Counts requests per table.
+    """
+
+    def __init__(self, latency: float = 0.0, tables: tuple = ("food_items", "ifct_foods", "profiles")):
+        self.latency = latency
+        self.tables = {name: json.loads((FIXTURES / "postgrest" / f"{name}.json").read_text()) for name in tables}
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def _rows(self, table: str, params) -> list[dict]:
+        rows = self.tables.setdefault(table, [])
+        for column, expr in params.multi_items():
+            if column == "or":
+                rows = [row for row in rows if _matches_any(row, expr)]
+            elif column not in ("select", "limit", "offset", "order", "on_conflict", "columns"):
+                rows = [row for row in rows if _matches(row, column, expr)]
+        if params.get("order"):
+            column, _, direction = params["order"].partition(".")
+            # Nulls first, then by value; enough for the orders the app uses
+            rows = sorted(rows, key=lambda row: (row.get(column) is not None, str(row.get(column) or "")), reverse="desc" in direction)
+        return rows
+
+    @staticmethod
+    def _project(row: dict, select: str) -> dict:
+        if not select or select == "*":
+            return dict(row)
+        return {col: row.get(col) for col in (c.strip() for c in select.split(","))}
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        time.sleep(self.latency)
+        table = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+        params = request.url.params
+        single = "vnd.pgrst.object" in request.headers.get("accept", "")
+
+        with self._lock:
+            self.requests[table] = self.requests.get(table, 0) + 1
+            if request.method == "GET":
+                rows = self._rows(table, params)
+                offset = int(params.get("offset", 0))
+                limit = params.get("limit")
+                rows = rows[offset:offset + int(limit) if limit else None]
+                data = [self._project(row, params.get("select", "*")) for row in rows]
+            elif request.method == "POST":
+                payload = json.loads(request.content)
+                rows = self.tables.setdefault(table, [])
+                # Upsert: on_conflict columns act as the unique key (nulls never conflict)
+                keys = [c for c in params.get("on_conflict", "").split(",") if c]
+                ignore = "resolution=ignore-duplicates" in request.headers.get("prefer", "")
+                data = []
+                for row in payload if isinstance(payload, list) else [payload]:
+                    current = None
+                    if keys and all(row.get(k) is not None for k in keys):
+                        current = next((r for r in rows if all(str(r.get(k)) == str(row[k]) for k in keys)), None)
+                    if current is not None:
+                        if not ignore:
+                            current.update(row)
+                            data.append(dict(current))
+                        continue
+                    row = {"id": len(rows) + 1, **row}
+                    rows.append(row)
+                    data.append(row)
+            elif request.method == "PATCH":
+                fields = json.loads(request.content)
+                data = []
+                for row in self._rows(table, params):
+                    row.update(fields)
+                    data.append(dict(row))
+            elif request.method == "DELETE":
+                data = self._rows(table, params)
+                deleted = {id(row) for row in data}
+                self.tables[table] = [row for row in self.tables[table] if id(row) not in deleted]
+            else:
+                return httpx.Response(405)
+
+        if single:
+            if len(data) != 1:
+                return httpx.Response(406, json={"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned"})
+            return httpx.Response(201 if request.method == "POST" else 200, json=data[0])
+        return httpx.Response(201 if request.method == "POST" else 200, json=data)
+
+    def client(self, url: str, key: str):
+        """
+        A real supabase client whose PostgREST calls are answered by this fake.
+        """
+        session = httpx.Client(transport=httpx.MockTransport(self.handler))
+        return create_client(url, key, ClientOptions(httpx_client=session))
+
+
+class Faults:
+    """
+    Mutable fault settings for stub_usda(); change them mid-run to simulate an outage.
+
+    Args:
+        delay: Extra seconds per response (past the client's read timeout it times out)
+        error_rate: Fraction of requests answered with `status`
+        status: Error status to answer with (503, 429, ...)
+    """
+
+    def __init__(self, delay: float = 0.0, error_rate: float = 0.0, status: int = 503, seed: int = 0):
+        self.delay = delay
+        self.error_rate = error_rate
+        self.status = status
+        self.requests = 0
+        self._rng = random.Random(seed)
+
+    def healthy(self):
+        self.delay, self.error_rate = 0.0, 0.0
+
+
+def stub_usda(latency: float = 0.0, base_url: str = "http://usda", faults: Faults = None, timeout: float = 5.0) -> httpx.AsyncClient:
+    """
+    FDC API client answered from the recorded fixtures. Any query gets the same
+    search page; any fdcId gets the recorded detail payload with that id.
+    MockTransport ignores timeouts, so the stub raises ReadTimeout itself.
+    """
+    search = json.loads((FIXTURES / "fdc_search_rice.json").read_text())
+    food = json.loads((FIXTURES / "fdc_food_168878.json").read_text())
+    faults = faults or Faults()
+
+    async def handler(request: httpx.Request):
+        faults.requests += 1
+        delay = latency + faults.delay
+        read_timeout = request.extensions.get("timeout", {}).get("read")
+        if read_timeout is not None and delay > read_timeout:
+            await asyncio.sleep(read_timeout)
+            raise httpx.ReadTimeout("stub read timeout", request=request)
+        await asyncio.sleep(delay)
+        if faults.error_rate and faults._rng.random() < faults.error_rate:
+            return httpx.Response(faults.status, json={"error": "injected"})
+
+        path = request.url.path
+        if path.endswith("/foods/search"):
+            return httpx.Response(200, json=search)
+        if "/food/" in path:
+            detail = copy.deepcopy(food)
+            detail["fdcId"] = int(path.rsplit("/", 1)[-1])
+            return httpx.Response(200, json=detail)
+        return httpx.Response(404)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url=base_url, timeout=timeout)
@@ -0,0 +1,105 @@
+"""
+Check for the shared USDA client and its response caches.
+
+Sends repeated /search-food and /nutrition-details lookups, one after another,
+through the app against stub_usda() (see standins.py) and checks that:
+- every response is a real result,
+- each distinct search query and fdcId went upstream exactly once,
+- case and whitespace variants of a query share a cache entry,
+- all calls went through the one pooled client.
+Reports cold and cached latency. Run from the repo root:
+
+    python -m backend.benchmarks.usda_cache --repeat 20
+
+Exits 1 if any check fails.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+import httpx
+
+from backend import db, main
+from backend.food_index import fetch_food_items, food_index
+from backend.benchmarks.standins import FakePostgrest, Faults, stub_usda
+
+QUERIES = ["rice", "Rice ", " RICE", "banana", "chicken"]
+
+
+async def timed(client: httpx.AsyncClient, check, method: str, url: str, **kwargs) -> float:
+    start = time.perf_counter()
+    res = await client.request(method, url, **kwargs)
+    elapsed = time.perf_counter() - start
+    res.raise_for_status()
+    if not check(res.json()):
+        raise AssertionError(f"{url}: unexpected response {res.json()}")
+    return elapsed
+
+
+async def main_async(args) -> list[str]:
+    fake = FakePostgrest(latency=args.db_latency)
+    main.supabase = fake.client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    food_index.load(await db.run(fetch_food_items, main.supabase))
+    fdc_ids = [food["fdcId"] for food in json.loads((Path(__file__).parent / "fixtures" / "fdc_search_rice.json").read_text())["foods"]][:5]
+
+    faults = Faults()
+    main.usda.api_key = "benchmark"
+    main.usda._client = pooled = stub_usda(args.usda_latency, faults=faults)
+    main.usda.key_limiter.rate = 0
+    main.usda.client_limiter.rate = 0
+    main.usda.search_cache.clear()
+    main.usda.food_cache.clear()
+
+    failures = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        searches = {"cold": [], "cached": []}
+        for round_ in range(args.repeat):
+            for q in QUERIES:
+                elapsed = await timed(client, lambda body: len(body["results"]) > 0, "GET", "/search-food", params={"q": q})
+                searches["cached" if round_ or q.strip().lower() != q else "cold"].append(elapsed)
+        distinct = len({q.strip().lower() for q in QUERIES})
+        if faults.requests != distinct:
+            failures.append(f"/search-food: {faults.requests} USDA calls for {distinct} distinct queries")
+
+        faults.requests = 0
+        details = {"cold": [], "cached": []}
+        for round_ in range(args.repeat):
+            for fdc_id in fdc_ids:
+                elapsed = await timed(client, lambda body: body["calories"] > 0, "POST", "/nutrition-details", json={"food_id": str(fdc_id), "source": "USDA", "quantity": "100"})
+                details["cached" if round_ else "cold"].append(elapsed)
+        if faults.requests != len(fdc_ids):
+            failures.append(f"/nutrition-details: {faults.requests} USDA calls for {len(fdc_ids)} distinct fdcIds")
+
+    if main.usda.client is not pooled:
+        failures.append("USDA client was replaced between requests")
+
+    for name, timings in (("/search-food", searches), ("/nutrition-details", details)):
+        print(
+            f"{name:>18}: cold p50={statistics.median(timings['cold']) * 1000:6.2f}ms"
+            f"  cached p50={statistics.median(timings['cached']) * 1000:6.2f}ms"
+        )
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="USDA client and cache check")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--db-latency", type=float, default=0.005)
+    parser.add_argument("--usda-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    failures = asyncio.run(main_async(args))
+    for line in failures:
+        print(f"FAIL {line}")
+    if failures:
+        sys.exit(1)
+    print("OK: one USDA call per distinct lookup")
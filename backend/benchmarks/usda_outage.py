@@ -0,0 +1,103 @@
+"""
+/search-food latency while USDA is healthy, slow (timing out) and failing.
+
+Runs the same load through three phases of a fault-injecting USDA stub
+(standins.Faults), once with the circuit breaker and search budget disabled
+("unprotected", the old behaviour: every search waits for USDA) and once with
+the defaults ("protected": searches fall back to IFCT-only results within the
+budget, then immediately once the circuit opens). Run from the repo root:
+
+    python -m backend.benchmarks.usda_outage --requests 240 --concurrency 16
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+import httpx
+
+from backend import db, main
+from backend.food_index import fetch_food_items, food_index
+from backend.resilience import CircuitBreaker
+from backend.usda import BREAKER_FAILURES, BREAKER_RESET
+from backend.benchmarks.standins import FakePostgrest, Faults, stub_usda
+
+PHASES = {
+    "healthy": {"delay": 0.0, "error_rate": 0.0},
+    "slow": {"delay": 30.0, "error_rate": 0.0},
+    "failing": {"delay": 0.0, "error_rate": 1.0},
+}
+
+
+async def run_phase(client: httpx.AsyncClient, queries: list[str], total: int, concurrency: int) -> tuple[list[float], int]:
+    latencies, ifct_only = [], 0
+    requests = iter(range(total))
+
+    async def worker():
+        nonlocal ifct_only
+        for i in requests:
+            start = time.perf_counter()
+            res = await client.get("/search-food", params={"q": queries[i % len(queries)]})
+            res.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+            results = res.json()["results"]
+            assert results, "IFCT results missing"
+            ifct_only += all(r["source"] == "IFCT" for r in results)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, ifct_only
+
+
+async def main_async(args):
+    fake = FakePostgrest(latency=args.db_latency)
+    main.supabase = fake.client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    food_index.load(await db.run(fetch_food_items, main.supabase))
+    # Every request is a distinct USDA lookup: real food names, never cached between phases
+    queries = sorted({row["food_name"] for row in fake.tables["food_items"]})
+
+    faults = Faults()
+    main.usda.api_key = "benchmark"
+    main.usda._client = stub_usda(args.usda_latency, faults=faults, timeout=args.usda_timeout)
+    main.usda.key_limiter.rate = 0
+    main.usda.client_limiter.rate = 0
+    budget = main.USDA_SEARCH_BUDGET
+
+    modes = {
+        "unprotected": (CircuitBreaker("usda", 0), 0),
+        "protected": (CircuitBreaker("usda", BREAKER_FAILURES, BREAKER_RESET), budget),
+    }
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for mode, (breaker, mode_budget) in modes.items():
+            main.usda.breaker = breaker
+            main.USDA_SEARCH_BUDGET = mode_budget
+            for phase, settings in PHASES.items():
+                vars(faults).update(settings)
+                main.usda.search_cache.clear()
+                faults.requests = 0
+                start = time.perf_counter()
+                latencies, ifct_only = await run_phase(client, queries, args.requests, args.concurrency)
+                elapsed = time.perf_counter() - start
+                ms = sorted(x * 1000 for x in latencies)
+                q = statistics.quantiles(ms, n=100, method="inclusive")
+                print(
+                    f"{mode:>11} {phase:>8}: {len(ms) / elapsed:7.1f} req/s  p50={q[49]:8.1f}ms  p95={q[94]:8.1f}ms  p99={q[98]:8.1f}ms"
+                    f"  ifct-only={ifct_only:3d}  usda calls={faults.requests:3d}  circuit={breaker.state}"
+                )
+            # Let the abandoned (shielded) USDA lookups finish before the next mode
+            await asyncio.sleep(args.usda_timeout)
+            faults.healthy()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search latency under USDA faults")
+    parser.add_argument("--requests", type=int, default=240)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--db-latency", type=float, default=0.005)
+    parser.add_argument("--usda-latency", type=float, default=0.05)
+    parser.add_argument("--usda-timeout", type=float, default=2.0)
+    asyncio.run(main_async(parser.parse_args()))
@@ -0,0 +1,67 @@
+"""
+Microbenchmark: single-pass USDA nutrient parsing vs the old per-nutrient scans.
+
+Uses FDC-shaped fixtures (a 30-food /foods/search page and a /food/{fdcId}
+detail payload) from benchmarks/fixtures:
+
+    python -m backend.benchmarks.usda_parser
+"""
+import json
+import timeit
+from pathlib import Path
+
+from backend.usda_parser import MAPPING_RULES, parse_columns, parse_macros
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def legacy_search_macros(food):
+    nutrients = food.get("foodNutrients", [])
+    def get_val(ids):
+        for n in nutrients:
+            if n.get("nutrientId") in ids or n.get("nutrientNumber") in ids:
+                return n.get("value") or 0
+        return 0
+    return {
+        "energy_kcal": get_val([1008, "208"]),
+        "protein_g": get_val([1003, "203"]),
+        "fat_g": get_val([1004, "204"]),
+        "carbs_g": get_val([1005, "205"]),
+        "fiber_g": get_val([1079, "291"])
+    }
+
+
+def legacy_columns(data):
+    nutrients = data.get("foodNutrients", [])
+    def get_amt(possible_names):
+        for n in nutrients:
+            n_name = n.get("nutrient", {}).get("name", "").lower()
+            for p_name in possible_names:
+                if p_name.lower() == n_name:
+                    return float(n.get("amount") or 0)
+        return None
+    return {col: get_amt(names) for col, names in MAPPING_RULES}
+
+
+def bench(label, fn, number):
+    best = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"{label:>28}: {best * 1e6:9.1f} us/call")
+    return best
+
+
+if __name__ == "__main__":
+    search = json.loads((FIXTURES / "fdc_search_rice.json").read_text())
+    detail = json.loads((FIXTURES / "fdc_food_168878.json").read_text())
+    foods = search["foods"]
+
+    # Same answers before timing anything
+    assert [legacy_search_macros(f) for f in foods] == [parse_macros(f) for f in foods]
+    assert legacy_columns(detail) == parse_columns(detail)
+
+    old = bench("search page (legacy)", lambda: [legacy_search_macros(f) for f in foods], 200)
+    new = bench("search page (parser)", lambda: [parse_macros(f) for f in foods], 200)
+    print(f"{'speedup':>28}: {old / new:9.1f}x")
+
+    old = bench("import columns (legacy)", lambda: legacy_columns(detail), 500)
+    new = bench("import columns (parser)", lambda: parse_columns(detail), 500)
+    print(f"{'speedup':>28}: {old / new:9.1f}x")
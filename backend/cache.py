@@ -0,0 +1,170 @@
+"""
+Read caches.
+
+- TTLCache: in-process LRU with per-entry TTL
+- RedisCache: optional shared cache (needs `pip install redis` and REDIS_URL)
+- TieredCache: in-process LRU in front of a shared cache
+
+All expose get/set/delete plus hits/misses counters for /metrics.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Small in-process LRU cache with a time-to-live per entry.
+
+    Expired entries are dropped lazily on read; once maxsize is reached the
+    least recently used entry is evicted. With keep_stale=True expired entries
+    stay until evicted, so get_stale() can serve them while an upstream is down.
+    Thread-safe: sync handlers use it from FastAPI's threadpool.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600, keep_stale: bool = False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.keep_stale = keep_stale
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                if not self.keep_stale:
+                    del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        """
+        The cached value even if expired (only kept with keep_stale=True).
+        """
+        with self._lock:
+            entry = self._data.get(key)
+        return default if entry is None else entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """
+    Shared cache backed by Redis. Values are stored as JSON.
+    Errors are treated as misses so a Redis outage only costs latency.
+    """
+
+    def __init__(self, client, prefix: str = "nutriscope:", ttl: float = 3600):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            raw = self.client.get(self.prefix + str(key))
+        except Exception:
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        try:
+            self.client.set(self.prefix + str(key), json.dumps(value, default=str), ex=max(1, int(ttl if ttl is not None else self.ttl)))
+        except Exception:
+            pass
+
+    def delete(self, key: Hashable):
+        try:
+            self.client.delete(self.prefix + str(key))
+        except Exception:
+            pass
+
+
+class TieredCache:
+    """
+    In-process LRU in front of a shared cache.
+    Deletes go to both tiers, so invalidation is visible to every worker that
+    reads through the shared tier once its local entry expires.
+    """
+
+    def __init__(self, local: TTLCache, shared):
+        self.local = local
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.local.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        if value is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self.local.set(key, value, min(ttl, self.local.ttl) if ttl is not None else None)
+        self.shared.set(key, value, ttl)
+
+    def delete(self, key: Hashable):
+        self.local.delete(key)
+        self.shared.delete(key)
+
+
+def create_cache(name: str, maxsize: int = 1024, ttl: float = 300):
+    """
+    In-process TTLCache, or a TieredCache over Redis when REDIS_URL is set.
+    """
+    local = TTLCache(maxsize=maxsize, ttl=ttl)
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        return local
+
+    try:
+        import redis
+    except ImportError:
+        return local
+
+    # Short local TTL so other workers' invalidations show up quickly
+    local.ttl = min(ttl, float(os.getenv("LOCAL_CACHE_TTL", 5)))
+    client = redis.Redis.from_url(redis_url, socket_timeout=0.2)
+    return TieredCache(local, RedisCache(client, prefix=f"nutriscope:{name}:", ttl=ttl))
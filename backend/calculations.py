@@ -1,3 +1,16 @@
+import numpy as np
+
+# Mifflin-St Jeor gender offsets
+GENDER_OFFSETS = {"male": 5, "female": -161}
+
+# Daily calorie adjustment per goal type
+GOAL_ADJUSTMENTS = {"lose": -500, "gain": 500}
+
+PROTEIN_G_PER_KG = 1.6
+FAT_G_PER_KG = 0.8
+FIBER_TARGET_G = 30
+WATER_ML_PER_KG = 33
+
 def calculate_bmr(weight: float, height: float, age: int, gender: str) -> float:
     """
     Calculate Basal Metabolic Rate (BMR) using the Mifflin-St Jeor equation.
@@ -11,10 +24,8 @@ def calculate_bmr(weight: float, height: float, age: int, gender: str) -> float:
     # Base calculation
     bmr = (10 * weight) + (6.25 * height) - (5 * age)
     
-    if gender.lower() == "male":
-        bmr += 5
-    elif gender.lower() == "female":
-        bmr -= 161
+    if gender.lower() in GENDER_OFFSETS:
+        bmr += GENDER_OFFSETS[gender.lower()]
     else:
         # Fallback or default if gender is unspecified/other, treating as neutral or midway? 
         # For now, let's default to male baseline or raise error. 
@@ -46,4 +57,61 @@ def calculate_water_goal(weight: float) -> float:
         weight: Weight in kg
     """
     # Using 33ml per kg heuristic
-    return weight * 33
+    return weight * WATER_ML_PER_KG
+
+def _lookup_offsets(labels, offsets: dict) -> np.ndarray:
+    """
+    Map string labels to numeric offsets (case-insensitive, unknown -> 0).
+    Only the distinct labels are lowercased, then broadcast back.
+    """
+    uniques, inverse = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+    table = np.array([offsets.get(label.lower(), 0) for label in uniques], dtype=np.float64)
+    return table[inverse]
+
+def calculate_targets_batch(weight, height, age, gender, activity_factor, goal_type=None) -> dict:
+    """
+    Vectorized BMR/TDEE/water and macro targets for many profiles at once.
+    Same formulas as the scalar functions above, applied column-wise.
+    
+    Args:
+        weight, height, age, activity_factor: Array-likes of equal length
+        gender: Array-like of "male"/"female" (case-insensitive, other -> no offset)
+        goal_type: Optional array-like of "lose"/"gain"/"maintain"
+    
+    Returns:
+        Dict of NumPy arrays: bmr, tdee, water_goal, target_calories,
+        target_protein, target_fat, target_carbs, target_fiber
+    """
+    weight = np.asarray(weight, dtype=np.float64)
+    height = np.asarray(height, dtype=np.float64)
+    age = np.asarray(age, dtype=np.float64)
+    activity_factor = np.asarray(activity_factor, dtype=np.float64)
+    n = weight.shape[0]
+
+    if not (height.shape[0] == age.shape[0] == activity_factor.shape[0] == len(gender) == n):
+        raise ValueError("All input columns must have the same length")
+    if goal_type is not None and len(goal_type) != n:
+        raise ValueError("All input columns must have the same length")
+
+    gender_offset = _lookup_offsets(gender, GENDER_OFFSETS)
+
+    bmr = (10 * weight) + (6.25 * height) - (5 * age) + gender_offset
+    tdee = bmr * activity_factor
+
+    goal_offset = _lookup_offsets(goal_type, GOAL_ADJUSTMENTS) if goal_type is not None else np.zeros(n)
+    target_calories = tdee + goal_offset
+
+    target_protein = np.round(weight * PROTEIN_G_PER_KG)
+    target_fat = np.round(weight * FAT_G_PER_KG)
+    target_carbs = np.round((target_calories - (target_protein * 4 + target_fat * 9)) / 4)
+
+    return {
+        "bmr": bmr,
+        "tdee": tdee,
+        "water_goal": weight * WATER_ML_PER_KG,
+        "target_calories": target_calories,
+        "target_protein": target_protein,
+        "target_fat": target_fat,
+        "target_carbs": target_carbs,
+        "target_fiber": np.full(n, float(FIBER_TARGET_G)),
+    }
@@ -1,4 +1,7 @@
 import os
+import threading
+from typing import Optional
+
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
@@ -7,7 +10,33 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in the .env file")
+_client: Optional[Client] = None
+_client_lock = threading.Lock()
+
+
+def get_supabase() -> Client:
+    """
+    The shared Supabase client, created on first use (normally during app startup)
+    so importing the app or a CLI module doesn't need credentials.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if not SUPABASE_URL or not SUPABASE_KEY:
+                    raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in the .env file")
+                _client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _client
+
+
+class _LazyClient:
+    """
+    Module-level `supabase` that resolves get_supabase() on first attribute
+    access, so `from .config import supabase` call sites stay unchanged.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_supabase(), name)
+
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase = _LazyClient()
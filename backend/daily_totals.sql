@@ -0,0 +1,120 @@
+-- Per-user, per-day nutrient rollup used by GET /analytics/{user_id}
+-- Kept up to date incrementally by triggers on daily_logs and water_logs,
+-- so reading a 90 or 365 day window touches at most one row per day.
+
+CREATE TABLE IF NOT EXISTS daily_totals (
+    user_id UUID NOT NULL,
+    date DATE NOT NULL,
+
+    energy_kcal DOUBLE PRECISION NOT NULL DEFAULT 0,
+    protein_g DOUBLE PRECISION NOT NULL DEFAULT 0,
+    carbs_g DOUBLE PRECISION NOT NULL DEFAULT 0,
+    fat_g DOUBLE PRECISION NOT NULL DEFAULT 0,
+    fiber_g DOUBLE PRECISION NOT NULL DEFAULT 0,
+    water_ml DOUBLE PRECISION NOT NULL DEFAULT 0,
+    log_count INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (user_id, date)
+);
+
+ALTER TABLE daily_totals ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own totals" ON daily_totals
+    FOR SELECT USING (auth.uid() = user_id);
+
+-- Add (sign = 1) or subtract (sign = -1) one food log from its day
+CREATE OR REPLACE FUNCTION apply_food_log_to_totals(log daily_logs, sign INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO daily_totals (user_id, date, energy_kcal, protein_g, carbs_g, fat_g, fiber_g, log_count)
+    VALUES (
+        log.user_id,
+        log.date,
+        sign * COALESCE(log.energy_kcal, 0),
+        sign * COALESCE(log.protein_g, 0),
+        sign * COALESCE(log.carbs_g, 0),
+        sign * COALESCE(log.fat_g, 0),
+        sign * COALESCE(log.fiber_g, 0),
+        sign
+    )
+    ON CONFLICT (user_id, date) DO UPDATE SET
+        energy_kcal = daily_totals.energy_kcal + EXCLUDED.energy_kcal,
+        protein_g = daily_totals.protein_g + EXCLUDED.protein_g,
+        carbs_g = daily_totals.carbs_g + EXCLUDED.carbs_g,
+        fat_g = daily_totals.fat_g + EXCLUDED.fat_g,
+        fiber_g = daily_totals.fiber_g + EXCLUDED.fiber_g,
+        log_count = daily_totals.log_count + EXCLUDED.log_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION daily_logs_rollup_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_food_log_to_totals(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_food_log_to_totals(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS daily_logs_rollup ON daily_logs;
+CREATE TRIGGER daily_logs_rollup
+    AFTER INSERT OR UPDATE OR DELETE ON daily_logs
+    FOR EACH ROW EXECUTE FUNCTION daily_logs_rollup_trigger();
+
+CREATE OR REPLACE FUNCTION water_logs_rollup_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO daily_totals (user_id, date, water_ml)
+        VALUES (OLD.user_id, OLD.date, -COALESCE(OLD.amount_ml, 0))
+        ON CONFLICT (user_id, date) DO UPDATE SET
+            water_ml = daily_totals.water_ml + EXCLUDED.water_ml;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO daily_totals (user_id, date, water_ml)
+        VALUES (NEW.user_id, NEW.date, COALESCE(NEW.amount_ml, 0))
+        ON CONFLICT (user_id, date) DO UPDATE SET
+            water_ml = daily_totals.water_ml + EXCLUDED.water_ml;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS water_logs_rollup ON water_logs;
+CREATE TRIGGER water_logs_rollup
+    AFTER INSERT OR UPDATE OR DELETE ON water_logs
+    FOR EACH ROW EXECUTE FUNCTION water_logs_rollup_trigger();
+
+-- One-off backfill from existing logs (safe to re-run: rebuilds from scratch)
+TRUNCATE daily_totals;
+
+INSERT INTO daily_totals (user_id, date, energy_kcal, protein_g, carbs_g, fat_g, fiber_g, water_ml, log_count)
+SELECT
+    user_id,
+    date,
+    SUM(energy_kcal),
+    SUM(protein_g),
+    SUM(carbs_g),
+    SUM(fat_g),
+    SUM(fiber_g),
+    SUM(water_ml),
+    SUM(log_count)
+FROM (
+    SELECT user_id, date,
+        COALESCE(energy_kcal, 0) AS energy_kcal,
+        COALESCE(protein_g, 0) AS protein_g,
+        COALESCE(carbs_g, 0) AS carbs_g,
+        COALESCE(fat_g, 0) AS fat_g,
+        COALESCE(fiber_g, 0) AS fiber_g,
+        0 AS water_ml,
+        1 AS log_count
+    FROM daily_logs
+    UNION ALL
+    SELECT user_id, date, 0, 0, 0, 0, 0, COALESCE(amount_ml, 0), 0
+    FROM water_logs
+) logs
+GROUP BY user_id, date;
@@ -0,0 +1,88 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from .metrics import observe_upstream, register_singleflight
+from .singleflight import SingleFlight
+
+# supabase-py is synchronous; run its calls on a bounded pool so an async
+# handler never blocks the event loop while PostgREST is answering.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 16))
+
+_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="supabase")
+
+# Identical reads that overlap in time share one PostgREST round trip
+_reads = SingleFlight()
+register_singleflight("supabase", _reads)
+
+
+async def run(fn: Callable, *args) -> Any:
+    """
+    Run a blocking callable on the database thread pool.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, fn, *args)
+
+
+def _table_name(query) -> str:
+    # postgrest builders keep the request URL, e.g. ".../rest/v1/food_items"
+    path = getattr(getattr(query, "request", None), "path", None)
+    return str(path).rstrip("/").rsplit("/", 1)[-1] if path else "unknown"
+
+
+def execute_sync(query) -> Any:
+    """
+    Execute a supabase query builder in the current thread, timed per table.
+    For use from sync handlers, which FastAPI already runs in a threadpool.
+    """
+    with observe_upstream("supabase", _table_name(query)):
+        return query.execute()
+
+
+async def execute(query) -> Any:
+    """
+    Await a supabase query builder, e.g.
+
+        res = await db.execute(supabase.table("food_items").select("*").eq("id", 1))
+    """
+    return await run(execute_sync, query)
+
+
+def as_user(query, token: str):
+    """
+    Send `query` with the caller's Supabase access token instead of the server key,
+    so PostgREST applies that user's RLS policies (auth.uid() = user_id).
+    Each builder has its own headers, so this doesn't leak into other queries.
+    """
+    query.request.headers["Authorization"] = f"Bearer {token}"
+    return query
+
+
+def _read_key(query):
+    """
+    Identity of a read query: method, URL, filters, response shape (.single() etc)
+    and who it runs as, so reads made as different users are never shared.
+    """
+    request = query.request
+    return (
+        str(request.http_method),
+        str(request.path),
+        str(request.params),
+        request.headers.get("accept"),
+        request.headers.get("authorization"),
+        type(query).__name__,
+    )
+
+
+async def execute_shared(query) -> Any:
+    """
+    Like execute(), but concurrent identical reads share one call. Only use for
+    SELECTs: callers get the same response object, so don't mutate it.
+    """
+    try:
+        key = _read_key(query)
+    except AttributeError:
+        # Not a postgrest builder (e.g. a test double), nothing to key on
+        return await execute(query)
+    return await _reads.do(key, lambda: execute(query))
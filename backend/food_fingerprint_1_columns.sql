@@ -0,0 +1,22 @@
+-- Dedup index and sync bookkeeping for food_items, step 1 of 3
+-- name_fingerprint is the normalized name from food_index.name_fingerprint(),
+-- so "Rice, white, cooked" and "rice white cooked" are stored once per source.
+-- synced_at is when backend/usda_sync.py last refreshed a USDA row from FDC,
+-- sync_attempted_at when it last tried (failed fetches only set this one).
+--
+-- 1. This file: add the columns
+-- 2. Fill name_fingerprint for existing rows: python -m backend.usda_sync --backfill-fingerprints
+-- 3. food_fingerprint_2_dedupe.sql: archive and drop USDA near-duplicates, then
+--    build the unique indexes
+--
+-- Step 2 has to run before the unique indexes exist, since it fingerprints
+-- USDA duplicates that step 3 then removes.
+
+ALTER TABLE food_items ADD COLUMN IF NOT EXISTS name_fingerprint TEXT;
+ALTER TABLE food_items ADD COLUMN IF NOT EXISTS synced_at TIMESTAMPTZ;
+ALTER TABLE food_items ADD COLUMN IF NOT EXISTS sync_attempted_at TIMESTAMPTZ;
+
+-- Least-recently-attempted-first scan for usda_sync.py
+DROP INDEX IF EXISTS food_items_source_synced_at_idx;
+CREATE INDEX IF NOT EXISTS food_items_source_sync_attempted_at_idx
+    ON food_items (source, sync_attempted_at NULLS FIRST);
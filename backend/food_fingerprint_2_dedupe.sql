@@ -0,0 +1,55 @@
+-- Dedup index for food_items, step 3 of 3 (see food_fingerprint_1_columns.sql)
+-- Run after python -m backend.usda_sync --backfill-fingerprints. Everything
+-- below is one transaction: if an index fails to build, no rows are deleted.
+-- Deleted rows are copied to food_items_dedup_archive with the reason.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS food_items_dedup_archive (LIKE food_items);
+ALTER TABLE food_items_dedup_archive ADD COLUMN IF NOT EXISTS archived_at TIMESTAMPTZ DEFAULT NOW();
+ALTER TABLE food_items_dedup_archive ADD COLUMN IF NOT EXISTS archive_reason TEXT;
+
+-- USDA near-duplicates are re-importable copies of the same food; keep the oldest
+WITH gone AS (
+    DELETE FROM food_items f
+    USING food_items keep
+    WHERE f.source = 'USDA'
+      AND keep.source = 'USDA'
+      AND f.name_fingerprint = keep.name_fingerprint
+      AND f.id > keep.id
+    RETURNING f.*
+)
+INSERT INTO food_items_dedup_archive
+SELECT gone.*, NOW(), 'name_fingerprint' FROM gone;
+
+-- Curated rows (IFCT) are all kept; only the oldest of a near-duplicate group
+-- carries the fingerprint (the backfill leaves the others null as well)
+UPDATE food_items f
+SET name_fingerprint = NULL
+FROM food_items keep
+WHERE f.source <> 'USDA'
+  AND keep.source = f.source
+  AND f.name_fingerprint = keep.name_fingerprint
+  AND f.id > keep.id;
+
+WITH gone AS (
+    DELETE FROM food_items f
+    USING food_items keep
+    WHERE f.source = 'USDA'
+      AND keep.source = 'USDA'
+      AND f.food_code = keep.food_code
+      AND f.id > keep.id
+    RETURNING f.*
+)
+INSERT INTO food_items_dedup_archive
+SELECT gone.*, NOW(), 'food_code' FROM gone;
+
+-- Target of the upserts in /import-usda and usda_import.py (on_conflict=source,name_fingerprint)
+CREATE UNIQUE INDEX IF NOT EXISTS food_items_source_fingerprint_key
+    ON food_items (source, name_fingerprint);
+
+-- One row per fdcId, which is what usda_sync.py refreshes by
+CREATE UNIQUE INDEX IF NOT EXISTS food_items_usda_food_code_key
+    ON food_items (food_code) WHERE source = 'USDA';
+
+COMMIT;
@@ -0,0 +1,426 @@
+import heapq
+from collections import Counter
+from typing import Optional
+
+from .nutrients import MACRO_COLUMNS, FoodRecord
+
+# Columns needed to answer /search-food without touching Supabase
+INDEX_COLUMNS = "id, food_name, source, " + ", ".join(MACRO_COLUMNS)
+
+# Filler words that don't tell two foods apart
+FINGERPRINT_STOPWORDS = frozenset({"a", "and", "in", "of", "the", "with"})
+
+# Terms shorter than a trigram are matched against word prefixes instead
+MAX_PREFIX_LEN = 2
+PAGE_SIZE = 1000
+
+# Score added on top of term match quality (0-1), by rank_tier()
+TIER_BONUS = (1.0, 0.5, 0.25, 0.0)
+# Each edit costs this much of a term's match quality
+EDIT_PENALTY = 0.25
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split a food name or query into lowercase alphanumeric tokens.
+    "Rice, white (cooked)" -> ["rice", "white", "cooked"]
+    """
+    cleaned = "".join(ch if ch.isalnum() else " " for ch in text.lower())
+    return cleaned.split()
+
+
+def name_fingerprint(name: str) -> str:
+    """
+    Normalized name used to spot near-duplicate foods: lowercase alphanumeric
+    tokens, filler words dropped, deduplicated and sorted.
+    "Rice, white, cooked" and "rice white cooked" -> "cooked rice white"
+    """
+    return " ".join(sorted(set(tokenize(name)) - FINGERPRINT_STOPWORDS))
+
+
+def trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def max_edits(term: str) -> int:
+    """
+    Typos tolerated for a query term: none below 3 letters, 1 up to 5, else 2.
+    """
+    if len(term) < 3:
+        return 0
+    return 1 if len(term) <= 5 else 2
+
+
+def levenshtein(a: str, b: str, max_dist: int) -> Optional[int]:
+    """
+    Edit distance between a and b, or None once it is known to exceed max_dist.
+    """
+    if abs(len(a) - len(b)) > max_dist:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        # Every later row is at least the smallest value of this one
+        if min(current) > max_dist:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= max_dist else None
+
+
+def match_score(query: str, name: str, distances: Optional[dict] = None) -> Optional[float]:
+    """
+    Relevance of a lowercase name for a lowercase query, None if it doesn't match.
+
+    Every query term must appear in the name, either as a substring (quality 1)
+    or within max_edits() of one of its words (quality 1 - EDIT_PENALTY per edit).
+    Word order doesn't matter. The mean term quality is topped up with the
+    TIER_BONUS of the query with typos corrected, so "ric" and "rcie" rank
+    names the same way "rice" would, just lower.
+
+    `distances` memoizes (term, word) edit distances across calls; pass one
+    dict when scoring many names for the same query.
+    """
+    terms = query.split()
+    if not terms:
+        return None
+
+    tokens = None
+    corrected = []
+    total = 0.0
+    for term in terms:
+        if term in name:
+            total += 1.0
+            corrected.append(term)
+            continue
+        limit = max_edits(term)
+        if not limit:
+            return None
+        if tokens is None:
+            tokens = tokenize(name)
+        best = best_token = None
+        for token in tokens:
+            if distances is None:
+                dist = levenshtein(term, token, limit)
+            else:
+                key = (term, token)
+                if key not in distances:
+                    distances[key] = levenshtein(term, token, limit)
+                dist = distances[key]
+            if dist is not None and (best is None or dist < best):
+                best, best_token = dist, token
+                if best == 1:
+                    break
+        if best is None:
+            return None
+        total += 1.0 - EDIT_PENALTY * best
+        corrected.append(best_token)
+
+    return total / len(terms) + TIER_BONUS[rank_tier(name, " ".join(corrected))]
+
+
+def rank_tier(name: str, query: str) -> int:
+    """
+    0 = exact, 1 = starts with, 2 = contains, 3 = terms match out of order.
+    Both arguments are expected lowercase and stripped.
+    """
+    if name == query:
+        return 0
+    if name.startswith(query):
+        return 1
+    if query in name:
+        return 2
+    return 3
+
+
+class FoodIndex:
+    """
+    In-memory inverted index over the food_items catalog.
+
+    Each row is indexed three ways:
+    - prefix index: short word prefixes ("r", "ri") for 1-2 letter terms
+    - trigram index: character trigrams of the full lowercase name, used to
+      answer substring terms (same semantics as ILIKE '%term%')
+    - word vocabulary with its own trigram index, used to find words within a
+      couple of edits of a misspelled term ("panner" -> "paneer")
+
+    Only one row per name_fingerprint() is indexed for search (IFCT over USDA,
+    then the first seen), so near-duplicates don't grow candidate sets.
+    Duplicates are still kept for get().
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._rows: dict[object, FoodRecord] = {}
+        self._names: dict = {}
+        self._prefixes: dict[str, set] = {}
+        self._trigrams: dict[str, set] = {}
+        self._words: dict[str, set] = {}
+        self._word_trigrams: dict[str, set] = {}
+        self._fingerprints: dict[str, object] = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def last_id(self):
+        """
+        Highest food_items id in the index (None when empty); rows past it are new.
+        """
+        return max(self._rows, default=None)
+
+    @classmethod
+    def build(cls, rows: list[dict]) -> "FoodIndex":
+        """
+        A new, loaded index. Building ~12k rows takes about half a second, so the
+        app does it on a worker thread and swaps the result in with replace().
+        """
+        index = cls()
+        index.load(rows)
+        return index
+
+    def replace(self, other: "FoodIndex"):
+        """
+        Take over another index's contents. Call it on the event loop thread (no
+        await in between), so searches see the old or the new index, never a mix.
+        """
+        self.__dict__.update(other.__dict__)
+
+    def load(self, rows: list[dict]):
+        """
+        Rebuild the whole index from a list of food_items rows.
+        """
+        self._rows = {}
+        self._names = {}
+        self._prefixes = {}
+        self._trigrams = {}
+        self._words = {}
+        self._word_trigrams = {}
+        self._fingerprints = {}
+        for row in rows:
+            self.add(row)
+        self.loaded = True
+
+    def add(self, row: dict):
+        """
+        Insert (or replace) a single row. Used for incremental refresh after /import-usda.
+        """
+        food_id = row.get("id")
+        name = row.get("food_name")
+        if food_id is None or not name:
+            return
+
+        if food_id in self._rows:
+            self.remove(food_id)
+
+        # Compact record instead of the row dict (imports hand us all ~50 columns)
+        record = self._rows[food_id] = FoodRecord.from_row(row)
+
+        fingerprint = name_fingerprint(name)
+        current = self._fingerprints.get(fingerprint)
+        if current is not None:
+            if record.source != "IFCT" or self._rows[current].source == "IFCT":
+                return
+            # IFCT replaces a USDA near-duplicate in search
+            self._unindex(current)
+        self._fingerprints[fingerprint] = food_id
+        self._index(food_id, name.lower().strip())
+
+    def _index(self, food_id, lowered: str):
+        self._names[food_id] = lowered
+        for token in set(tokenize(lowered)):
+            for i in range(1, min(len(token), MAX_PREFIX_LEN) + 1):
+                self._prefixes.setdefault(token[:i], set()).add(food_id)
+            if token not in self._words:
+                self._words[token] = set()
+                for gram in trigrams(f"${token}$"):
+                    self._word_trigrams.setdefault(gram, set()).add(token)
+            self._words[token].add(food_id)
+
+        for gram in trigrams(lowered):
+            self._trigrams.setdefault(gram, set()).add(food_id)
+
+    def find(self, fingerprint: str, source: Optional[str] = None):
+        """
+        Id of the indexed row with this name_fingerprint() (and source), or None.
+        """
+        food_id = self._fingerprints.get(fingerprint)
+        if food_id is None or (source is not None and self._rows[food_id].source != source):
+            return None
+        return food_id
+
+    def get(self, food_id) -> Optional[FoodRecord]:
+        return self._rows.get(food_id)
+
+    def remove(self, food_id):
+        record = self._rows.pop(food_id, None)
+        if record is not None and food_id in self._names:
+            # Near-duplicates left unindexed come back at the next load()
+            self._fingerprints.pop(name_fingerprint(record.name), None)
+        self._unindex(food_id)
+
+    def _unindex(self, food_id):
+        lowered = self._names.pop(food_id, None)
+        if lowered is None:
+            return
+
+        for token in set(tokenize(lowered)):
+            for i in range(1, min(len(token), MAX_PREFIX_LEN) + 1):
+                self._discard(self._prefixes, token[:i], food_id)
+            self._discard(self._words, token, food_id)
+            if token not in self._words:
+                for gram in trigrams(f"${token}$"):
+                    self._discard(self._word_trigrams, gram, token)
+
+        for gram in trigrams(lowered):
+            self._discard(self._trigrams, gram, food_id)
+
+    @staticmethod
+    def _discard(index: dict, key: str, food_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(food_id)
+            if not ids:
+                del index[key]
+
+    def _candidates_for_term(self, term: str) -> set:
+        if len(term) < 3:
+            # Too short for trigrams, fall back to word prefixes
+            return self._prefixes.get(term, set())
+
+        # Substring match: intersect trigram postings, smallest first
+        postings = []
+        for gram in trigrams(term):
+            ids = self._trigrams.get(gram)
+            if not ids:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+    def _fuzzy_candidates_for_term(self, term: str) -> set:
+        """
+        Rows with a word within max_edits(term) of the term.
+        """
+        limit = max_edits(term)
+        if not limit:
+            return set()
+
+        # One edit changes at most 3 boundary-padded trigrams, so a word within
+        # `limit` edits shares at least len(grams) - 3 * limit of them
+        grams = trigrams(f"${term}$")
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._word_trigrams.get(gram, ()))
+        needed = len(grams) - 3 * limit
+
+        result = set()
+        for word, count in shared.items():
+            if count >= needed and levenshtein(term, word, limit) is not None:
+                result |= self._words[word]
+        return result
+
+    def _match(self, terms: list[str], candidates_for_term) -> set:
+        candidates: Optional[set] = None
+        for term in sorted(terms, key=len, reverse=True):
+            ids = candidates_for_term(term)
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        return candidates
+
+    def search_scored(self, q: str, limit: int = 30, fuzzy: bool = True) -> list[tuple[float, dict]]:
+        """
+        Top `limit` (score, row) pairs for the query, best first (see match_score).
+        Typo-tolerant candidates are only generated when exact matches
+        don't fill the page.
+        """
+        query = q.lower().strip()
+        terms = query.split()
+        if not terms:
+            return []
+
+        scored = {}
+        for food_id in self._match(terms, self._candidates_for_term):
+            # Trigram hits are a superset, match_score verifies the actual substring
+            score = match_score(query, self._names[food_id])
+            if score is not None:
+                scored[food_id] = score
+
+        if fuzzy and len(scored) < limit:
+            widened = self._match(terms, lambda term: self._candidates_for_term(term) | self._fuzzy_candidates_for_term(term))
+            distances = {}
+            for food_id in widened - scored.keys():
+                score = match_score(query, self._names[food_id], distances)
+                if score is not None:
+                    scored[food_id] = score
+
+        # Heap selection of the top-k instead of sorting every candidate
+        top = heapq.nsmallest(limit, scored.items(), key=lambda item: (-item[1], self._names[item[0]]))
+        return [(score, self._rows[food_id].to_row(MACRO_COLUMNS)) for food_id, score in top]
+
+    def search(self, q: str, limit: int = 30, fuzzy: bool = True) -> list[dict]:
+        """
+        Return rows matching every query term, best first.
+        Ranking: Exact > StartsWith > Contains > Out of order > Typos, then alphabetical.
+        """
+        return [row for _, row in self.search_scored(q, limit, fuzzy)]
+
+
+def rank_results(q: str, groups: list[list[dict]], limit: int) -> list[dict]:
+    """
+    Merge result lists from several sources into one ranked page.
+
+    `groups` are in priority order (IFCT first): near-duplicate names (same
+    name_fingerprint()) keep the earliest group's item, and equal scores are
+    broken by group, then name.
+    Items that don't match the query at all (e.g. USDA's own fuzzy hits) rank last.
+    """
+    query = q.lower().strip()
+    best = {}
+    for priority, items in enumerate(groups):
+        for item in items:
+            name = (item.get("name") or "").lower().strip()
+            fingerprint = name_fingerprint(name)
+            if not fingerprint or fingerprint in best:
+                continue
+            score = match_score(query, name) or 0.0
+            best[fingerprint] = (-score, priority, name, len(best), item)
+
+    return [entry[-1] for entry in heapq.nsmallest(limit, best.values(), key=lambda entry: entry[:4])]
+
+
+def fetch_food_items(client, columns: str = INDEX_COLUMNS, after_id=None) -> list[dict]:
+    """
+    Page through the whole food_items table, in id order so pages don't
+    overlap or skip rows. With `after_id`, only rows with a greater id.
+    """
+    rows = []
+    start = 0
+    while True:
+        query = client.table("food_items").select(columns)
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        res = query\
+            .order("id")\
+            .range(start, start + PAGE_SIZE - 1)\
+            .execute()
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+    return rows
+
+
+food_index = FoodIndex()
@@ -1,19 +1,195 @@
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, Depends, Header, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from postgrest.exceptions import APIError
+from pydantic import BaseModel, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, date, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import uvicorn
 import os
-import httpx
+import asyncio
+import hashlib
+import json
+import time
 from contextlib import asynccontextmanager
 
 # Modular imports
-from .config import supabase
-from .calculations import calculate_bmr, calculate_tdee, calculate_water_goal
+from .config import get_supabase, supabase
+from . import db
+from .calculations import calculate_bmr, calculate_tdee, calculate_water_goal, calculate_targets_batch
 from .alerts import check_alerts
+from .alert_job import run_alert_job
+from .analytics import ROLLUP_COLUMNS, date_window, build_daily_series
+from .progress import CURVE_TTL, TOTAL_COLUMNS, build_curves, fetch_history, evaluate_progress
+from .singleflight import SingleFlight
+from .resilience import AdmissionControl, LoadShedder, Unavailable
+from .food_index import INDEX_COLUMNS, FoodIndex, food_index, fetch_food_items, name_fingerprint, rank_results
+from .snapshot import RELOAD_CHECK_SECONDS, food_snapshot
+from .cache import create_cache
+from .usda import usda
+from .usda_parser import parse_macros
+from .usda_import import build_food_row, import_fdc_ids
+from .nutrients import MACRO_COLUMNS
+from .nutrition import empty_macros, food_item_macros, usda_macros, scale_macros, scale_meal
+from . import metrics
+from .log import setup_logging, get_logger
 
-app = FastAPI(title="NutriScope API")
+setup_logging()
+logger = get_logger(__name__)
+
+# Profiles rarely change; water totals change on every log, so keep them short
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", 300))
+WATER_CACHE_TTL = float(os.getenv("WATER_CACHE_TTL", 30))
+
+# Requests admitted at once before new ones get 503 (0 = unlimited)
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", 256))
+# How long /search-food waits for USDA before answering with IFCT results only
+USDA_SEARCH_BUDGET = float(os.getenv("USDA_SEARCH_BUDGET_SECONDS", 1.5))
+
+request_shedder = LoadShedder("requests", MAX_IN_FLIGHT)
+metrics.register_limiter("requests", request_shedder)
+
+read_cache = create_cache("reads", maxsize=4096, ttl=PROFILE_CACHE_TTL)
+metrics.register_cache("reads", read_cache)
+
+# Expected-progress curves only change as history accrues, rebuild a few times a day
+progress_cache = create_cache("progress", maxsize=4096, ttl=CURVE_TTL)
+progress_flights = SingleFlight()
+
+# Identical concurrent /import-usda calls (same name) share one fetch and insert
+import_flights = SingleFlight()
+metrics.register_singleflight("import", import_flights)
+metrics.register_cache("progress", progress_cache)
+
+# Warm-up preloads the food index and caches before /readyz reports ready.
+# With WARMUP=0 the app is ready immediately and the index loads in the background.
+WARMUP = os.getenv("WARMUP", "1") != "0"
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", 120))
+# How often each worker pulls food_items rows inserted elsewhere (other workers,
+# usda_import) into its index when there is no snapshot; 0 turns it off
+INDEX_REFRESH_SECONDS = float(os.getenv("FOOD_INDEX_REFRESH_SECONDS", 60))
+# Comma-separated searches to prime the USDA cache with, e.g. "rice,dal,egg"
+WARMUP_QUERIES = [q.strip() for q in os.getenv("WARMUP_QUERIES", "").split(",") if q.strip()]
+
+async def load_food_index():
+    """
+    Load the food catalog once so /search-food doesn't scan Supabase per keystroke.
+    A local snapshot (FOOD_SNAPSHOT_PATH) avoids the network entirely.
+    """
+    try:
+        if await db.run(food_snapshot.open):
+            rows = await db.run(food_snapshot.rows, INDEX_COLUMNS)
+        else:
+            rows = await db.run(fetch_food_items, supabase)
+        # Built on a worker thread so the event loop keeps serving meanwhile
+        food_index.replace(await db.run(FoodIndex.build, rows))
+        logger.info("food_index_loaded", extra={"items": len(food_index), "snapshot": food_snapshot.version})
+    except Exception as e:
+        # Search falls back to ILIKE queries until the index is available
+        logger.error("food_index_load_error", extra={"error": str(e)})
+
+async def warm_up(app: FastAPI):
+    """
+    Load the food index, open upstream connections and prime caches, then mark
+    the app ready. Failures are logged; the app still serves (degraded) after.
+    """
+    start = time.perf_counter()
+    try:
+        await load_food_index()
+        if WARMUP:
+            await asyncio.wait_for(asyncio.gather(
+                # One PostgREST round trip so the first request doesn't pay for TCP/TLS setup
+                db.execute(supabase.table("profiles").select("id").limit(1)),
+                *(search_ifct(q) for q in WARMUP_QUERIES),
+                *(search_usda(q) for q in WARMUP_QUERIES),
+                return_exceptions=True,
+            ), WARMUP_TIMEOUT)
+    except Exception as e:
+        logger.error("warmup_error", extra={"error": str(e)})
+    app.state.ready = True
+    logger.info("warmup_done", extra={"seconds": round(time.perf_counter() - start, 3), "items": len(food_index)})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Created here rather than at import, so missing credentials fail startup
+    # with a clear error while the module stays importable
+    get_supabase()
+
+    # One pooled USDA client for the whole app instead of one per request
+    usda.start()
+
+    app.state.ready = not WARMUP
+    warmup_task = asyncio.create_task(warm_up(app))
+
+    index_task = None
+    if food_snapshot.path:
+        index_task = asyncio.create_task(snapshot_reload_loop())
+    elif INDEX_REFRESH_SECONDS > 0:
+        index_task = asyncio.create_task(food_index_refresh_loop(INDEX_REFRESH_SECONDS))
+
+    alert_task = None
+    interval = float(os.getenv("ALERT_JOB_INTERVAL_MINUTES", 0))
+    if interval > 0:
+        alert_task = asyncio.create_task(alert_job_loop(interval * 60))
+
+    yield
+
+    # Fail readiness first so a rolling deploy stops routing here while requests drain
+    app.state.ready = False
+    warmup_task.cancel()
+    if index_task:
+        index_task.cancel()
+    if alert_task:
+        alert_task.cancel()
+    await usda.close()
+
+async def snapshot_reload_loop():
+    """
+    Pick up a re-exported snapshot file: the index is rebuilt from it on a
+    worker thread and swapped in, so requests never wait for the rebuild.
+    """
+    while True:
+        await asyncio.sleep(RELOAD_CHECK_SECONDS)
+        try:
+            if await db.run(food_snapshot.maybe_reload):
+                rows = await db.run(food_snapshot.rows, INDEX_COLUMNS)
+                food_index.replace(await db.run(FoodIndex.build, rows))
+                logger.info("food_snapshot_reloaded", extra={"version": food_snapshot.version, "items": len(food_index)})
+        except Exception as e:
+            logger.error("food_snapshot_reload_error", extra={"error": str(e)})
+
+async def food_index_refresh_loop(interval_seconds: float):
+    """
+    Add food_items rows with an id past the index's last one. Each worker has
+    its own index, so foods another worker imported only show up this way.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        if not food_index.loaded:
+            continue
+        try:
+            rows = await db.run(fetch_food_items, supabase, INDEX_COLUMNS, food_index.last_id)
+            for row in rows:
+                food_index.add(row)
+            if rows:
+                logger.info("food_index_refreshed", extra={"added": len(rows), "items": len(food_index)})
+        except Exception as e:
+            logger.error("food_index_refresh_error", extra={"error": str(e)})
+
+async def alert_job_loop(interval_seconds: float):
+    """
+    Re-evaluate alerts for all users every interval.
+    """
+    while True:
+        try:
+            count = await db.run(run_alert_job)
+            logger.info("alert_job_done", extra={"alerts": count})
+        except Exception as e:
+            logger.error("alert_job_error", extra={"error": str(e)})
+        await asyncio.sleep(interval_seconds)
+
+app = FastAPI(title="NutriScope API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +198,48 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """
+    Per-route latency histogram and in-flight gauge.
+    """
+    metrics.IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.IN_FLIGHT.dec()
+        # Use the route template so /profile/{user_id} is one series, not one per user
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, request.method, path, str(status))
+
+# Outermost: shed load once MAX_IN_FLIGHT requests are being handled, and record
+# the client for per-client USDA rate limits. Probes and scrapes always answer.
+app.add_middleware(AdmissionControl, shedder=request_shedder, exempt=frozenset({"/healthz", "/readyz", "/metrics"}))
+
+def unavailable_error(e: Unavailable) -> HTTPException:
+    """
+    429 when this client is over its USDA budget, 503 when USDA itself is unavailable.
+    """
+    status_code = 429 if e.reason == "client_rate_limited" else 503
+    return HTTPException(status_code=status_code, detail=f"USDA unavailable: {e.reason}", headers={"Retry-After": e.retry_after_header})
+
+def user_token(authorization: Optional[str] = Header(None)) -> str:
+    """
+    The caller's Supabase access token (Authorization: Bearer <jwt>). Endpoints
+    that read or write a user's rows run their queries with it (db.as_user),
+    so RLS checks the user_id they're given, as it did for browser writes.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Missing bearer token", headers={"WWW-Authenticate": "Bearer"})
+    return token
+
 # Pydantic models
 class CalculateRequest(BaseModel):
     weight: float
@@ -35,6 +253,25 @@ class CalculateResponse(BaseModel):
     tdee: float
     water_goal: float
 
+class CalculateBatchRequest(BaseModel):
+    # Columnar input: one list per field, all the same length
+    weight: List[float]
+    height: List[float]
+    age: List[int]
+    gender: List[str]
+    activity_factor: List[float]
+    goal_type: Optional[List[str]] = None
+
+class CalculateBatchResponse(BaseModel):
+    bmr: List[float]
+    tdee: List[float]
+    water_goal: List[float]
+    target_calories: List[float]
+    target_protein: List[float]
+    target_fat: List[float]
+    target_carbs: List[float]
+    target_fiber: List[float]
+
 class AlertsRequest(BaseModel):
     current_time: datetime
     protein_intake: float
@@ -46,22 +283,85 @@ class AlertsRequest(BaseModel):
 def read_root():
     return {"message": "Welcome to NutriScope API"}
 
+@app.get("/healthz")
+def healthz():
+    """
+    Liveness: the process is up and serving.
+    """
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz(request: Request):
+    """
+    Readiness: warm-up finished and not shutting down. 503 until then.
+    """
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready", "food_index": len(food_index), "snapshot": food_snapshot.version}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Prometheus text exposition of request, upstream and cache metrics.
+    """
+    return metrics.render()
+
 @app.get("/profile/{user_id}")
 def get_profile(user_id: str):
     """
     Fetch user profile from Supabase.
     """
+    cached = read_cache.get(f"profile:{user_id}")
+    if cached is not None:
+        return cached
+
     try:
-        response = supabase.table("profiles").select("*").eq("id", user_id).single().execute()
+        response = db.execute_sync(supabase.table("profiles").select("*").eq("id", user_id).single())
         # count=None is default, execute returns APIResponse
         # Check if data exists
         if not response.data:
             raise HTTPException(status_code=404, detail="User not found")
+        read_cache.set(f"profile:{user_id}", response.data, ttl=PROFILE_CACHE_TTL)
         return response.data
     except Exception as e:
         # Catch supabase errors or other issues
         raise HTTPException(status_code=400, detail=str(e))
 
+def profile_zone(profile: dict) -> ZoneInfo:
+    try:
+        return ZoneInfo(profile.get("timezone") or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+def user_today(user_id: str) -> date:
+    """
+    Today's date in the user's profile timezone (UTC if unset or unreadable), so
+    logs land on the same day the alert job and progress curves bucket them by.
+    """
+    try:
+        tz = profile_zone(get_profile(user_id))
+    except HTTPException:
+        tz = ZoneInfo("UTC")
+    return datetime.now(timezone.utc).astimezone(tz).date()
+
+@app.put("/profile/{user_id}")
+def update_profile(user_id: str, fields: dict = Body(...), token: str = Depends(user_token)):
+    """
+    Update profile fields as the calling user and refresh the cached copy (write-through).
+    """
+    fields.pop("id", None)
+    try:
+        response = db.execute_sync(db.as_user(supabase.table("profiles").update(fields).eq("id", user_id), token))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        read_cache.delete(f"profile:{user_id}")
+
+    if not response.data:
+        raise HTTPException(status_code=404, detail="User not found")
+    read_cache.set(f"profile:{user_id}", response.data[0], ttl=PROFILE_CACHE_TTL)
+    return response.data[0]
+
 @app.post("/calculate", response_model=CalculateResponse)
 def calculate_metrics(request: CalculateRequest):
     """
@@ -80,6 +380,24 @@ def calculate_metrics(request: CalculateRequest):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/calculate/batch", response_model=CalculateBatchResponse)
+def calculate_metrics_batch(request: CalculateBatchRequest):
+    """
+    Calculate health metrics and macro targets for many profiles in one call.
+    """
+    try:
+        results = calculate_targets_batch(
+            request.weight,
+            request.height,
+            request.age,
+            request.gender,
+            request.activity_factor,
+            request.goal_type
+        )
+        return {key: values.tolist() for key, values in results.items()}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/alerts")
 def get_alerts(request: AlertsRequest):
     """
@@ -97,123 +415,303 @@ def get_alerts(request: AlertsRequest):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+def _token_tag(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
 @app.get("/water/{user_id}")
-def get_water_log(user_id: str):
+def get_water_log(user_id: str, day: Optional[date] = None, token: str = Depends(user_token)):
     """
-    Fetch water intake for the user.
+    Water intake for `day` (default the user's today) from the daily_totals
+    rollup, read as the calling user, with the profile's water_goal.
+    A cached reading is only served to the token that RLS accepted for it.
     """
-    # Assuming we want today's water log. 
-    # Since specific schema isn't provided, I will attempt to query a 'daily_logs' table 
-    # matching the pattern of typical Supabase usages in this context.
-    # If this table doesn't exist, this might fail, but it's a structural placeholder 
-    # satisfying the 'modular imports' and 'Supabase client' requirement.
+    today = (day or user_today(user_id)).isoformat()
+    cached = read_cache.get(f"water:{user_id}:{today}")
+    if cached is not None and cached["token"] == _token_tag(token):
+        return cached["data"]
+
     try:
-        today = datetime.now().date().isoformat()
-        
-        # Determine query - looking for log date that matches today
-        response = supabase.table("daily_logs")\
-            .select("water_intake, water_goal")\
-            .eq("user_id", user_id)\
-            .eq("date", today)\
-            .maybe_single()\
-            .execute()
-            
-        data = response.data
-        if not data:
-            # If no log found for today, maybe return 0 intake and default goal?
-            # Or just null. Let's return a clean default object.
-            return {"water_intake": 0, "water_goal": 2000, "message": "No logs for today"}
-            
-        return data
+        response = db.execute_sync(db.as_user(
+            supabase.table("daily_totals")\
+                .select("water_ml")\
+                .eq("user_id", user_id)\
+                .eq("date", today)\
+                .limit(1),
+            token
+        ))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/search-food")
-async def search_food(q: str, source: str = "All"):
+    totals = (response.data or [{}])[0]
+    try:
+        goal = get_profile(user_id).get("water_goal") or 2000
+    except HTTPException:
+        goal = 2000
+    data = {"date": today, "water_intake": totals.get("water_ml") or 0, "water_goal": goal}
+    read_cache.set(f"water:{user_id}:{today}", {"token": _token_tag(token), "data": data}, ttl=WATER_CACHE_TTL)
+    return data
+
+class WaterEntryRequest(BaseModel):
+    amount_ml: float
+    # Named log_date so the field doesn't shadow the `date` type for the fields below it
+    log_date: Optional[date] = Field(None, alias="date")
+
+@app.post("/water/{user_id}")
+def add_water_entry(user_id: str, request: WaterEntryRequest, token: str = Depends(user_token)):
     """
-    Search for food in IFCT database (food_items) and USDA API.
-    Prioritizes IFCT, removes duplicates.
-    Ranking: Exact > StartsWith > Contains > Alphabetical.
+    Log a water entry as the calling user and invalidate the cached water reading for that day.
     """
-    candidates = []
-    seen_names = set()
+    log_date = (request.log_date or user_today(user_id)).isoformat()
+    try:
+        response = db.execute_sync(db.as_user(
+            supabase.table("water_logs").insert({
+                "user_id": user_id,
+                "date": log_date,
+                "amount_ml": round(request.amount_ml),
+                "logged_at": datetime.now(timezone.utc).isoformat()
+            }),
+            token
+        ))
+        return response.data[0] if response.data else {}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        read_cache.delete(f"water:{user_id}:{log_date}")
 
-    def add_candidate(item):
-        norm = item['name'].lower().strip()
-        if norm not in seen_names:
-            seen_names.add(norm)
-            candidates.append(item)
+@app.delete("/water/{user_id}/{entry_id}")
+def delete_water_entry(user_id: str, entry_id: int, token: str = Depends(user_token)):
+    """
+    Remove a water entry (e.g. undo) as the calling user and invalidate that day's cached reading.
+    """
+    try:
+        response = db.execute_sync(db.as_user(
+            supabase.table("water_logs").delete().eq("id", entry_id).eq("user_id", user_id),
+            token
+        ))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not response.data:
+        raise HTTPException(status_code=404, detail="Water entry not found")
+    for row in response.data:
+        read_cache.delete(f"water:{user_id}:{row['date']}")
+    return response.data[0]
 
-    # 1. Search IFCT (Supabase)
-    if source in ["All", "IFCT"]:
-        try:
+@app.get("/analytics/{user_id}")
+def get_analytics(user_id: str, days: int = Query(7, ge=1, le=366), end: Optional[date] = None, token: str = Depends(user_token)):
+    """
+    Per-day nutrient and water totals for the last `days` days.
+    Reads the precomputed daily_totals rollup instead of raw log rows, as the
+    calling user so RLS only returns their own totals.
+    `end` defaults to the user's today (profile timezone).
+    """
+    try:
+        dates = date_window(end or user_today(user_id), days)
+        response = db.execute_sync(db.as_user(
+            supabase.table("daily_totals")\
+                .select(ROLLUP_COLUMNS)\
+                .eq("user_id", user_id)\
+                .gte("date", dates[0])\
+                .lte("date", dates[-1])\
+                .order("date"),
+            token
+        ))
+
+        return {"days": build_daily_series(response.data or [], dates)}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def load_progress_curves(user_id: str, tz: ZoneInfo, today: date, token: str) -> dict:
+    # Logs are read as the caller, so a cached curve is only served to the same token
+    key = f"progress:{user_id}:{today.isoformat()}:{tz.key}"
+    cached = progress_cache.get(key)
+    if cached is not None and cached["token"] == _token_tag(token):
+        return cached["data"]
+    logs = await db.run(fetch_history, supabase, user_id, today, token)
+    curves = build_curves(logs, tz)
+    progress_cache.set(key, {"token": _token_tag(token), "data": curves})
+    return curves
+
+@app.get("/progress/{user_id}")
+async def get_progress(user_id: str, at: Optional[datetime] = None, token: str = Depends(user_token)):
+    """
+    Today's calories/protein/water against what this user has usually had by this
+    time of day (curves learned from their history, see progress.py), read as
+    the calling user. Cheap to poll: curves are cached, so each call is one
+    daily_totals read. `at` defaults to now; naive times are taken as the
+    user's local time.
+    """
+    profile = await db.run(get_profile, user_id)
+    tz = profile_zone(profile)
+
+    now = at or datetime.now(timezone.utc)
+    local = now.replace(tzinfo=tz) if now.tzinfo is None else now.astimezone(tz)
+    today = local.date()
+
+    try:
+        curves = await progress_flights.do(
+            (user_id, today, tz.key, _token_tag(token)), lambda: load_progress_curves(user_id, tz, today, token)
+        )
+        totals = await db.execute_shared(db.as_user(
+            supabase.table("daily_totals")\
+                .select(", ".join(TOTAL_COLUMNS.values()))\
+                .eq("user_id", user_id)\
+                .eq("date", today.isoformat())\
+                .limit(1),
+            token
+        ))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    local_hour = local.hour + local.minute / 60
+    return {
+        "date": today.isoformat(),
+        "local_time": local.isoformat(),
+        "nutrients": evaluate_progress(curves, (totals.data or [{}])[0], profile, local_hour),
+        "history_days": {key: curve["days"] for key, curve in curves.items()},
+    }
+
+async def search_ifct(q: str, source: str = "All") -> list[dict]:
+    """
+    IFCT candidates for /search-food, never raises.
+    """
+    # 1. Search IFCT (in-memory index, then snapshot FTS, Supabase ILIKE as fallback)
+    if source not in ["All", "IFCT"]:
+        return []
+    try:
+        # Scoring and the snapshot FTS query are CPU-bound/blocking, so off the event loop
+        if food_index.loaded:
+            ifct_rows = await db.run(food_index.search, q, 30)
+        elif food_snapshot.loaded:
+            ifct_rows = await db.run(food_snapshot.search, q, 30, INDEX_COLUMNS)
+        else:
             terms = q.strip().split()
             query = supabase.table("food_items")\
                 .select("id, food_name, energy_kcal, protein_g, fat_g, carbs_g, fiber_g")
-                
+
             for term in terms:
                 query = query.ilike("food_name", f"%{term}%")
-                
-            ifct_res = query.limit(30).execute()
-            
-            if ifct_res.data:
-                for item in ifct_res.data:
-                    add_candidate({
-                        "id": item.get("id"),
-                        "name": item.get("food_name"),
-                        "source": "IFCT",
-                        "energy_kcal": item.get("energy_kcal") or 0,
-                        "protein_g": item.get("protein_g") or 0,
-                        "fat_g": item.get("fat_g") or 0,
-                        "carbs_g": item.get("carbs_g") or 0,
-                        "fiber_g": item.get("fiber_g") or 0
-                    })
-        except Exception as e:
-            print(f"IFCT search error: {e}")
-            
-    ifct_count = len(candidates)
-    print(f"IFCT results: {ifct_count}")
 
+            ifct_rows = (await db.execute_shared(query.limit(30))).data or []
+
+        return [{
+            "id": item.get("id"),
+            "name": item.get("food_name"),
+            "source": "IFCT",
+            "energy_kcal": item.get("energy_kcal") or 0,
+            "protein_g": item.get("protein_g") or 0,
+            "fat_g": item.get("fat_g") or 0,
+            "carbs_g": item.get("carbs_g") or 0,
+            "fiber_g": item.get("fiber_g") or 0
+        } for item in ifct_rows]
+    except Exception as e:
+        logger.error("ifct_search_error", extra={"query": q, "error": str(e)})
+        return []
+
+async def search_usda(q: str, source: str = "All") -> list[dict]:
+    """
+    USDA candidates for /search-food, never raises.
+    """
     # 2. Search USDA
-    usda_key = os.getenv("USDA_API_KEY")
-    if usda_key and source in ["All", "USDA"]:
+    if not usda.api_key or source not in ["All", "USDA"]:
+        return []
+    results = []
+    try:
+        data = await usda.search(q, page_size=30)
+        if data:
+            for food in data.get("foods", []):
+                results.append({
+                    "id": None,
+                    "usda_id": str(food.get("fdcId")),
+                    "name": food.get("description"),
+                    "source": "USDA",
+                    **parse_macros(food)
+                })
+
+    except Unavailable as e:
+        # Circuit open, rate limited or overloaded: IFCT-only results
+        logger.debug("usda_search_skipped", extra={"query": q, "reason": e.reason})
+    except Exception as e:
+        logger.warning("usda_search_error", extra={"query": q, "error": str(e)})
+    return results
+
+@app.get("/search-food")
+async def search_food(q: str, source: str = "All"):
+    """
+    Search for food in IFCT database (food_items) and USDA API.
+    Prioritizes IFCT, removes duplicates, tolerates typos ("panner" -> paneer).
+    Ranking: Exact > StartsWith > Contains > Out of order > Typos, then IFCT first, then alphabetical.
+    """
+    # Both lookups run concurrently; IFCT still wins on duplicate names
+    usda_task = asyncio.create_task(search_usda(q, source))
+    ifct_results = await search_ifct(q, source)
+    try:
+        # A slow USDA doesn't hold up IFCT results past the budget. The lookup keeps
+        # running (shielded) and fills the cache for the next keystroke.
+        usda_results = await asyncio.wait_for(asyncio.shield(usda_task), USDA_SEARCH_BUDGET if USDA_SEARCH_BUDGET > 0 else None)
+    except asyncio.TimeoutError:
+        usda_results = []
+
+    # One scored page across sources; IFCT wins duplicate names and score ties
+    candidates = await db.run(rank_results, q, [ifct_results, usda_results], 50)
+
+    logger.debug("search_results", extra={"query": q, "ifct": len(ifct_results), "usda": len(usda_results), "total": len(candidates)})
+
+    return {"results": candidates}
+
+async def wait_unless_disconnected(request: Request, task: asyncio.Task):
+    """
+    Await `task`, cancelling it if the client goes away first. Returns None if cancelled.
+    """
+    async def disconnected():
+        # request.is_disconnected() can't see through the metrics middleware, so block on receive
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+
+    watcher = asyncio.create_task(disconnected())
+    try:
+        done, _ = await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+    if task in done:
+        return task.result()
+    task.cancel()
+    return None
+
+@app.get("/search-food/stream")
+async def search_food_stream(request: Request, q: str, source: str = "All"):
+    """
+    Same search as /search-food, streamed as NDJSON so local hits aren't held back by USDA:
+
+        {"source": "IFCT", "results": [...]}
+        {"source": "USDA", "results": [...]}   (names already sent are dropped)
+        {"done": true, "total": 42}
+
+    The USDA request is cancelled if the client disconnects (e.g. an aborted fetch).
+    """
+    async def lines():
+        # Start USDA first so it overlaps with the local lookup
+        usda_task = asyncio.create_task(search_usda(q, source))
         try:
-            async with httpx.AsyncClient() as client:
-                usda_res = await client.get(
-                    "https://api.nal.usda.gov/fdc/v1/foods/search",
-                    params={"api_key": usda_key, "query": q, "pageSize": 30, "dataType": "Foundation,SR Legacy"}
-                )
-                if usda_res.status_code == 200:
-                    data = usda_res.json()
-                    for food in data.get("foods", []):
-                        # Parse USDA Nutrients
-                        nutrients = food.get("foodNutrients", [])
-                        def get_val(ids):
-                            for n in nutrients:
-                                if n.get("nutrientId") in ids or n.get("nutrientNumber") in ids:
-                                    return n.get("value") or 0
-                            return 0
-                        
-                        add_candidate({
-                            "id": None,
-                            "usda_id": str(food.get("fdcId")),
-                            "name": food.get("description"),
-                            "source": "USDA",
-                            "energy_kcal": get_val([1008, "208"]),
-                            "protein_g": get_val([1003, "203"]),
-                            "fat_g": get_val([1004, "204"]),
-                            "carbs_g": get_val([1005, "205"]),
-                            "fiber_g": get_val([1079, "291"])
-                        })
+            ifct_results = await db.run(rank_results, q, [await search_ifct(q, source)], 50)
+            yield json.dumps({"source": "IFCT", "results": ifct_results}) + "\n"
 
-        except Exception as e:
-            print(f"USDA search error: {e}")
+            usda_results = await wait_unless_disconnected(request, usda_task)
+            if usda_results is None:
+                logger.debug("search_stream_cancelled", extra={"query": q})
+                return
 
-    usda_count = len(candidates) - ifct_count
-    print(f"USDA results: {usda_count}")
-    print(f"Final results: {len(candidates)}")
+            seen = {name_fingerprint(item["name"]) for item in ifct_results}
+            usda_results = [
+                item for item in await db.run(rank_results, q, [usda_results], 50)
+                if name_fingerprint(item["name"]) not in seen
+            ][:50 - len(ifct_results)]
+            yield json.dumps({"source": "USDA", "results": usda_results}) + "\n"
+            yield json.dumps({"done": True, "total": len(ifct_results) + len(usda_results)}) + "\n"
+        finally:
+            # Also covers the server cancelling the generator on disconnect
+            usda_task.cancel()
 
-    return {"results": candidates[:50]}
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 class NutritionRequest(BaseModel):
     food_id: str
@@ -248,71 +746,207 @@ async def get_nutrition_details(request: NutritionRequest):
     """
     factor = parse_quantity_factor(request.quantity)
     
-    data = {
-        "calories": 0,
-        "protein": 0,
-        "carbs": 0,
-        "fats": 0,
-        "fiber": 0
-    }
+    data = empty_macros()
 
     try:
         if request.source == "IFCT":
-            # Fetch from Supabase
-            res = supabase.table("ifct_foods")\
-                .select("calories, protein, carbs, fat, fiber")\
-                .eq("id", request.food_id)\
-                .single()\
-                .execute()
-            
-            if res.data:
-                # IFCT values are per 100g
-                d = res.data
-                data["calories"] = round((d.get("calories") or 0) * factor, 2)
-                data["protein"] = round((d.get("protein") or 0) * factor, 2)
-                data["carbs"] = round((d.get("carbs") or 0) * factor, 2)
-                data["fats"] = round((d.get("fat") or 0) * factor, 2)
-                data["fiber"] = round((d.get("fiber") or 0) * factor, 2)
+            # The food_items row /search-food returned (index, snapshot or Supabase), per 100g
+            per_100g = (await food_items_per_100g([request.food_id])).get(request.food_id)
+            if per_100g is not None:
+                data = scale_macros(per_100g, factor)
 
         elif request.source == "USDA":
-            usda_key = os.getenv("USDA_API_KEY")
-            if usda_key:
-                async with httpx.AsyncClient() as client:
-                    res = await client.get(
-                        f"https://api.nal.usda.gov/fdc/v1/food/{request.food_id}",
-                        params={"api_key": usda_key}
-                    )
-                    if res.status_code == 200:
-                        f_data = res.json()
-                        nutrients = f_data.get("foodNutrients", [])
-                        
-                        # Helpers to find nutrients by ID or name
-                        def get_nut(search_ids):
-                            for n in nutrients:
-                                if n.get("nutrient", {}).get("id") in search_ids or \
-                                   n.get("nutrient", {}).get("number") in search_ids:
-                                    return n.get("amount") or 0
-                            return 0
-                        
-                        # USDA IDs (Energy: 1008/208, Protein: 1003/203, Fat: 1004/204, Carbs: 1005/205, Fiber: 1079/291)
-                        cals = get_nut([1008, "208"])
-                        prot = get_nut([1003, "203"])
-                        fat = get_nut([1004, "204"])
-                        carb = get_nut([1005, "205"])
-                        fib = get_nut([1079, "291"])
-                        
-                        data["calories"] = round(cals * factor, 2)
-                        data["protein"] = round(prot * factor, 2)
-                        data["carbs"] = round(carb * factor, 2)
-                        data["fats"] = round(fat * factor, 2)
-                        data["fiber"] = round(fib * factor, 2)
+            if usda.api_key:
+                f_data = await usda.get_food(request.food_id)
+                if f_data:
+                    data = scale_macros(usda_macros(f_data), factor)
 
+    except Unavailable as e:
+        # Zeros would look like real macros; tell the client to retry instead
+        raise unavailable_error(e)
     except Exception as e:
-        print(f"Nutrition calc error: {e}")
+        logger.error("nutrition_error", extra={"food_id": request.food_id, "source": request.source, "error": str(e)})
         # Return 0s on error instead of 500
     
     return data
 
+class NutritionBatchRequest(BaseModel):
+    items: List[NutritionRequest]
+
+def _food_item_key(food_id: str):
+    # food_items ids are integers; clients send them as strings
+    try:
+        return int(food_id)
+    except (TypeError, ValueError):
+        return food_id
+
+async def food_items_per_100g(food_ids: list) -> dict:
+    """
+    Per-100g macro vectors of food_items rows by id, the rows /search-food returns
+    as "IFCT" (imported USDA foods included), so logged macros match the search.
+    These used to be read from ifct_foods by the same id, but that table is keyed
+    independently, so a food_items id need not name the same food there.
+    In-memory index first, then the local snapshot, then one Supabase `in` query.
+    """
+    per_100g = {}
+    for food_id in food_ids:
+        record = food_index.get(_food_item_key(food_id))
+        if record is not None:
+            per_100g[food_id] = food_item_macros(record.to_row(MACRO_COLUMNS))
+
+    missing = [food_id for food_id in food_ids if food_id not in per_100g]
+    if missing and food_snapshot.loaded:
+        rows = food_snapshot.get_many(missing, INDEX_COLUMNS)
+        per_100g.update({food_id: food_item_macros(row) for food_id, row in rows.items()})
+        missing = [food_id for food_id in missing if food_id not in per_100g]
+
+    if missing:
+        res = await db.execute_shared(
+            supabase.table("food_items")\
+                .select(INDEX_COLUMNS)\
+                .in_("id", missing)
+        )
+        per_100g.update({str(row["id"]): food_item_macros(row) for row in res.data or []})
+    return per_100g
+
+async def resolve_per_100g(items: list) -> list:
+    """
+    Per-100g macro vectors for items with food_id/source, None where unknown.
+    IFCT ids are food_items rows (see food_items_per_100g) and all USDA foods are
+    fetched concurrently. Raises Unavailable if USDA refused or failed a lookup.
+    """
+    ifct_ids = list({item.food_id for item in items if item.source == "IFCT"})
+    usda_ids = list({item.food_id for item in items if item.source == "USDA"})
+
+    async def fetch_ifct():
+        if not ifct_ids:
+            return {}
+        try:
+            return await food_items_per_100g(ifct_ids)
+        except Exception as e:
+            logger.error("nutrition_batch_ifct_error", extra={"error": str(e)})
+            return {}
+
+    async def fetch_usda():
+        if not usda_ids or not usda.api_key:
+            return {}
+        foods = await asyncio.gather(*(usda.get_food(fdc_id) for fdc_id in usda_ids), return_exceptions=True)
+        per_100g = {}
+        unavailable = None
+        for fdc_id, food in zip(usda_ids, foods):
+            if isinstance(food, Unavailable):
+                unavailable = food
+            elif isinstance(food, Exception):
+                logger.warning("nutrition_batch_usda_error", extra={"fdc_id": fdc_id, "error": str(food)})
+            elif food:
+                per_100g[fdc_id] = usda_macros(food)
+        if unavailable is not None:
+            # Not unknown foods: the client should retry later
+            raise unavailable
+        return per_100g
+
+    ifct_data, usda_data = await asyncio.gather(fetch_ifct(), fetch_usda())
+
+    return [(ifct_data if item.source == "IFCT" else usda_data).get(item.food_id) for item in items]
+
+@app.post("/nutrition-details/batch")
+async def get_nutrition_details_batch(request: NutritionBatchRequest):
+    """
+    Get scaled macros for every item of a meal plus the meal total.
+    """
+    try:
+        per_100g = await resolve_per_100g(request.items)
+    except Unavailable as e:
+        raise unavailable_error(e)
+    # Unknown or failed items count as 0, same as the single-item endpoint
+    scaled, meal_total = scale_meal(per_100g, [parse_quantity_factor(item.quantity) for item in request.items])
+
+    items = [{
+        "food_id": item.food_id,
+        "source": item.source,
+        "quantity": item.quantity,
+        **macros
+    } for item, macros in zip(request.items, scaled)]
+
+    return {"items": items, "total": meal_total}
+
+# Upper bound for one /logs/batch call (an offline backlog is flushed in chunks)
+LOG_BATCH_LIMIT = 500
+
+class LogEntry(BaseModel):
+    food_id: str
+    source: str
+    quantity: str
+    food_name: str
+    meal_type: Optional[str] = None
+    # Named log_date so the field doesn't shadow the `date` type for the fields below it
+    log_date: Optional[date] = Field(None, alias="date")
+    logged_at: Optional[datetime] = None
+
+class LogBatchRequest(BaseModel):
+    user_id: str
+    entries: List[LogEntry]
+
+@app.post("/logs/batch")
+async def add_food_logs_batch(request: LogBatchRequest, token: str = Depends(user_token)):
+    """
+    Log many foods at once (a meal, or a backlog queued while offline).
+    Macros are resolved server-side, all rows go in with one multi-row insert and
+    the response carries the inserted logs plus the updated totals of every touched
+    day, so clients don't need to re-read the day. Runs as the caller (user_token),
+    so RLS rejects logs for any user_id but their own.
+    """
+    if len(request.entries) > LOG_BATCH_LIMIT:
+        raise HTTPException(status_code=413, detail=f"At most {LOG_BATCH_LIMIT} entries per batch")
+    if not request.entries:
+        return {"logs": [], "days": []}
+
+    try:
+        per_100g = await resolve_per_100g(request.entries)
+    except Unavailable as e:
+        raise unavailable_error(e)
+    unresolved = [entry.food_id for entry, macros in zip(request.entries, per_100g) if macros is None]
+    if unresolved:
+        # Refuse the whole batch rather than log foods as zero calories
+        raise HTTPException(status_code=422, detail={"message": "Unknown foods", "food_ids": unresolved})
+
+    factors = [parse_quantity_factor(entry.quantity) for entry in request.entries]
+    scaled, _ = scale_meal(per_100g, factors)
+
+    now = datetime.now(timezone.utc)
+    today = await db.run(user_today, request.user_id)
+    rows = [{
+        "user_id": request.user_id,
+        "date": (entry.log_date or today).isoformat(),
+        "logged_at": (entry.logged_at or now).isoformat(),
+        "food_name": entry.food_name,
+        "quantity_consumed_grams": round(factor * 100, 2),
+        "meal_type": entry.meal_type,
+        "energy_kcal": macros["calories"],
+        "protein_g": macros["protein"],
+        "carbs_g": macros["carbs"],
+        "fat_g": macros["fats"],
+        "fiber_g": macros["fiber"]
+    } for entry, factor, macros in zip(request.entries, factors, scaled)]
+    dates = sorted({row["date"] for row in rows})
+
+    try:
+        inserted = await db.execute(db.as_user(supabase.table("daily_logs").insert(rows), token))
+        # Totals are maintained by the daily_logs trigger in the same transaction
+        totals = await db.execute(db.as_user(
+            supabase.table("daily_totals")\
+                .select(ROLLUP_COLUMNS)\
+                .eq("user_id", request.user_id)\
+                .in_("date", dates),
+            token
+        ))
+    except Exception as e:
+        logger.error("log_batch_error", extra={"user_id": request.user_id, "entries": len(rows), "error": str(e)})
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info("log_batch", extra={"entries": len(rows), "days": len(dates)})
+    return {"logs": inserted.data or [], "days": build_daily_series(totals.data or [], dates)}
+
 class ImportRequest(BaseModel):
     usda_id: str
     name: str
@@ -321,111 +955,95 @@ class ImportRequest(BaseModel):
 async def import_usda_food(request: ImportRequest):
     """
     Fetch details from USDA and insert into food_items.
+    Near-duplicates of a stored USDA food (same name_fingerprint(), or the same
+    fdcId) are not inserted again; the stored row's id is returned instead.
     Returns { "id": <new_id> }
     """
-    usda_key = os.getenv("USDA_API_KEY")
-    if not usda_key:
+    if not usda.api_key:
         raise HTTPException(status_code=500, detail="USDA API Key missing")
 
+    fingerprint = name_fingerprint(request.name)
+    return await import_flights.do(fingerprint, lambda: _import_usda_food(request, fingerprint))
+
+async def _import_usda_food(request: ImportRequest, fingerprint: str) -> dict:
     try:
-        # 1. Check if food exists (prevent duplicates)
-        existing = supabase.table("food_items")\
-            .select("id")\
-            .eq("food_name", request.name)\
-            .eq("source", "USDA")\
-            .maybeSingle()\
-            .execute()
-        
-        if existing.data:
-            return {"id": existing.data["id"]}
+        # 1. Check if food exists (prevent duplicates), answered by the in-memory index
+        existing_id = food_index.find(fingerprint, "USDA")
+        if existing_id is not None:
+            return {"id": existing_id}
 
         # 2. Fetch from USDA
-        async with httpx.AsyncClient() as client:
-            res = await client.get(
-                f"https://api.nal.usda.gov/fdc/v1/food/{request.usda_id}",
-                params={"api_key": usda_key}
+        data = await usda.get_food(request.usda_id)
+        if not data:
+            raise HTTPException(status_code=400, detail="Failed to fetch from USDA")
+
+        payload = build_food_row(data, name=request.name)
+
+        # 3. Insert; the unique (source, name_fingerprint) index makes a concurrent
+        # or not-yet-indexed duplicate a no-op instead of a second row
+        try:
+            db_res = await db.execute(
+                supabase.table("food_items")\
+                    .upsert(payload, on_conflict="source,name_fingerprint", ignore_duplicates=True)
             )
-            
-            if res.status_code != 200:
-                raise HTTPException(status_code=400, detail="Failed to fetch from USDA")
-            
-            data = res.json()
-            nutrients = data.get("foodNutrients", [])
-            
-            # Helper to find amount by name (flexible match)
-            def get_amt(possible_names):
-                for n in nutrients:
-                    n_name = n.get("nutrient", {}).get("name", "").lower()
-                    for p_name in possible_names:
-                        if p_name.lower() == n_name or p_name.lower() in n_name: 
-                            # Strict or contains? "Carbohydrate, by difference" match "Carbohydrate, by difference"
-                            # User said: "Total lipid (fat) OR Total Fat"
-                            # I will use exact string matching from user req first, falling back to contains if specific?
-                            # Actually, simplest is to check strict equality on likely strings provided by user.
-                            if p_name.lower() == n_name:
-                                return float(n.get("amount") or 0)
-                return None
-
-            # User Provided Mapping
-            # (Column, [Possible USDA Names])
-            mapping_rules = [
-                ("energy_kcal", ["Energy"]),
-                ("protein_g", ["Protein"]),
-                ("fat_g", ["Total lipid (fat)", "Total Fat"]),
-                ("carbs_g", ["Carbohydrate, by difference"]),
-                ("fiber_g", ["Fiber, total dietary"]),
-                ("total_sugars_g", ["Sugars, total including NLEA", "Sugars, total"]),
-                ("starch_g", ["Starch"]),
-                ("calcium_mg", ["Calcium, Ca"]),
-                ("iron_mg", ["Iron, Fe"]),
-                ("magnesium_mg", ["Magnesium, Mg"]),
-                ("phosphorus_mg", ["Phosphorus, P"]),
-                ("potassium_mg", ["Potassium, K"]),
-                ("sodium_mg", ["Sodium, Na"]),
-                ("zinc_mg", ["Zinc, Zn"]),
-                ("copper_mg", ["Copper, Cu"]),
-                ("manganese_mg", ["Manganese, Mn"]),
-                ("selenium_µg", ["Selenium, Se"]),
-                ("vitamin_a_µg", ["Vitamin A, RAE"]),
-                ("vitamin_c_mg", ["Vitamin C, total ascorbic acid"]),
-                ("vitamin_d_µg", ["Vitamin D (D2 + D3)", "Vitamin D"]),
-                ("vitamin_e_mg", ["Vitamin E (alpha-tocopherol)"]),
-                ("vitamin_k_µg", ["Vitamin K (phylloquinone)"]),
-                ("thiamin_b1_mg", ["Thiamin"]),
-                ("riboflavin_b2_mg", ["Riboflavin"]),
-                ("niacin_b3_mg", ["Niacin"]),
-                ("vitamin_b6_mg", ["Vitamin B-6"]),
-                ("folate_µg", ["Folate, total"]),
-                ("vitamin_b12_µg", ["Vitamin B-12"]),
-                ("cholesterol_mg", ["Cholesterol"])
-            ]
-
-            payload = {
-                "food_name": request.name,
-                "source": "USDA",
-                "food_code": request.usda_id,
-                "created_at": "now()"
-            }
-
-            for col, names in mapping_rules:
-                val = get_amt(names)
-                payload[col] = val # can be None, handled as null by Supabase if column allows, else we might need 0?
-                                   # User said: "If any nutrient is not present... Set value to null."
-
-            # Insert
-            db_res = supabase.table("food_items").insert(payload).select("id").single().execute()
-            
-            if db_res.data:
-                return {"id": db_res.data["id"]}
-            else:
-                raise HTTPException(status_code=500, detail="Insert failed")
+        except APIError as e:
+            # Same fdcId already stored under another name
+            if e.code != "23505":
+                raise
+            db_res = None
+
+        if db_res is not None and db_res.data:
+            new_id = db_res.data[0]["id"]
+            # Make the new row searchable without a full reload
+            food_index.add({**payload, "id": new_id})
+            return {"id": new_id}
 
+        existing = await db.execute(
+            supabase.table("food_items")\
+                .select("id")\
+                .eq("source", "USDA")\
+                .or_(f'name_fingerprint.eq."{fingerprint}",food_code.eq.{payload["food_code"]}')\
+                .limit(1)
+        )
+        if existing.data:
+            return {"id": existing.data[0]["id"]}
+        raise HTTPException(status_code=500, detail="Insert failed")
+
+    except Unavailable as e:
+        raise unavailable_error(e)
     except Exception as e:
-        print(f"Import error: {e}")
+        logger.error("import_error", extra={"usda_id": request.usda_id, "error": str(e)})
         raise HTTPException(status_code=500, detail=str(e))
-    
 
+# Upper bound for one /import-usda/bulk call; it runs inside the request with no
+# checkpoint, so larger lists go through `python -m backend.usda_import --checkpoint`
+BULK_IMPORT_LIMIT = 100
+
+class BulkImportRequest(BaseModel):
+    fdc_ids: List[str]
+
+@app.post("/import-usda/bulk")
+async def import_usda_bulk(request: BulkImportRequest):
+    """
+    Import many USDA foods by fdcId with bounded concurrency and batched inserts.
+    Foods already in food_items are skipped. Rate limits are not waited out
+    inside the request: ids refused by them come back in not_fetched, to be
+    sent again after retry_after seconds.
+    Returns { "inserted": n, "skipped": n, "failed": n, "not_fetched": [...], "retry_after": s }
+    """
+    if len(request.fdc_ids) > BULK_IMPORT_LIMIT:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_IMPORT_LIMIT} fdc_ids per call")
+
+    if not usda.api_key:
+        raise HTTPException(status_code=500, detail="USDA API Key missing")
+
+    try:
+        return await import_fdc_ids(request.fdc_ids, wait_rate_limits=False)
+    except Exception as e:
+        logger.error("bulk_import_error", extra={"error": str(e)})
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+    # Development server; use `python -m backend.server` in production
+    uvicorn.run("backend.main:app", host="127.0.0.1", port=8000, reload=True)
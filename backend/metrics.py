@@ -0,0 +1,176 @@
+"""
+In-process Prometheus-style metrics.
+
+- nutriscope_request_duration_seconds{method, route, status}: per-route latency histogram
+- nutriscope_upstream_duration_seconds{service, target, outcome}: Supabase tables and USDA endpoints
+- nutriscope_requests_in_flight: requests currently being handled
+- nutriscope_cache_{hits,misses}_total / nutriscope_cache_hit_ratio{cache}: registered caches
+- nutriscope_singleflight_{calls,shared}_total{group}: upstream calls made vs. coalesced
+- nutriscope_circuit_open{breaker} / nutriscope_circuit_trips_total{breaker}: circuit breakers
+- nutriscope_rejected_total{limiter}: work refused by rate limiters and load shedders
+
+Exposed as text by GET /metrics.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds, tuned for a mix of in-memory lookups and network calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [bucket counts..., +Inf count, sum]
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+
+        for labels, series in sorted(items):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self.value -= amount
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.value}"]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_LATENCY = Histogram(
+    "nutriscope_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route", "status"),
+)
+
+UPSTREAM_LATENCY = Histogram(
+    "nutriscope_upstream_duration_seconds",
+    "Latency of upstream calls (Supabase tables, USDA endpoints)",
+    ("service", "target", "outcome"),
+)
+
+IN_FLIGHT = Gauge("nutriscope_requests_in_flight", "HTTP requests currently being handled")
+
+# name -> object with .hits and .misses, reported at scrape time
+_caches: dict = {}
+
+
+def register_cache(name: str, cache):
+    _caches[name] = cache
+
+
+# name -> SingleFlight, reported at scrape time
+_flights: dict = {}
+
+
+def register_singleflight(name: str, flight):
+    _flights[name] = flight
+
+
+# name -> CircuitBreaker
+_breakers: dict = {}
+
+
+def register_breaker(name: str, breaker):
+    _breakers[name] = breaker
+
+
+# name -> RateLimiter or LoadShedder (anything with .rejected)
+_limiters: dict = {}
+
+
+def register_limiter(name: str, limiter):
+    _limiters[name] = limiter
+
+
+@contextmanager
+def observe_upstream(service: str, target: str):
+    """
+    Time an upstream call:
+
+        with observe_upstream("usda", "/foods/search"):
+            res = await client.get(...)
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, service, target, outcome)
+
+
+_CIRCUIT_VALUES = {"closed": 0, "half_open": 0.5, "open": 1}
+
+
+def render() -> str:
+    lines = []
+    lines += REQUEST_LATENCY.render()
+    lines += UPSTREAM_LATENCY.render()
+    lines += IN_FLIGHT.render()
+
+    lines += ["# HELP nutriscope_cache_hits_total Cache hits", "# TYPE nutriscope_cache_hits_total counter"]
+    lines += [f'nutriscope_cache_hits_total{{cache="{name}"}} {cache.hits}' for name, cache in sorted(_caches.items())]
+    lines += ["# HELP nutriscope_cache_misses_total Cache misses", "# TYPE nutriscope_cache_misses_total counter"]
+    lines += [f'nutriscope_cache_misses_total{{cache="{name}"}} {cache.misses}' for name, cache in sorted(_caches.items())]
+    lines += ["# HELP nutriscope_cache_hit_ratio Cache hit ratio since start", "# TYPE nutriscope_cache_hit_ratio gauge"]
+    for name, cache in sorted(_caches.items()):
+        total = cache.hits + cache.misses
+        lines.append(f'nutriscope_cache_hit_ratio{{cache="{name}"}} {cache.hits / total if total else 0:.4f}')
+
+    lines += ["# HELP nutriscope_singleflight_calls_total Upstream calls made", "# TYPE nutriscope_singleflight_calls_total counter"]
+    lines += [f'nutriscope_singleflight_calls_total{{group="{name}"}} {flight.calls}' for name, flight in sorted(_flights.items())]
+    lines += ["# HELP nutriscope_singleflight_shared_total Calls that joined an identical in-flight call", "# TYPE nutriscope_singleflight_shared_total counter"]
+    lines += [f'nutriscope_singleflight_shared_total{{group="{name}"}} {flight.shared}' for name, flight in sorted(_flights.items())]
+
+    lines += ["# HELP nutriscope_circuit_open Whether the circuit is open (1) or half-open (0.5)", "# TYPE nutriscope_circuit_open gauge"]
+    lines += [f'nutriscope_circuit_open{{breaker="{name}"}} {_CIRCUIT_VALUES[b.state]}' for name, b in sorted(_breakers.items())]
+    lines += ["# HELP nutriscope_circuit_trips_total Times the circuit opened", "# TYPE nutriscope_circuit_trips_total counter"]
+    lines += [f'nutriscope_circuit_trips_total{{breaker="{name}"}} {b.trips}' for name, b in sorted(_breakers.items())]
+    lines += ["# HELP nutriscope_rejected_total Work refused by rate limiting or load shedding", "# TYPE nutriscope_rejected_total counter"]
+    lines += [f'nutriscope_rejected_total{{limiter="{name}"}} {limiter.rejected}' for name, limiter in sorted(_limiters.items())]
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,108 @@
+"""
+Fixed nutrient schema and compact per-food nutrient vectors.
+
+Every nutrient column of food_items has a fixed position in NUTRIENT_COLUMNS,
+so a food's nutrients fit in one float32 array (NaN = not measured) instead of
+a dict of up to 50 optional floats. Records use __slots__, and scaling or
+summing a meal is a single array operation over a (foods x nutrients) matrix.
+"""
+from typing import Iterable, Optional
+
+import numpy as np
+
+# food_items nutrient columns, in table order (see schema_out.txt)
+NUTRIENT_COLUMNS = (
+    "energy_kcal", "protein_g", "fat_g", "carbs_g", "fiber_g", "water_g",
+    "saturated_fat_g", "monounsaturated_fat_g", "polyunsaturated_fat_g", "trans_fat_g",
+    "total_sugars_g", "added_sugars_g", "starch_g",
+    "calcium_mg", "iron_mg", "magnesium_mg", "phosphorus_mg", "potassium_mg", "sodium_mg",
+    "zinc_mg", "copper_mg", "manganese_mg", "selenium_µg",
+    "vitamin_a_µg", "vitamin_c_mg", "vitamin_d_µg", "vitamin_e_mg", "vitamin_k_µg",
+    "thiamin_b1_mg", "riboflavin_b2_mg", "niacin_b3_mg", "vitamin_b6_mg", "folate_µg", "vitamin_b12_µg",
+    "tryptophan_mg", "threonine_mg", "isoleucine_mg", "leucine_mg", "lysine_mg",
+    "methionine_mg", "phenylalanine_mg", "valine_mg", "histidine_mg",
+    "cholesterol_mg", "glycemic_index",
+)
+NUTRIENT_INDEX = {col: i for i, col in enumerate(NUTRIENT_COLUMNS)}
+
+# The five columns the app shows everywhere
+MACRO_COLUMNS = ("energy_kcal", "protein_g", "carbs_g", "fat_g", "fiber_g")
+MACRO_POSITIONS = np.array([NUTRIENT_INDEX[col] for col in MACRO_COLUMNS])
+
+# Storage precision; math is done in float64 so rounding to 2 decimals stays exact
+STORAGE_DTYPE = np.float32
+
+
+def nutrient_vector(row: dict, columns: tuple = NUTRIENT_COLUMNS, dtype=STORAGE_DTYPE) -> np.ndarray:
+    """
+    Values of `columns` from a row as an array, NaN where missing or null.
+    """
+    return np.array(
+        [np.nan if (value := row.get(col)) is None else value for col in columns],
+        dtype=dtype,
+    )
+
+
+def _to_float(value) -> Optional[float]:
+    # float32 holds ~7 significant digits; print at that precision so 2.7 comes back as 2.7
+    return None if value != value else float(f"{value:.7g}")
+
+
+def vector_to_dict(vector: np.ndarray, columns: tuple = NUTRIENT_COLUMNS) -> dict:
+    """
+    Inverse of nutrient_vector(): NaN becomes None.
+    """
+    return {col: _to_float(value) for col, value in zip(columns, vector.tolist())}
+
+
+def scale_rows(per_100g: np.ndarray, factors) -> np.ndarray:
+    """
+    Scale a (foods x nutrients) matrix of per-100g values by one factor per
+    food, rounded to 2 decimals. Missing values count as 0.
+    """
+    matrix = np.nan_to_num(np.asarray(per_100g, dtype=np.float64))
+    return np.round(matrix * np.asarray(factors, dtype=np.float64)[:, None], 2)
+
+
+def total(scaled: np.ndarray) -> np.ndarray:
+    """
+    Column totals of a scaled matrix (a meal or a day), rounded to 2 decimals.
+    """
+    if len(scaled) == 0:
+        return np.zeros(scaled.shape[1] if scaled.ndim == 2 else 0)
+    return np.round(scaled.sum(axis=0), 2)
+
+
+class FoodRecord:
+    """
+    One food_items row: identity fields plus a nutrient vector over NUTRIENT_COLUMNS.
+    """
+    __slots__ = ("id", "name", "source", "nutrients")
+
+    def __init__(self, id, name: str, source: Optional[str], nutrients: np.ndarray):
+        self.id = id
+        self.name = name
+        self.source = source
+        self.nutrients = nutrients
+
+    @classmethod
+    def from_row(cls, row: dict) -> "FoodRecord":
+        return cls(row.get("id"), row.get("food_name"), row.get("source"), nutrient_vector(row))
+
+    def get(self, column: str) -> Optional[float]:
+        return _to_float(self.nutrients[NUTRIENT_INDEX[column]].item())
+
+    def macros(self) -> np.ndarray:
+        return self.nutrients[MACRO_POSITIONS]
+
+    def to_row(self, columns: Iterable[str] = NUTRIENT_COLUMNS) -> dict:
+        """
+        A food_items-shaped dict with the given nutrient columns.
+        """
+        row = {"id": self.id, "food_name": self.name}
+        if self.source is not None:
+            row["source"] = self.source
+        values = self.nutrients.tolist()
+        for col in columns:
+            row[col] = _to_float(values[NUTRIENT_INDEX[col]])
+        return row
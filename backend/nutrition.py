@@ -0,0 +1,52 @@
+import numpy as np
+
+from .nutrients import MACRO_COLUMNS, nutrient_vector, scale_rows, total
+from .usda_parser import parse_macros
+
+# Keys returned by /nutrition-details.
+# Per-100g macros are passed around as float64 vectors in this order.
+MACRO_KEYS = ["calories", "protein", "carbs", "fats", "fiber"]
+
+# food_items column (also the parse_macros() key) for each macro key, same order
+FOOD_ITEM_COLUMNS = dict(zip(MACRO_KEYS, MACRO_COLUMNS))
+
+
+def empty_macros() -> dict:
+    return {key: 0 for key in MACRO_KEYS}
+
+
+def food_item_macros(row: dict) -> np.ndarray:
+    """
+    Per-100g macro vector from a food_items row (e.g. read from the local snapshot).
+    """
+    return nutrient_vector(row, MACRO_COLUMNS, np.float64)
+
+
+def usda_macros(food: dict) -> np.ndarray:
+    """
+    Per-100g macro vector from a USDA /food/{fdcId} payload.
+    """
+    return nutrient_vector(parse_macros(food), MACRO_COLUMNS, np.float64)
+
+
+def macros_dict(vector: np.ndarray) -> dict:
+    return dict(zip(MACRO_KEYS, vector.tolist()))
+
+
+def scale_macros(per_100g: np.ndarray, factor: float) -> dict:
+    return macros_dict(scale_rows(per_100g[None, :], [factor])[0])
+
+
+def scale_meal(per_100g: list, factors: list[float]) -> tuple[list[dict], dict]:
+    """
+    Scale every item of a meal and total it with two array operations.
+    Items whose macros are unknown (None) count as 0.
+
+    Returns (per-item macro dicts, total macro dict).
+    """
+    matrix = np.zeros((len(per_100g), len(MACRO_KEYS)))
+    for i, vector in enumerate(per_100g):
+        if vector is not None:
+            matrix[i] = vector
+    scaled = scale_rows(matrix, factors)
+    return [macros_dict(row) for row in scaled], macros_dict(total(scaled))
@@ -0,0 +1,182 @@
+"""
+Time-of-day progress engine.
+
+Instead of assuming intake grows linearly over 24 hours (hour / 24) or only
+checking after a fixed evening cutoff, each user gets an expected-progress
+curve per nutrient learned from their own history: for every local hour, the
+share of a day's intake usually consumed by then. Curves are built from the
+last HISTORY_DAYS days, blended with a default waking-hours ramp while history
+is thin, and cached; a status check is then one interpolation:
+
+    expected = goal * np.interp(local_hour, HOURS, curve)
+"""
+import os
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from .db import as_user
+
+HISTORY_DAYS = int(os.getenv("PROGRESS_HISTORY_DAYS", 28))
+CURVE_TTL = float(os.getenv("PROGRESS_CURVE_TTL", 6 * 3600))
+
+# Weight of the default curve, in days of history
+PRIOR_DAYS = 7
+WAKE_HOUR = 7
+SLEEP_HOUR = 22
+
+# Same thresholds as the dashboard coach
+BEHIND_RATIO = 0.7
+AHEAD_RATIO = 1.2
+
+# Curve points at 0:00, 1:00, ... 24:00
+HOURS = np.arange(25)
+
+# Progress nutrient -> (log table, amount column, profile goal column)
+NUTRIENTS = {
+    "calories": ("daily_logs", "energy_kcal", "target_calories"),
+    "protein": ("daily_logs", "protein_g", "target_protein"),
+    "water": ("water_logs", "amount_ml", "water_goal"),
+}
+
+# daily_totals column for today's actual intake
+TOTAL_COLUMNS = {"calories": "energy_kcal", "protein": "protein_g", "water": "water_ml"}
+
+
+def default_curve() -> np.ndarray:
+    """
+    Linear ramp over waking hours: nothing before WAKE_HOUR, everything by SLEEP_HOUR.
+    """
+    return np.clip((HOURS - WAKE_HOUR) / (SLEEP_HOUR - WAKE_HOUR), 0.0, 1.0)
+
+
+def build_curve(day_index, hour, amount) -> tuple[np.ndarray, int]:
+    """
+    Expected cumulative share of daily intake at each hour, from past log events.
+
+    Args:
+        day_index: Integer day of each event (any labelling, only equality matters)
+        hour: Local hour (0-23) of each event
+        amount: Amount of each event (kcal, grams, ml)
+
+    Returns:
+        (curve of 25 points from 0 to 1, number of days with intake)
+    """
+    day_index = np.asarray(day_index, dtype=np.int64)
+    amount = np.nan_to_num(np.asarray(amount, dtype=np.float64))
+    if len(day_index) == 0:
+        return default_curve(), 0
+
+    days, rows = np.unique(day_index, return_inverse=True)
+    per_hour = np.zeros((len(days), 24))
+    np.add.at(per_hour, (rows, np.clip(np.asarray(hour, dtype=np.int64), 0, 23)), amount)
+
+    totals = per_hour.sum(axis=1)
+    per_hour = per_hour[totals > 0] / totals[totals > 0, None]
+    n_days = len(per_hour)
+    if n_days == 0:
+        return default_curve(), 0
+
+    # Intake logged during hour h counts as done by h + 1
+    learned = np.concatenate(([0.0], np.cumsum(per_hour.mean(axis=0))))
+    curve = (n_days * learned + PRIOR_DAYS * default_curve()) / (n_days + PRIOR_DAYS)
+    return curve, n_days
+
+
+def build_curves(logs: dict[str, list[dict]], tz) -> dict:
+    """
+    Curves for every nutrient in NUTRIENTS from raw log rows.
+
+    Args:
+        logs: table name -> rows with date, logged_at and the amount columns
+        tz: ZoneInfo used to turn logged_at into a local hour
+
+    Returns:
+        {"calories": {"curve": [...25 floats], "days": n}, ...} (JSON-friendly, cacheable)
+    """
+    curves = {}
+    for key, (table, column, _) in NUTRIENTS.items():
+        day_index, hour, amount = [], [], []
+        for row in logs.get(table, []):
+            if not row.get("logged_at") or not row.get("date"):
+                continue
+            logged_at = datetime.fromisoformat(row["logged_at"])
+            if logged_at.tzinfo is not None:
+                logged_at = logged_at.astimezone(tz)
+            day_index.append(date.fromisoformat(row["date"]).toordinal())
+            hour.append(logged_at.hour)
+            amount.append(row.get(column))
+        curve, days = build_curve(day_index, hour, np.array(amount, dtype=np.float64))
+        curves[key] = {"curve": np.round(curve, 4).tolist(), "days": days}
+    return curves
+
+
+def fetch_history(client, user_id: str, today: date, token: Optional[str] = None) -> dict[str, list[dict]]:
+    """
+    Log rows for the HISTORY_DAYS days before `today` (today is partial, so it's excluded).
+    With `token` the rows are read as that user (see db.as_user).
+    """
+    since = (today - timedelta(days=HISTORY_DAYS)).isoformat()
+    logs = {}
+    for table in {table for table, _, _ in NUTRIENTS.values()}:
+        columns = ", ".join(["date", "logged_at"] + sorted({col for t, col, _ in NUTRIENTS.values() if t == table}))
+        query = client.table(table)\
+            .select(columns)\
+            .eq("user_id", user_id)\
+            .gte("date", since)\
+            .lt("date", today.isoformat())
+        if token:
+            query = as_user(query, token)
+        logs[table] = query.execute().data or []
+    return logs
+
+
+def expected_shares(curves: np.ndarray, local_hour) -> np.ndarray:
+    """
+    np.interp(local_hour[i], HOURS, curves[i]) for many users at once.
+
+    Args:
+        curves: (n, 25) array, one curve per user
+        local_hour: n fractional local hours
+    """
+    local_hour = np.clip(np.asarray(local_hour, dtype=np.float64), 0, 24)
+    lower = np.minimum(local_hour.astype(np.int64), 23)
+    rows = np.arange(len(curves))
+    return curves[rows, lower] + (local_hour - lower) * (curves[rows, lower + 1] - curves[rows, lower])
+
+
+def status(actual: float, expected: float) -> str:
+    if expected <= 0:
+        return "ahead" if actual > 0 else "on_track"
+    ratio = actual / expected
+    if ratio < BEHIND_RATIO:
+        return "behind"
+    if ratio > AHEAD_RATIO:
+        return "ahead"
+    return "on_track"
+
+
+def evaluate_progress(curves: dict, totals: dict, goals: dict, local_hour: float) -> dict:
+    """
+    Status of each nutrient at `local_hour` (fractional, e.g. 14.5 for 14:30).
+
+    Args:
+        curves: Output of build_curves()
+        totals: Today's daily_totals row (or {})
+        goals: Profile row with the goal columns
+    """
+    result = {}
+    for key, (_, _, goal_column) in NUTRIENTS.items():
+        goal = float(goals.get(goal_column) or 0)
+        actual = float(totals.get(TOTAL_COLUMNS[key]) or 0)
+        share = float(np.interp(local_hour, HOURS, curves[key]["curve"]))
+        expected = goal * share
+        result[key] = {
+            "status": status(actual, expected) if goal > 0 else "on_track",
+            "actual": round(actual, 2),
+            "expected": round(expected, 2),
+            "goal": goal,
+            "expected_share": round(share, 4),
+        }
+    return result
@@ -0,0 +1,196 @@
+"""
+Backpressure for upstream-backed work.
+
+- RateLimiter: a token bucket per key (per USDA API key, per client)
+- CircuitBreaker: stop calling an upstream after repeated failures or timed
+  out calls, let one probe through after a cooldown
+- LoadShedder: reject new work once too much of it is queued or in flight
+- AdmissionControl: ASGI middleware shedding requests with a LoadShedder and
+  recording the client (current_client) for per-client limits
+
+Rejections raise Unavailable, so callers can fall back (stale cache, IFCT-only
+results) or answer 429/503 with Retry-After.
+"""
+import math
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Hashable, Optional
+
+from starlette.responses import JSONResponse
+
+# Who the current request is for (client address), for per-client limits deep in the call stack
+current_client: ContextVar[Optional[str]] = ContextVar("current_client", default=None)
+
+
+class Unavailable(Exception):
+    """
+    Work was refused (rate limited, circuit open, overloaded) or the upstream failed.
+    """
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Token bucket per key: `rate` tokens per second, up to `burst` saved up.
+    The least recently seen keys are dropped past maxsize. rate <= 0 disables it.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, maxsize: int = 10000):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.maxsize = maxsize
+        self.rejected = 0
+        self._buckets: OrderedDict = OrderedDict()
+
+    def acquire(self, key: Hashable):
+        """
+        Take one token for `key` or raise Unavailable(f"{name}_rate_limited").
+        """
+        if self.rate <= 0:
+            return
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        if not bucket.try_acquire():
+            self.rejected += 1
+            raise Unavailable(f"{self.name}_rate_limited", bucket.retry_after())
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After `failure_threshold` consecutive failures it
+    opens and calls fail fast for `reset_timeout` seconds, then half-opens: one
+    probe call goes through (another one each reset_timeout while it's pending),
+    and its outcome closes or re-opens the circuit. failure_threshold <= 0 disables it.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probe_at = 0.0
+
+    def before_call(self):
+        """
+        Raise Unavailable("circuit_open") unless a call may go through now.
+        """
+        if self.failure_threshold <= 0 or self.state == self.CLOSED:
+            return
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self._opened_at < self.reset_timeout:
+                self.rejected += 1
+                raise Unavailable("circuit_open", self.reset_timeout - (now - self._opened_at))
+            self.state = self.HALF_OPEN
+        elif now - self._probe_at < self.reset_timeout:
+            # A probe is already out
+            self.rejected += 1
+            raise Unavailable("circuit_open", self.reset_timeout - (now - self._probe_at))
+        self._probe_at = now
+
+    def record_success(self):
+        self.failures = 0
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failure_threshold > 0 and (self.state == self.HALF_OPEN or self.failures >= self.failure_threshold):
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+class LoadShedder:
+    """
+    Caps how much work is queued or in flight. enter() raises
+    Unavailable("overloaded") at max_depth; pair each enter() with leave().
+    max_depth <= 0 disables it.
+    """
+
+    def __init__(self, name: str, max_depth: int, retry_after: float = 1.0):
+        self.name = name
+        self.max_depth = max_depth
+        self.retry_after = retry_after
+        self.depth = 0
+        self.rejected = 0
+
+    def enter(self):
+        if 0 < self.max_depth <= self.depth:
+            self.rejected += 1
+            raise Unavailable("overloaded", self.retry_after)
+        self.depth += 1
+
+    def leave(self):
+        self.depth -= 1
+
+
+class AdmissionControl:
+    """
+    ASGI middleware: 503 with Retry-After once `shedder` is full, except for
+    `exempt` paths (probes, metrics). Plain ASGI rather than BaseHTTPMiddleware,
+    so it adds no per-request task, and the slot is held until the response
+    (including a streamed body) is fully sent.
+    """
+
+    def __init__(self, app, shedder: LoadShedder, exempt: frozenset = frozenset()):
+        self.app = app
+        self.shedder = shedder
+        self.exempt = exempt
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt:
+            return await self.app(scope, receive, send)
+        try:
+            self.shedder.enter()
+        except Unavailable as e:
+            response = JSONResponse({"detail": "Server busy"}, status_code=503, headers={"Retry-After": e.retry_after_header})
+            return await response(scope, receive, send)
+        client = scope.get("client")
+        current_client.set(client[0] if client else None)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.shedder.leave()
@@ -0,0 +1,56 @@
+"""
+Production entry point: uvicorn with several worker processes.
+
+    python -m backend.server
+
+Each worker loads its own food index and caches during warm-up (see WARMUP in
+main.py) and only reports ready on /readyz once that's done; /healthz answers
+as soon as the worker is serving. Settings come from the environment:
+
+    HOST, PORT                  bind address (0.0.0.0:8000)
+    WEB_CONCURRENCY             worker processes (CPU count)
+    KEEP_ALIVE_SECONDS          idle keep-alive timeout (5)
+    GRACEFUL_SHUTDOWN_SECONDS   time in-flight requests get on shutdown (30)
+    FORWARDED_ALLOW_IPS         proxies trusted for X-Forwarded-* (127.0.0.1)
+    FOOD_INDEX_REFRESH_SECONDS  how often a worker adds foods imported elsewhere (60)
+"""
+import multiprocessing
+import os
+
+import uvicorn
+
+from .alert_job import run_every
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", 8000))
+WORKERS = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+KEEP_ALIVE_SECONDS = int(os.getenv("KEEP_ALIVE_SECONDS", 5))
+GRACEFUL_SHUTDOWN_SECONDS = int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", 30))
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def start_alert_job():
+    """
+    With several workers, ALERT_JOB_INTERVAL_MINUTES would start one alert loop
+    per worker. Run a single loop in its own process and turn it off in the workers.
+    """
+    interval = float(os.getenv("ALERT_JOB_INTERVAL_MINUTES", 0))
+    if WORKERS > 1 and interval > 0:
+        os.environ["ALERT_JOB_INTERVAL_MINUTES"] = "0"
+        multiprocessing.Process(target=run_every, args=(interval,), name="alert-job", daemon=True).start()
+
+
+if __name__ == "__main__":
+    start_alert_job()
+    # Workers split the USDA key's rate limit by this (see usda.py)
+    os.environ["WEB_CONCURRENCY"] = str(WORKERS)
+    uvicorn.run(
+        "backend.main:app",
+        host=HOST,
+        port=PORT,
+        workers=WORKERS,
+        timeout_keep_alive=KEEP_ALIVE_SECONDS,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS,
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+    )
@@ -0,0 +1,255 @@
+"""
+Local SQLite snapshot of the food_items catalog.
+
+food_items is static reference data, so instead of reading it from Supabase on
+every cold start and nutrition lookup, export it once to a SQLite file:
+
+- food_items: every column of the Supabase table, keyed by id
+- food_fts:   FTS5 index over food_name (external content, no duplicate text)
+- meta:       version stamp (content hash), export time and row count
+
+Point FOOD_SNAPSHOT_PATH at the file and the API reads IFCT rows from it.
+Re-exporting writes a new file and atomically replaces the old one; the API
+notices the new version stamp and reloads. Run from the repo root:
+
+    python -m backend.snapshot export food_items.sqlite
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from .food_index import fetch_food_items, rank_tier, tokenize
+
+SNAPSHOT_PATH = os.getenv("FOOD_SNAPSHOT_PATH")
+# How often (seconds) request paths stat() the file to look for a new export
+RELOAD_CHECK_SECONDS = float(os.getenv("FOOD_SNAPSHOT_CHECK_SECONDS", 30))
+
+
+def _quote(column: str) -> str:
+    # Column names include µ (e.g. "vitamin_a_µg"), always quote them
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _columns(rows: list[dict]) -> list[str]:
+    """
+    Union of keys over all rows in first-seen order, id first.
+    """
+    columns = {"id": None}
+    for row in rows:
+        for key in row:
+            columns.setdefault(key, None)
+    return list(columns)
+
+
+def _version(rows: list[dict]) -> str:
+    # Stable for identical content, so re-exporting unchanged data doesn't trigger reloads
+    digest = hashlib.sha256()
+    for row in sorted(rows, key=lambda r: r.get("id") or 0):
+        digest.update(json.dumps(row, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+def write_snapshot(rows: list[dict], path: str) -> str:
+    """
+    Write rows to a new snapshot file at `path`, replacing it atomically.
+    Returns the version stamp.
+    """
+    columns = _columns(rows)
+    version = _version(rows)
+    tmp = f"{path}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    conn = sqlite3.connect(tmp)
+    try:
+        column_defs = ", ".join(
+            "id INTEGER PRIMARY KEY" if col == "id" else _quote(col) for col in columns
+        )
+        conn.execute(f"CREATE TABLE food_items ({column_defs})")
+        placeholders = ", ".join("?" for _ in columns)
+        conn.executemany(
+            f"INSERT INTO food_items ({', '.join(_quote(c) for c in columns)}) VALUES ({placeholders})",
+            ([row.get(col) for col in columns] for row in rows if row.get("id") is not None),
+        )
+
+        conn.execute(
+            "CREATE VIRTUAL TABLE food_fts USING fts5("
+            "food_name, content='food_items', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        conn.execute("INSERT INTO food_fts(food_fts) VALUES ('rebuild')")
+
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("version", version),
+            ("exported_at", datetime.now(timezone.utc).isoformat()),
+            ("items", str(len(rows))),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp, path)
+    return version
+
+
+def export_snapshot(client, path: str) -> str:
+    """
+    Export the whole food_items table from Supabase into a snapshot file.
+    """
+    return write_snapshot(fetch_food_items(client, "*"), path)
+
+
+def _sql_rank_tier(name: Optional[str], query: str) -> int:
+    return rank_tier((name or "").lower().strip(), query)
+
+
+def _sql_name_key(name: Optional[str]) -> str:
+    return (name or "").lower()
+
+
+class FoodSnapshot:
+    """
+    Read-only view of a snapshot file, shared by all request handlers.
+
+    Local SQLite reads take microseconds, so they run inline; a lock serialises
+    access to the single connection.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.version: Optional[str] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._columns: set = set()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._conn is not None
+
+    def open(self) -> bool:
+        """
+        (Re)open the snapshot file. Returns False if there is none.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+
+        mtime = os.stat(self.path).st_mtime_ns
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # Same ranking as FoodIndex.search, so search() can ORDER BY ... LIMIT in SQL
+        conn.create_function("rank_tier", 2, _sql_rank_tier, deterministic=True)
+        conn.create_function("name_key", 1, _sql_name_key, deterministic=True)
+        version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+        columns = {r[1] for r in conn.execute("PRAGMA table_info(food_items)")}
+
+        with self._lock:
+            old, self._conn = self._conn, conn
+            self.version = version
+            self._columns = columns
+            self._mtime = mtime
+        if old is not None:
+            old.close()
+        return True
+
+    def maybe_reload(self) -> bool:
+        """
+        Reopen the file if a new export replaced it. Returns True when the
+        version stamp changed, so callers can rebuild anything derived from it.
+        Checks at most once every RELOAD_CHECK_SECONDS.
+        """
+        now = time.monotonic()
+        if not self.path or now - self._checked_at < RELOAD_CHECK_SECONDS:
+            return False
+        self._checked_at = now
+
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+
+        previous = self.version
+        return self.open() and self.version != previous
+
+    def _query(self, sql: str, params=()) -> list[dict]:
+        with self._lock:
+            if self._conn is None:
+                return []
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def _select(self, columns: Optional[str]) -> str:
+        if not columns or columns.strip() == "*":
+            return "*"
+        # Columns the snapshot doesn't have are skipped instead of failing the query
+        names = [c.strip() for c in columns.split(",")]
+        return ", ".join(_quote(c) for c in names if c in self._columns) or "*"
+
+    def rows(self, columns: Optional[str] = None) -> list[dict]:
+        """
+        Every row, with a comma separated column list like Supabase .select().
+        """
+        return self._query(f"SELECT {self._select(columns)} FROM food_items")
+
+    def get_many(self, ids, columns: Optional[str] = None) -> dict[str, dict]:
+        """
+        Rows by id, keyed by str(id). Ids that aren't in the snapshot are missing.
+        """
+        int_ids = []
+        for food_id in ids:
+            try:
+                int_ids.append(int(food_id))
+            except (TypeError, ValueError):
+                continue
+        if not int_ids:
+            return {}
+
+        select = self._select(columns)
+        if select != "*":
+            select = '"id", ' + select
+        placeholders = ", ".join("?" for _ in int_ids)
+        rows = self._query(f"SELECT {select} FROM food_items WHERE id IN ({placeholders})", int_ids)
+        return {str(row["id"]): row for row in rows}
+
+    def search(self, q: str, limit: int = 30, columns: Optional[str] = None) -> list[dict]:
+        """
+        Full-text search on food_name: every query word must prefix-match a word
+        in the name. Same ranking as FoodIndex.search, applied by SQLite with a
+        LIMIT, so only the returned rows are built in Python.
+        """
+        query = q.lower().strip()
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        match = " ".join(f'"{term}"*' for term in terms)
+        select = ", ".join(f"f.{c}" for c in self._select(columns).split(", ")) if columns else "f.*"
+        return self._query(
+            f"SELECT {select} FROM food_fts JOIN food_items f ON f.id = food_fts.rowid WHERE food_fts MATCH ?"
+            " ORDER BY rank_tier(f.food_name, ?), name_key(f.food_name) LIMIT ?",
+            (match, query, limit),
+        )
+
+
+food_snapshot = FoodSnapshot(SNAPSHOT_PATH)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SQLite snapshot of food_items")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Export food_items from Supabase")
+    export.add_argument("path", nargs="?", default=SNAPSHOT_PATH or "food_items.sqlite")
+    args = parser.parse_args()
+
+    from .config import supabase
+    version = export_snapshot(supabase, args.path)
+    print(f"Snapshot written to {args.path} (version {version})")
@@ -0,0 +1,192 @@
+import os
+from typing import Optional
+
+import httpx
+
+from .cache import TTLCache
+from .metrics import observe_upstream, register_breaker, register_cache, register_limiter, register_singleflight
+from .resilience import CircuitBreaker, LoadShedder, RateLimiter, Unavailable, current_client
+from .singleflight import SingleFlight
+
+# Overridable so the client can be pointed at a local stub server
+USDA_BASE_URL = os.getenv("USDA_BASE_URL", "https://api.nal.usda.gov/fdc/v1")
+
+# FDC records are effectively static, so cache them for a day
+SEARCH_CACHE_TTL = float(os.getenv("USDA_SEARCH_CACHE_TTL", 6 * 3600))
+FOOD_CACHE_TTL = float(os.getenv("USDA_FOOD_CACHE_TTL", 24 * 3600))
+CACHE_SIZE = int(os.getenv("USDA_CACHE_SIZE", 2048))
+
+SEARCH_DATA_TYPES = "Foundation,SR Legacy"
+
+TIMEOUT = float(os.getenv("USDA_TIMEOUT", 5.0))
+
+# Consecutive failures (errors, 429/5xx, calls past TIMEOUT) that open the
+# circuit, and how long it stays open before a probe. A slow call that does
+# answer counts as a success: FDC routinely takes over a second.
+BREAKER_FAILURES = int(os.getenv("USDA_BREAKER_FAILURES", 5))
+BREAKER_RESET = float(os.getenv("USDA_BREAKER_RESET_SECONDS", 30))
+
+# Upstream calls: FDC allows 1000/hour per key; each client gets a share.
+# Every worker process has its own buckets, so the key's budget is split
+# evenly across WEB_CONCURRENCY workers (server.py sets it for them).
+KEY_RATE_PER_HOUR = float(os.getenv("USDA_KEY_RATE_PER_HOUR", 1000))
+KEY_BURST = float(os.getenv("USDA_KEY_BURST", 100))
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+CLIENT_RATE_PER_MINUTE = float(os.getenv("USDA_CLIENT_RATE_PER_MINUTE", 60))
+CLIENT_BURST = float(os.getenv("USDA_CLIENT_BURST", 20))
+
+# Calls waiting on FDC beyond this fail fast instead of queueing on the pool
+MAX_PENDING = int(os.getenv("USDA_MAX_PENDING", 32))
+
+
+class USDAClient:
+    """
+    App-scoped FoodData Central client.
+
+    One pooled httpx.AsyncClient is shared across requests (keep-alive, connection
+    limits, timeouts) and successful responses are kept in TTL+LRU caches keyed by
+    normalized search query and by fdcId. Concurrent cache misses for the same
+    key share a single request (single-flight), which keeps bursts of identical
+    lookups under the API key's rate limit.
+
+    Calls that do go upstream pass a load shedder, token buckets per API key
+    and per client (current_client) and a circuit breaker. When FDC is refused
+    or failing, an expired cached copy is served if there is one, otherwise
+    Unavailable is raised so callers can fall back.
+    """
+
+    def __init__(self, base_url: str = USDA_BASE_URL):
+        self.base_url = base_url
+        self.api_key: Optional[str] = None
+        self.search_cache = TTLCache(maxsize=CACHE_SIZE, ttl=SEARCH_CACHE_TTL, keep_stale=True)
+        self.food_cache = TTLCache(maxsize=CACHE_SIZE, ttl=FOOD_CACHE_TTL, keep_stale=True)
+        self.flights = SingleFlight()
+        self.breaker = CircuitBreaker("usda", BREAKER_FAILURES, BREAKER_RESET)
+        self.key_limiter = RateLimiter("usda_key", KEY_RATE_PER_HOUR / WORKERS / 3600, KEY_BURST / WORKERS)
+        self.client_limiter = RateLimiter("client", CLIENT_RATE_PER_MINUTE / 60, CLIENT_BURST)
+        self.shedder = LoadShedder("usda", MAX_PENDING)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def start(self):
+        self.api_key = os.getenv("USDA_API_KEY")
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(TIMEOUT, connect=min(TIMEOUT, 3.0)),
+                limits=httpx.Limits(
+                    max_connections=50,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=30.0,
+                ),
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Lazily start when used outside the app lifespan (scripts, REPL)
+        if self._client is None:
+            self.start()
+        return self._client
+
+    async def search(self, query: str, page_size: int = 30) -> Optional[dict]:
+        """
+        FDC /foods/search. Returns the decoded JSON, or None on a non-200 response.
+        """
+        key = (query.lower().strip(), page_size)
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            return cached
+        return await self.flights.do(("search",) + key, lambda: self._fetch_search(query, page_size, key))
+
+    async def _get(self, path: str, params: dict, target: str) -> httpx.Response:
+        """
+        GET from FDC through the shedder, rate limiters and circuit breaker.
+        Raises Unavailable if the call is refused, fails, or gets a 429/5xx.
+        """
+        self.shedder.enter()
+        try:
+            self.key_limiter.acquire(self.api_key)
+            client = current_client.get()
+            if client is not None:
+                self.client_limiter.acquire(client)
+            self.breaker.before_call()
+
+            # Only the real outcome counts: an error or the httpx timeout is a
+            # failure, any answer other than 429/5xx a success, however slow.
+            # Cancelled by the caller (outcome None) says nothing about FDC.
+            outcome = None
+            try:
+                with observe_upstream("usda", target):
+                    res = await self.client.get(path, params={"api_key": self.api_key, **params})
+                outcome = res.status_code != 429 and res.status_code < 500
+            except httpx.HTTPError as e:
+                outcome = False
+                raise Unavailable("upstream_error", self.breaker.reset_timeout) from e
+            finally:
+                if outcome is True:
+                    self.breaker.record_success()
+                elif outcome is False:
+                    self.breaker.record_failure()
+            if not outcome:
+                raise Unavailable(f"upstream_{res.status_code}", self.breaker.reset_timeout)
+            return res
+        finally:
+            self.shedder.leave()
+
+    async def _fetch_search(self, query: str, page_size: int, key: tuple) -> Optional[dict]:
+        try:
+            res = await self._get(
+                "/foods/search",
+                {"query": query, "pageSize": page_size, "dataType": SEARCH_DATA_TYPES},
+                "/foods/search",
+            )
+        except Unavailable:
+            stale = self.search_cache.get_stale(key)
+            if stale is None:
+                raise
+            return stale
+        if res.status_code != 200:
+            return None
+
+        data = res.json()
+        self.search_cache.set(key, data)
+        return data
+
+    async def get_food(self, fdc_id: str) -> Optional[dict]:
+        """
+        FDC /food/{fdcId}. Returns the decoded JSON, or None on a non-200 response.
+        """
+        key = str(fdc_id)
+        cached = self.food_cache.get(key)
+        if cached is not None:
+            return cached
+        return await self.flights.do(("food", key), lambda: self._fetch_food(key))
+
+    async def _fetch_food(self, key: str) -> Optional[dict]:
+        try:
+            res = await self._get(f"/food/{key}", {}, "/food/{fdcId}")
+        except Unavailable:
+            stale = self.food_cache.get_stale(key)
+            if stale is None:
+                raise
+            return stale
+        if res.status_code != 200:
+            return None
+
+        data = res.json()
+        self.food_cache.set(key, data)
+        return data
+
+
+usda = USDAClient()
+register_cache("usda_search", usda.search_cache)
+register_cache("usda_food", usda.food_cache)
+register_singleflight("usda", usda.flights)
+register_breaker("usda", usda.breaker)
+register_limiter("usda_key", usda.key_limiter)
+register_limiter("usda_client", usda.client_limiter)
+register_limiter("usda_pending", usda.shedder)
@@ -0,0 +1,308 @@
+"""
+Bulk USDA import into food_items.
+
+Streams foods through parse -> dedupe -> batched upsert (foods already stored by
+fdcId or name_fingerprint() are skipped). Foods can come from:
+- a list of FDC ids (fetched with bounded concurrency through the shared client)
+- a FoodData Central JSON download (e.g. FoodData_Central_sr_legacy_food_json_*.json)
+- a FoodData Central CSV download directory (food.csv, nutrient.csv, food_nutrient.csv)
+
+A checkpoint file records imported fdcIds so an interrupted run can be resumed.
+Run from the repo root:
+
+    python -m backend.usda_import --ids 168878 169756
+    python -m backend.usda_import --json FoodData_Central_sr_legacy_food_json.json --checkpoint sr.ckpt
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+from .config import supabase
+from . import db
+from .food_index import food_index, name_fingerprint
+from .resilience import Unavailable
+from .usda import usda
+from .usda_parser import parse_columns
+from .log import get_logger
+
+BATCH_SIZE = int(os.getenv("USDA_IMPORT_BATCH_SIZE", 500))
+FETCH_CONCURRENCY = int(os.getenv("USDA_IMPORT_CONCURRENCY", 8))
+# Characters read per step when streaming a JSON download
+JSON_CHUNK_SIZE = 1 << 20
+
+logger = get_logger(__name__)
+
+
+def build_food_row(food: dict, name: Optional[str] = None) -> dict:
+    """
+    food_items row for a USDA /food/{fdcId}-shaped payload.
+    Nutrients that are not present are stored as null.
+    """
+    food_name = name or food.get("description")
+    row = {
+        "food_name": food_name,
+        "source": "USDA",
+        "food_code": str(food.get("fdcId")),
+        "name_fingerprint": name_fingerprint(food_name or "") or None,
+        "created_at": "now()"
+    }
+    row.update(parse_columns(food))
+    return row
+
+
+class Checkpoint:
+    """
+    Set of fdcIds already imported, persisted as JSON after every batch.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = Path(path) if path else None
+        self.done: set[str] = set()
+        if self.path and self.path.exists():
+            self.done = set(json.loads(self.path.read_text()))
+
+    def mark(self, codes: Iterable[str]):
+        self.done.update(codes)
+        if self.path:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps(sorted(self.done)))
+            tmp.replace(self.path)
+
+
+# --- Sources -----------------------------------------------------------------
+
+async def fetch_fdc_foods(fdc_ids: list[str], stats: dict, concurrency: int = FETCH_CONCURRENCY,
+                          wait_rate_limits: bool = True) -> AsyncIterator[dict]:
+    """
+    Fetch foods from the USDA API, at most `concurrency` requests in flight,
+    waiting out rate limits. Yields in completion order.
+
+    With wait_rate_limits=False (inside an HTTP request) a rate-limited id is
+    not retried; it goes to stats["not_fetched"] and the longest Retry-After
+    to stats["retry_after"], so the caller can send those ids again later.
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def fetch(fdc_id):
+        async with sem:
+            while True:
+                try:
+                    return fdc_id, await usda.get_food(fdc_id)
+                except Unavailable as e:
+                    if not e.reason.endswith("_rate_limited"):
+                        logger.warning("usda_fetch_error", extra={"fdc_id": fdc_id, "error": e.reason})
+                        return fdc_id, None
+                    if not wait_rate_limits:
+                        stats["not_fetched"].append(fdc_id)
+                        stats["retry_after"] = max(stats["retry_after"], round(e.retry_after, 1))
+                        return fdc_id, False
+                    # Pace the import to the API key's budget instead of failing
+                    await asyncio.sleep(e.retry_after)
+                except Exception as e:
+                    logger.warning("usda_fetch_error", extra={"fdc_id": fdc_id, "error": str(e)})
+                    return fdc_id, None
+
+    tasks = [asyncio.create_task(fetch(fdc_id)) for fdc_id in fdc_ids]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            fdc_id, food = await next_done
+            if food:
+                yield food
+            elif food is None:
+                stats["failed"] += 1
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def read_json_dump(path: str) -> Iterator[dict]:
+    """
+    Foods from an FDC JSON download. The file has a single top-level key
+    (FoundationFoods, SRLegacyFoods, SurveyFoods, BrandedFoods) holding a list,
+    or is a bare list. Foods are decoded one at a time as the file is read, so
+    multi-GB downloads (BrandedFoods) never sit in memory whole.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf = ""
+        while "[" not in buf:
+            chunk = f.read(JSON_CHUNK_SIZE)
+            if not chunk:
+                raise ValueError(f"{path}: no list of foods found")
+            buf += chunk
+        pos = buf.index("[") + 1
+
+        while True:
+            # Skip to the next food (or the closing bracket), reading more as needed
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                chunk = f.read(JSON_CHUNK_SIZE)
+                if not chunk:
+                    raise ValueError(f"{path}: unexpected end of file")
+                buf, pos = chunk, 0
+                continue
+            if buf[pos] == "]":
+                return
+
+            try:
+                food, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # The food runs past the buffer; keep its start and read on.
+                # Reading at least as much again keeps re-decoding linear.
+                chunk = f.read(max(JSON_CHUNK_SIZE, len(buf) - pos))
+                if not chunk:
+                    raise
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield food
+
+
+def read_csv_dump(directory: str) -> Iterator[dict]:
+    """
+    Foods from an FDC CSV download, rebuilt into /food/{fdcId}-shaped dicts.
+    """
+    base = Path(directory)
+
+    nutrients = {}
+    with open(base / "nutrient.csv", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            nutrients[row["id"]] = {"id": int(row["id"]), "number": row.get("nutrient_nbr"), "name": row["name"]}
+
+    food_nutrients: dict[str, list] = {}
+    with open(base / "food_nutrient.csv", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            nutrient = nutrients.get(row["nutrient_id"])
+            if nutrient is None or row.get("amount") in (None, ""):
+                continue
+            food_nutrients.setdefault(row["fdc_id"], []).append({"nutrient": nutrient, "amount": float(row["amount"])})
+
+    with open(base / "food.csv", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            fdc_id = row["fdc_id"]
+            if fdc_id in food_nutrients:
+                yield {"fdcId": fdc_id, "description": row["description"], "foodNutrients": food_nutrients.pop(fdc_id)}
+
+
+async def _aiter(foods: Iterable[dict]) -> AsyncIterator[dict]:
+    for food in foods:
+        yield food
+
+
+# --- Pipeline ----------------------------------------------------------------
+
+async def _flush(batch: list[dict], checkpoint: Checkpoint, stats: dict):
+    codes = [row["food_code"] for row in batch]
+
+    # Skip foods that an earlier run (or /import-usda) already inserted
+    existing = await db.execute(
+        supabase.table("food_items")\
+            .select("food_code")\
+            .eq("source", "USDA")\
+            .in_("food_code", codes)
+    )
+    existing_codes = {row["food_code"] for row in existing.data or []}
+
+    # Near-duplicate names within the batch: keep the first
+    rows = {}
+    for row in batch:
+        if row["food_code"] not in existing_codes:
+            rows.setdefault(row["name_fingerprint"] or row["food_code"], row)
+    rows = list(rows.values())
+
+    inserted = 0
+    if rows:
+        # Rows whose name_fingerprint is already stored are left out by the unique index
+        res = await db.execute(
+            supabase.table("food_items")\
+                .upsert(rows, on_conflict="source,name_fingerprint", ignore_duplicates=True)
+        )
+        for row in res.data or []:
+            food_index.add(row)
+        inserted = len(res.data or [])
+    stats["inserted"] += inserted
+    stats["skipped"] += len(batch) - inserted
+
+    checkpoint.mark(codes)
+
+
+async def run_import(foods: AsyncIterator[dict], checkpoint: Checkpoint, stats: dict, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Parse, dedupe and insert foods in batches of `batch_size`.
+    """
+    seen = set(checkpoint.done)
+    batch = []
+
+    async for food in foods:
+        code = str(food.get("fdcId"))
+        if code in seen:
+            stats["skipped"] += 1
+            continue
+        seen.add(code)
+
+        batch.append(build_food_row(food))
+        if len(batch) >= batch_size:
+            await _flush(batch, checkpoint, stats)
+            batch = []
+
+    if batch:
+        await _flush(batch, checkpoint, stats)
+    return stats
+
+
+def _new_stats() -> dict:
+    return {"inserted": 0, "skipped": 0, "failed": 0}
+
+
+async def import_fdc_ids(fdc_ids: list[str], checkpoint_path: Optional[str] = None, concurrency: int = FETCH_CONCURRENCY,
+                         batch_size: int = BATCH_SIZE, wait_rate_limits: bool = True) -> dict:
+    checkpoint = Checkpoint(checkpoint_path)
+    stats = _new_stats()
+    if not wait_rate_limits:
+        stats.update(not_fetched=[], retry_after=0.0)
+
+    # Resume: don't even fetch what is already imported
+    pending = list(dict.fromkeys(str(i) for i in fdc_ids if str(i) not in checkpoint.done))
+    stats["skipped"] += len(fdc_ids) - len(pending)
+
+    return await run_import(fetch_fdc_foods(pending, stats, concurrency, wait_rate_limits), checkpoint, stats, batch_size)
+
+
+async def import_dump(foods: Iterable[dict], checkpoint_path: Optional[str] = None, batch_size: int = BATCH_SIZE) -> dict:
+    return await run_import(_aiter(foods), Checkpoint(checkpoint_path), _new_stats(), batch_size)
+
+
+async def _main(args):
+    usda.start()
+    try:
+        if args.json:
+            stats = await import_dump(read_json_dump(args.json), args.checkpoint, args.batch_size)
+        elif args.csv_dir:
+            stats = await import_dump(read_csv_dump(args.csv_dir), args.checkpoint, args.batch_size)
+        else:
+            ids = list(args.ids or [])
+            if args.ids_file:
+                ids += [line.strip() for line in Path(args.ids_file).read_text().splitlines() if line.strip()]
+            if not usda.api_key:
+                raise SystemExit("USDA_API_KEY must be set to import by fdcId")
+            stats = await import_fdc_ids(ids, args.checkpoint, args.concurrency, args.batch_size)
+        print(f"Import finished: {stats}")
+    finally:
+        await usda.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import USDA foods into food_items")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--ids", nargs="+", help="FDC ids to fetch from the API")
+    source.add_argument("--ids-file", help="File with one FDC id per line")
+    source.add_argument("--json", help="FoodData Central JSON download")
+    source.add_argument("--csv-dir", help="FoodData Central CSV download directory")
+    parser.add_argument("--checkpoint", help="Checkpoint file for resumable runs")
+    parser.add_argument("--concurrency", type=int, default=FETCH_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    asyncio.run(_main(parser.parse_args()))
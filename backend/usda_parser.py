@@ -0,0 +1,123 @@
+"""
+Single-pass parsing of USDA FoodData Central nutrient lists.
+
+FDC returns nutrients in two shapes:
+- /foods/search:  {"nutrientId": 1003, "nutrientNumber": "203", "nutrientName": "Protein", "value": 7.1}
+- /food/{fdcId}:  {"nutrient": {"id": 1003, "number": "203", "name": "Protein"}, "amount": 7.1}
+
+Both parsers walk the list once and resolve each nutrient with a dict lookup
+built at import time, instead of rescanning the list for every column.
+"""
+# (column, USDA nutrient id, USDA nutrient number) for the search/detail macros
+MACRO_NUTRIENTS = [
+    ("energy_kcal", 1008, "208"),
+    ("protein_g", 1003, "203"),
+    ("fat_g", 1004, "204"),
+    ("carbs_g", 1005, "205"),
+    ("fiber_g", 1079, "291"),
+]
+
+# food_items column -> possible USDA nutrient names, used by /import-usda
+MAPPING_RULES = [
+    ("energy_kcal", ["Energy"]),
+    ("protein_g", ["Protein"]),
+    ("fat_g", ["Total lipid (fat)", "Total Fat"]),
+    ("carbs_g", ["Carbohydrate, by difference"]),
+    ("fiber_g", ["Fiber, total dietary"]),
+    ("total_sugars_g", ["Sugars, total including NLEA", "Sugars, total"]),
+    ("starch_g", ["Starch"]),
+    ("calcium_mg", ["Calcium, Ca"]),
+    ("iron_mg", ["Iron, Fe"]),
+    ("magnesium_mg", ["Magnesium, Mg"]),
+    ("phosphorus_mg", ["Phosphorus, P"]),
+    ("potassium_mg", ["Potassium, K"]),
+    ("sodium_mg", ["Sodium, Na"]),
+    ("zinc_mg", ["Zinc, Zn"]),
+    ("copper_mg", ["Copper, Cu"]),
+    ("manganese_mg", ["Manganese, Mn"]),
+    ("selenium_µg", ["Selenium, Se"]),
+    ("vitamin_a_µg", ["Vitamin A, RAE"]),
+    ("vitamin_c_mg", ["Vitamin C, total ascorbic acid"]),
+    ("vitamin_d_µg", ["Vitamin D (D2 + D3)", "Vitamin D"]),
+    ("vitamin_e_mg", ["Vitamin E (alpha-tocopherol)"]),
+    ("vitamin_k_µg", ["Vitamin K (phylloquinone)"]),
+    ("thiamin_b1_mg", ["Thiamin"]),
+    ("riboflavin_b2_mg", ["Riboflavin"]),
+    ("niacin_b3_mg", ["Niacin"]),
+    ("vitamin_b6_mg", ["Vitamin B-6"]),
+    ("folate_µg", ["Folate, total"]),
+    ("vitamin_b12_µg", ["Vitamin B-12"]),
+    ("cholesterol_mg", ["Cholesterol"])
+]
+
+# Lookup tables built once at import: nutrient id/number/name -> column
+_MACRO_KEYS = {}
+for _col, _id, _number in MACRO_NUTRIENTS:
+    _MACRO_KEYS[_id] = _col
+    _MACRO_KEYS[_number] = _col
+
+# lowercase name -> (column, preference), lower preference wins for alias names
+_NAME_RULES = {
+    name.lower(): (col, rank)
+    for col, names in MAPPING_RULES
+    for rank, name in enumerate(names)
+}
+
+
+def _fields(n: dict):
+    """
+    (id, number, name, amount) for either nutrient shape.
+    """
+    nutrient = n.get("nutrient")
+    if nutrient is not None:
+        return nutrient.get("id"), nutrient.get("number"), nutrient.get("name"), n.get("amount")
+    return n.get("nutrientId"), n.get("nutrientNumber"), n.get("nutrientName"), n.get("value")
+
+
+def parse_macros(food: dict) -> dict:
+    """
+    Per-100g energy/protein/fat/carbs/fiber for either payload shape. Missing -> 0.
+    One pass over foodNutrients with O(1) lookups, stopping once all macros are found.
+    """
+    nutrients = food.get("foodNutrients", [])
+    found = {}
+    wanted = len(MACRO_NUTRIENTS)
+    # Shape is the same for the whole list, so pick the keys once
+    if nutrients and "nutrient" not in nutrients[0]:
+        for n in nutrients:
+            col = _MACRO_KEYS.get(n.get("nutrientId")) or _MACRO_KEYS.get(n.get("nutrientNumber"))
+            # First match wins, same as the old per-macro scans
+            if col is not None and col not in found:
+                found[col] = n.get("value") or 0
+                if len(found) == wanted:
+                    break
+    else:
+        for n in nutrients:
+            nutrient_id, number, _, amount = _fields(n)
+            col = _MACRO_KEYS.get(nutrient_id) or _MACRO_KEYS.get(number)
+            if col is not None and col not in found:
+                found[col] = amount or 0
+                if len(found) == wanted:
+                    break
+    return {col: found.get(col, 0) for col, _, _ in MACRO_NUTRIENTS}
+
+
+def parse_columns(food: dict) -> dict:
+    """
+    All food_items nutrient columns from MAPPING_RULES, matched by exact nutrient name.
+    Missing nutrients are None so they are stored as null.
+    """
+    best = {}
+    for n in food.get("foodNutrients", []):
+        _, _, name, amount = _fields(n)
+        rule = _NAME_RULES.get((name or "").lower())
+        if rule is None:
+            continue
+        col, rank = rule
+        # Keep the first nutrient seen for the most preferred alias
+        if col not in best or rank < best[col][0]:
+            best[col] = (rank, amount)
+    return {
+        col: (float(best[col][1] or 0) if col in best else None)
+        for col, _ in MAPPING_RULES
+    }
@@ -0,0 +1,168 @@
+"""
+Incremental refresh of imported USDA foods.
+
+USDA rows in food_items are re-fetched from FoodData Central by food_code
+(fdcId), never-attempted and least recently attempted first, at most --limit
+per run, so a scheduled run keeps the catalog current without re-importing it.
+Stored names are kept; the nutrient columns, name_fingerprint and synced_at
+are rewritten. Rows whose fetch fails only get sync_attempted_at, which moves
+them behind the rest of the queue instead of blocking it. Run from the repo root:
+
+    python -m backend.usda_sync [--limit 500] [--max-age-days 30] [--dry-run]
+    python -m backend.usda_sync --backfill-fingerprints [--dry-run]
+
+--backfill-fingerprints fills name_fingerprint for rows stored before it
+existed and reports near-duplicates. It is step 2 of the food_fingerprint_*.sql
+migration and must run before the unique indexes in step 3 exist.
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+from .config import supabase
+from . import db
+from .food_index import fetch_food_items, name_fingerprint
+from .usda import usda
+from .usda_import import BATCH_SIZE, FETCH_CONCURRENCY, build_food_row, fetch_fdc_foods
+from .log import get_logger
+
+SYNC_LIMIT = int(os.getenv("USDA_SYNC_LIMIT", 500))
+MAX_AGE_DAYS = float(os.getenv("USDA_SYNC_MAX_AGE_DAYS", 30))
+
+logger = get_logger(__name__)
+
+
+def fetch_stale_rows(client, limit: int, max_age_days: float) -> list[dict]:
+    """
+    USDA rows never synced or last synced more than `max_age_days` ago, least
+    recently attempted first.
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).isoformat(timespec="seconds")
+    res = client.table("food_items")\
+        .select("id, food_name, food_code")\
+        .eq("source", "USDA")\
+        .or_(f"synced_at.is.null,synced_at.lt.{cutoff}")\
+        .order("sync_attempted_at", nullsfirst=True)\
+        .limit(limit)\
+        .execute()
+    return res.data or []
+
+
+def build_sync_row(stored: dict, food: dict, synced_at: str) -> dict:
+    """
+    Full food_items row (so the upsert never trips NOT NULL columns) refreshing
+    `stored` from an FDC payload, under its stored name.
+    """
+    row = build_food_row(food, name=stored["food_name"])
+    row.pop("created_at")
+    row["id"] = stored["id"]
+    row["synced_at"] = synced_at
+    row["sync_attempted_at"] = synced_at
+    return row
+
+
+async def sync_usda_foods(limit: int = SYNC_LIMIT, max_age_days: float = MAX_AGE_DAYS, dry_run: bool = False,
+                          concurrency: int = FETCH_CONCURRENCY, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Refresh up to `limit` stale USDA rows.
+    Returns { "checked": n, "updated": n, "failed": n }
+    """
+    stale = await db.run(fetch_stale_rows, supabase, limit, max_age_days)
+    by_code = {row["food_code"]: row for row in stale if row.get("food_code")}
+    stats = {"checked": len(stale), "updated": 0, "failed": 0}
+    synced_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    batch = []
+
+    async def flush():
+        if not dry_run:
+            await db.execute(supabase.table("food_items").upsert(batch, on_conflict="id"))
+        stats["updated"] += len(batch)
+        batch.clear()
+
+    pending = {row["id"] for row in stale}
+    async for food in fetch_fdc_foods(list(by_code), stats, concurrency):
+        stored = by_code[str(food.get("fdcId"))]
+        pending.discard(stored["id"])
+        batch.append(build_sync_row(stored, food, synced_at))
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    # Failed fetches (and rows without an fdcId) go to the back of the queue
+    stats["failed"] += len(stale) - len(by_code)
+    failed = sorted(pending)
+    if failed and not dry_run:
+        for start in range(0, len(failed), batch_size):
+            await db.execute(supabase.table("food_items")
+                             .update({"sync_attempted_at": synced_at})
+                             .in_("id", failed[start:start + batch_size]))
+
+    logger.info("usda_sync", extra=stats)
+    return stats
+
+
+def backfill_fingerprints(dry_run: bool = False) -> dict:
+    """
+    Set name_fingerprint where it is missing or stale, one update per fingerprint.
+    Returns { "rows": n, "updated": n, "duplicates": n } where duplicates counts
+    rows that share a (source, name_fingerprint) with an older row. Non-USDA
+    duplicates are kept with a null fingerprint (see food_fingerprint_2_dedupe.sql).
+    """
+    rows = fetch_food_items(supabase, "id, food_name, source, name_fingerprint")
+
+    changed: dict[str, list] = {}
+    groups: dict[tuple, int] = {}
+    # Rows come in id order, so the first of each group is the oldest
+    for row in rows:
+        fingerprint = name_fingerprint(row.get("food_name") or "") or None
+        if fingerprint:
+            key = (row.get("source"), fingerprint)
+            groups[key] = groups.get(key, 0) + 1
+            if groups[key] > 1 and row.get("source") != "USDA":
+                fingerprint = None
+        if fingerprint != row.get("name_fingerprint"):
+            changed.setdefault(fingerprint, []).append(row["id"])
+
+    if not dry_run:
+        for fingerprint, ids in changed.items():
+            for start in range(0, len(ids), BATCH_SIZE):
+                supabase.table("food_items")\
+                    .update({"name_fingerprint": fingerprint})\
+                    .in_("id", ids[start:start + BATCH_SIZE])\
+                    .execute()
+
+    return {
+        "rows": len(rows),
+        "updated": sum(len(ids) for ids in changed.values()),
+        "duplicates": sum(count - 1 for count in groups.values()),
+    }
+
+
+async def _main(args):
+    usda.start()
+    try:
+        if not usda.api_key:
+            raise SystemExit("USDA_API_KEY must be set to sync from FoodData Central")
+        stats = await sync_usda_foods(args.limit, args.max_age_days, args.dry_run, args.concurrency, args.batch_size)
+        print(f"Sync finished: {stats}")
+    finally:
+        await usda.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh imported USDA foods from FoodData Central")
+    parser.add_argument("--limit", type=int, default=SYNC_LIMIT, help="Rows to refresh this run")
+    parser.add_argument("--max-age-days", type=float, default=MAX_AGE_DAYS, help="Refresh rows synced longer ago than this")
+    parser.add_argument("--backfill-fingerprints", action="store_true", help="Fill name_fingerprint instead of syncing")
+    parser.add_argument("--dry-run", action="store_true", help="Fetch but don't write")
+    parser.add_argument("--concurrency", type=int, default=FETCH_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.backfill_fingerprints:
+        print(f"Backfill finished: {backfill_fingerprints(args.dry_run)}")
+    else:
+        asyncio.run(_main(args))
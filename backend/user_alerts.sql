@@ -0,0 +1,22 @@
+-- Alerts written by the scheduled evaluator (backend/alert_job.py)
+
+ALTER TABLE profiles ADD COLUMN IF NOT EXISTS timezone TEXT DEFAULT 'UTC';
+
+CREATE TABLE IF NOT EXISTS user_alerts (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID NOT NULL,
+    date DATE NOT NULL,
+    alert_type TEXT NOT NULL,
+    message TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+
+    UNIQUE (user_id, date, alert_type)
+);
+
+ALTER TABLE user_alerts ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own alerts" ON user_alerts
+    FOR SELECT USING (auth.uid() = user_id);
+
+-- The evaluator reads every user's totals for one or two dates at a time
+CREATE INDEX IF NOT EXISTS daily_totals_date_idx ON daily_totals (date);
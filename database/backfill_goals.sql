@@ -1,5 +1,10 @@
 -- Backfill missing nutritional goals based on profile data
 -- Run this in the Supabase REST SQL Editor
+-- Superseded by `python -m backend.backfill_goals`, which computes the goals
+-- with backend/calculations.py and keeps this script's defaults (water 2500 ml,
+-- female offset for any non-male gender). It differs in that it matches
+-- 'male' case-insensitively and only fills goal columns that are null or 0,
+-- where this script overwrites protein/fat/fiber/water. Kept for reference.
 
 UPDATE profiles
 SET
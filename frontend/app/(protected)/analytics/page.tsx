@@ -1,8 +1,8 @@
 'use client'
 
 import { useEffect, useState, useMemo } from 'react'
-import { supabase } from '@/lib/supabase'
-import { getLocalDateString, getLastNDays } from '@/utils/date'
+import { supabase, authHeaders } from '@/lib/supabase'
+import { getLocalDateString } from '@/utils/date'
 import { calculateProgress } from '@/utils/goals'
 import {
     AreaChart,
@@ -45,9 +45,6 @@ export default function AnalyticsPage() {
                 if (!user) return
 
                 const today = getLocalDateString()
-                const sevenDaysAgoDate = new Date()
-                sevenDaysAgoDate.setDate(new Date().getDate() - 6)
-                const sevenDaysAgo = getLocalDateString(sevenDaysAgoDate)
 
                 // Fetch Logs
                 const [foodRes, waterRes] = await Promise.all([
@@ -55,80 +52,18 @@ export default function AnalyticsPage() {
                     supabase.from('water_logs').select('*').eq('user_id', user.id).eq('date', today)
                 ])
 
-                // Fetch Last 7 Days Logs (Food + Water)
-                const [weeklyFoodRes, weeklyWaterRes] = await Promise.all([
-                    supabase
-                        .from('daily_logs')
-                        .select('*')
-                        .eq('user_id', user.id)
-                        .gte('date', sevenDaysAgo)
-                        .lte('date', today)
-                        .order('date', { ascending: true }),
-                    supabase
-                        .from('water_logs')
-                        .select('*')
-                        .eq('user_id', user.id)
-                        .gte('date', sevenDaysAgo)
-                        .lte('date', today)
-                        .order('date', { ascending: true })
-                ])
-
-                const weeklyLogs = weeklyFoodRes.data || []
-                const weeklyWaterLogs = weeklyWaterRes.data || []
+                // Fetch Last 7 Days Totals (pre-aggregated per day by the backend)
+                const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000'
+                const weeklyRes = await fetch(`${apiUrl}/analytics/${user.id}?days=7&end=${today}`, { headers: await authHeaders() })
+                if (!weeklyRes.ok) throw new Error(`Analytics request failed: ${weeklyRes.status}`)
+                const weeklyTotals = await weeklyRes.json()
 
                 setFoodLogs(foodRes.data || [])
                 setWaterLogs(waterRes.data || [])
 
-                // Process Weekly Data
-                if (weeklyLogs || weeklyWaterLogs) {
-                    const groupedData: Record<string, any> = {}
-
-                    // Database Column Mapping
-                    const nutrientMap = {
-                        calories: "energy_kcal",
-                        protein: "protein_g",
-                        carbs: "carbs_g",
-                        fat: "fat_g",
-                        fiber: "fiber_g",
-                        water: "amount_ml"
-                    }
-
-                    // Initialize last 7 days to ensure continuous data (missing days = 0)
-                    const last7Days = getLastNDays(7)
-
-                    last7Days.forEach((date: string) => {
-                        groupedData[date] = {
-                            date,
-                            calories: 0,
-                            protein: 0,
-                            carbs: 0,
-                            fat: 0,
-                            fiber: 0,
-                            water: 0
-                        }
-                    })
-
-                    weeklyLogs.forEach((log: any) => {
-                        if (groupedData[log.date]) {
-                            groupedData[log.date].calories += (log[nutrientMap.calories] || 0)
-                            groupedData[log.date].protein += (log[nutrientMap.protein] || 0)
-                            groupedData[log.date].carbs += (log[nutrientMap.carbs] || 0)
-                            groupedData[log.date].fat += (log[nutrientMap.fat] || 0)
-                            groupedData[log.date].fiber += (log[nutrientMap.fiber] || 0)
-                        }
-                    })
-
-                    weeklyWaterLogs.forEach((log: any) => {
-                        if (groupedData[log.date]) {
-                            groupedData[log.date].water += (log[nutrientMap.water] || 0)
-                        }
-                    })
-
-                    const processedWeeklyData = Object.values(groupedData).sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime())
-
-                    setWeeklyData(processedWeeklyData)
-                    console.log("Weekly Data:", processedWeeklyData)
-                }
+                // Days are already continuous (missing days = 0) and sorted by date
+                setWeeklyData(weeklyTotals.days || [])
+                console.log("Weekly Data:", weeklyTotals.days)
             } catch (error) {
                 console.error('Error fetching analytics:', error)
                 setError("Unable to load data.")
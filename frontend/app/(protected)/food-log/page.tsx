@@ -3,7 +3,7 @@
 import { useState, useEffect } from 'react'
 import DatePicker from 'react-datepicker'
 import "react-datepicker/dist/react-datepicker.css"
-import { supabase } from '@/lib/supabase'
+import { supabase, authHeaders } from '@/lib/supabase'
 import { getLocalDateString } from '@/utils/date'
 import { DailyLog, WaterLog } from '@/types'
 import { motion, AnimatePresence } from 'framer-motion'
@@ -156,29 +156,50 @@ export default function FoodLogPage() {
             setIsSearching(true)
             try {
                 const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000'
-                const fetchUrl = `${apiUrl}/search-food?q=${encodeURIComponent(query)}&source=${searchSource}`
+                // NDJSON stream: IFCT hits arrive first, USDA hits follow when ready
+                const fetchUrl = `${apiUrl}/search-food/stream?q=${encodeURIComponent(query)}&source=${searchSource}`
                 console.log("Searching food:", fetchUrl)
 
                 const res = await fetch(fetchUrl, { signal })
 
-                if (res.ok) {
-                    const data = await res.json()
-                    const rawResults = data.results || []
+                if (res.ok && res.body) {
                     const uniqueResults: any[] = []
                     const seenNames = new Set()
 
-                    for (const item of rawResults) {
-                        const normalized = item.name.toLowerCase().trim()
-                        if (!normalized) continue
+                    const addResults = (rawResults: any[]) => {
+                        for (const item of rawResults) {
+                            const normalized = item.name.toLowerCase().trim()
+                            if (!normalized) continue
 
-                        // Robust Deduplication: Check if we've already seen this name
-                        if (!seenNames.has(normalized)) {
-                            seenNames.add(normalized)
-                            uniqueResults.push(item)
-                            if (uniqueResults.length >= 50) break
+                            // Robust Deduplication: Check if we've already seen this name
+                            if (!seenNames.has(normalized) && uniqueResults.length < 50) {
+                                seenNames.add(normalized)
+                                uniqueResults.push(item)
+                            }
+                        }
+                        setSearchResults([...uniqueResults])
+                    }
+
+                    // Aborting the fetch also closes the stream, which cancels the USDA call server-side
+                    const reader = res.body.getReader()
+                    const decoder = new TextDecoder()
+                    let buffer = ''
+                    while (true) {
+                        const { done, value } = await reader.read()
+                        if (done) break
+                        buffer += decoder.decode(value, { stream: true })
+                        const lines = buffer.split('\n')
+                        buffer = lines.pop() || ''
+                        for (const line of lines) {
+                            if (!line.trim()) continue
+                            const chunk = JSON.parse(line)
+                            if (chunk.results) {
+                                addResults(chunk.results)
+                                // Local results are enough to stop the spinner
+                                setIsSearching(false)
+                            }
                         }
                     }
-                    setSearchResults(uniqueResults)
                 } else {
                     console.error("Search failed status:", res.status)
                     setSearchResults([])
@@ -264,35 +285,33 @@ export default function FoodLogPage() {
             console.log("Quantity:", quantity);
             console.log("Estimated Nutrition:", nutritionPreview);
 
-            const qtyMatch = quantity.match(/(\d+(\.\d+)?)/)
-            const quantity_consumed_grams = qtyMatch ? parseFloat(qtyMatch[0]) : 0
-
-            const payload = {
-                user_id: user.id,
-                date: formattedDate,
-                logged_at: new Date().toISOString(),
-                food_name: selectedFood.name, // mapped from selectedFood.name
-                quantity_consumed_grams: quantity_consumed_grams,
+            // Macros are resolved server-side; one call inserts and returns the new rows
+            const entry = {
+                food_id: selectedFood.source === 'USDA' ? selectedFood.usda_id : String(selectedFood.id),
+                source: selectedFood.source,
+                quantity: quantity,
+                food_name: selectedFood.name,
                 meal_type: mealType,
-                energy_kcal: nutritionPreview.energy_kcal,
-                protein_g: nutritionPreview.protein_g,
-                carbs_g: nutritionPreview.carbs_g,
-                fat_g: nutritionPreview.fat_g,
-                fiber_g: nutritionPreview.fiber_g
+                date: formattedDate,
+                logged_at: new Date().toISOString()
             }
 
-            console.log("Payload sending to Supabase:", payload)
+            console.log("Entry sending to API:", entry)
 
-            const response = await supabase.from('daily_logs').insert([payload])
-            console.log("Insert Response:", response)
-            const { error } = response
+            const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000'
+            const res = await fetch(`${apiUrl}/logs/batch`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
+                body: JSON.stringify({ user_id: user.id, entries: [entry] })
+            })
 
-            if (error) {
-                console.error("Insert error:", error)
+            if (!res.ok) {
+                console.error("Insert error:", res.status, await res.text())
                 showToast("Failed to add log ❌")
             } else {
-                // Success
-                await fetchLogs()
+                // Success: add the returned rows instead of re-reading the whole day
+                const data = await res.json()
+                setFoodLogs(prev => [...(data.logs as DailyLog[]), ...prev])
                 setIsModalOpen(false)
                 // Reset form
                 setFoodName('')
@@ -356,15 +375,16 @@ export default function FoodLogPage() {
             const { data: { user } } = await supabase.auth.getUser()
             if (!user) return
 
-            const { error } = await supabase.from('water_logs').insert({
-                user_id: user.id,
-                date: formattedDate,
-                amount_ml: Math.round(amountMl), // Store as integer ml
-                logged_at: new Date().toISOString()
+            // Through the API so its cached water reading for the day is refreshed
+            const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000'
+            const res = await fetch(`${apiUrl}/water/${user.id}`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
+                body: JSON.stringify({ amount_ml: amountMl, date: formattedDate }) // Stored as integer ml
             })
 
-            if (error) {
-                console.error("Error logging water:", error)
+            if (!res.ok) {
+                console.error("Error logging water:", res.status, await res.text())
                 showToast("Failed to log water ❌")
             } else {
                 await fetchWaterLogs()
@@ -411,15 +431,15 @@ export default function FoodLogPage() {
             const { data: { user } } = await supabase.auth.getUser()
             if (!user) return
 
-            const { error } = await supabase.from('water_logs').insert({
-                user_id: user.id,
-                date: formattedDate,
-                amount_ml: 150,
-                logged_at: new Date().toISOString()
+            const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000'
+            const res = await fetch(`${apiUrl}/water/${user.id}`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
+                body: JSON.stringify({ amount_ml: 150, date: formattedDate })
             })
 
-            if (error) {
-                console.error("Error logging water:", error)
+            if (!res.ok) {
+                console.error("Error logging water:", res.status, await res.text())
                 showToast("Failed to log water ❌")
             } else {
                 await fetchWaterLogs()
@@ -448,14 +468,16 @@ export default function FoodLogPage() {
             )
             const latestLog = sortedLogs[0]
 
-            if (latestLog) {
-                const { error } = await supabase
-                    .from('water_logs')
-                    .delete()
-                    .eq('id', latestLog.id)
+            const { data: { user } } = await supabase.auth.getUser()
+            if (latestLog && user) {
+                const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000'
+                const res = await fetch(`${apiUrl}/water/${user.id}/${latestLog.id}`, {
+                    method: 'DELETE',
+                    headers: await authHeaders()
+                })
 
-                if (error) {
-                    console.error("Error undoing water log:", error)
+                if (!res.ok) {
+                    console.error("Error undoing water log:", res.status, await res.text())
                 } else {
                     await fetchWaterLogs() // Refresh hydration data
                     showToast("Last entry removed ↩️")
@@ -2,7 +2,7 @@
 
 import { useState, useEffect } from 'react'
 import { useRouter } from 'next/navigation'
-import { supabase } from '@/lib/supabase'
+import { supabase, authHeaders } from '@/lib/supabase'
 import { useGoals } from '@/context/GoalContext'
 
 export default function OnboardingPage() {
@@ -105,10 +105,13 @@ export default function OnboardingPage() {
             // Water: 35ml/kg
             const water = Math.round(weightVal * 35)
 
-            const { error } = await supabase
-                .from('profiles')
-                .upsert({
-                    id: user.id,
+            // The row was created when the page opened; update it through the API
+            // so its cached profile is refreshed too
+            const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000'
+            const res = await fetch(`${apiUrl}/profile/${user.id}`, {
+                method: 'PUT',
+                headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
+                body: JSON.stringify({
                     username: user.email?.split('@')[0] || '',
                     height_cm: heightVal,
                     weight_kg: weightVal,
@@ -125,9 +128,10 @@ export default function OnboardingPage() {
                     target_fiber: fiber,
                     water_goal: water,
                     onboarding_completed: true
-                }, { onConflict: 'id' })
+                })
+            })
 
-            if (error) throw error
+            if (!res.ok) throw new Error(`Profile update failed: ${res.status}`)
 
             await refreshGoals()
             router.push('/')
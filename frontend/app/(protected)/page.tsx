@@ -1,17 +1,20 @@
 'use client'
 
 import { useEffect, useState, useMemo } from 'react'
-import { supabase } from '@/lib/supabase'
+import { supabase, authHeaders } from '@/lib/supabase'
 import { getLocalDateString } from '@/utils/date'
 import { ArrowRightIcon, PlusIcon } from '@heroicons/react/24/solid'
 import { calculateProgress } from '@/utils/goals'
 import { useGoals } from '@/context/GoalContext'
 import { LoadingSkeleton, ErrorState } from '@/components/LoadingFallback'
 import { HomeProgressRing } from '@/components/HomeProgressRing'
+import { evaluateDailyHealth, LATE_DAY_SHARE } from '@/lib/aiCoach'
+import type { ProgressResponse } from '@/types'
 
 export default function HomePage() {
     const [foodLogs, setFoodLogs] = useState<any[]>([])
     const [waterLogs, setWaterLogs] = useState<any[]>([])
+    const [progress, setProgress] = useState<ProgressResponse | null>(null)
     const { goals } = useGoals()
     const [loading, setLoading] = useState(true)
     const [error, setError] = useState<string | null>(null)
@@ -49,6 +52,16 @@ export default function HomePage() {
                 setFoodLogs(newFoodLogs)
                 setWaterLogs(newWaterLogs)
 
+                // Where this user usually is by now (learned from their history); the
+                // coach falls back to the default waking-hours curve without it
+                try {
+                    const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000'
+                    const res = await fetch(`${apiUrl}/progress/${user.id}`, { headers: await authHeaders() })
+                    if (res.ok) setProgress(await res.json())
+                } catch (err) {
+                    console.error('Error fetching progress:', err)
+                }
+
             } catch (error) {
                 console.error('Error in fetchData:', error)
                 setError("Unable to load data.")
@@ -178,24 +191,28 @@ export default function HomePage() {
                         const proteinGoal = goals?.target_protein || 75
                         const waterGoal = goals?.water_goal || 2500
 
-                        // Step 1: Get Current Time & Phase
-                        const currentHour = new Date().getHours()
-                        let dayPhase = "morning"
-                        if (currentHour >= 11 && currentHour < 17) {
-                            dayPhase = "afternoon"
-                        } else if (currentHour >= 17) {
-                            dayPhase = "evening"
-                        }
+                        // Step 1: Compare against what this user usually has by now (/progress curves)
+                        const evaluation = evaluateDailyHealth({
+                            caloriesConsumed: totals.calories,
+                            calorieGoal,
+                            proteinConsumed: totals.protein,
+                            proteinGoal,
+                            waterConsumed: totals.water,
+                            waterGoal,
+                            lastMealTime: null,
+                            userGoal: "maintenance",
+                            progress
+                        })
+                        const isLate = (key: 'calories' | 'protein' | 'water') =>
+                            evaluation[key].expected >= evaluation[key].goal * LATE_DAY_SHARE
 
                         // Step 2: Calculate Percentages
                         const caloriePercent = calculateProgress(totals.calories, calorieGoal)
-                        const proteinPercent = calculateProgress(totals.protein, proteinGoal)
-                        const waterPercent = calculateProgress(totals.water, waterGoal)
 
                         const alerts: { type: string, message: string, tip: string }[] = []
 
                         // ---- CALORIES ----
-                        if (dayPhase === "evening" && caloriePercent < 60) {
+                        if (evaluation.calories.status === "behind" && isLate('calories')) {
                             alerts.push({
                                 type: "critical",
                                 message: "Your calorie intake is too low for this time of day.",
@@ -212,15 +229,13 @@ export default function HomePage() {
                         }
 
                         // ---- PROTEIN ----
-                        if (dayPhase === "evening" && proteinPercent < 60) {
+                        if (evaluation.protein.status === "behind" && isLate('protein')) {
                             alerts.push({
                                 type: "critical",
                                 message: "Your protein intake is too low.",
                                 tip: "Add eggs, paneer, chicken, tofu, or lentils."
                             })
-                        }
-
-                        if (dayPhase === "afternoon" && proteinPercent < 40) {
+                        } else if (evaluation.protein.status === "behind") {
                             alerts.push({
                                 type: "warning",
                                 message: "You're slightly behind on protein.",
@@ -229,7 +244,7 @@ export default function HomePage() {
                         }
 
                         // ---- WATER ----
-                        if (waterPercent < 50 && dayPhase !== "morning") {
+                        if (evaluation.water.status === "behind" && !isLate('water')) {
                             alerts.push({
                                 type: "warning",
                                 message: "You are behind on hydration.",
@@ -237,7 +252,7 @@ export default function HomePage() {
                             })
                         }
 
-                        if (waterPercent < 30 && dayPhase === "evening") {
+                        if (evaluation.water.status === "behind" && isLate('water')) {
                             alerts.push({
                                 type: "critical",
                                 message: "Severely dehydrated for this time of day.",
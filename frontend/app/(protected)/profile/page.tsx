@@ -1,7 +1,7 @@
 'use client'
 
 import { useState, useEffect } from 'react'
-import { supabase } from '@/lib/supabase'
+import { supabase, authHeaders } from '@/lib/supabase'
 
 import { useGoals } from '@/context/GoalContext'
 import { FormSkeleton, ErrorState } from '@/components/LoadingFallback'
@@ -112,13 +112,16 @@ export default function ProfilePage() {
                 return
             }
 
-            const { error: updateError } = await supabase
-                .from('profiles')
-                .update(updateData)
-                .eq('id', user.id)
+            // Through the API so its cached profile (goals, progress) is refreshed too
+            const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000'
+            const res = await fetch(`${apiUrl}/profile/${user.id}`, {
+                method: 'PUT',
+                headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
+                body: JSON.stringify(updateData)
+            })
 
-            if (updateError) {
-                console.error("Error updating profile:", updateError)
+            if (!res.ok) {
+                console.error("Error updating profile:", res.status, await res.text())
                 setSaveStatus('error')
             } else {
                 setSaveStatus('success')
@@ -205,10 +208,12 @@ export default function ProfilePage() {
 
         const water = Math.round(weight * 35);
 
-        // 3️⃣ Update Supabase using EXACT column names
-        await supabase
-            .from("profiles")
-            .update({
+        // 3️⃣ Update the profile through the API using EXACT column names
+        const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000'
+        await fetch(`${apiUrl}/profile/${user.id}`, {
+            method: 'PUT',
+            headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
+            body: JSON.stringify({
                 bmr: bmr,
                 tdee: tdee,
                 target_calories: calories,
@@ -218,7 +223,7 @@ export default function ProfilePage() {
                 target_fiber: fiber,
                 water_goal: water
             })
-            .eq("id", user.id);
+        })
 
         // 4️⃣ After update: Update local state
         const newGoals = {
@@ -2,10 +2,16 @@
 
 import { useEffect, useState } from 'react'
 import { useRouter } from 'next/navigation'
-import { supabase } from '../../lib/supabase'
+import { supabase, authHeaders } from '../../lib/supabase'
 import DatePicker from 'react-datepicker'
 import "react-datepicker/dist/react-datepicker.css"
-import type { Profile, AlertResponse } from '../../types'
+import type { Profile, ProgressResponse } from '../../types'
+
+// Pace alerts from GET /progress, for the nutrients the dashboard tracks
+const BEHIND_MESSAGES: Record<string, string> = {
+    protein: "You're behind the protein you usually have by this time of day.",
+    water: "You're behind the water you usually drink by this time of day."
+}
 
 export default function Dashboard() {
     const router = useRouter()
@@ -61,28 +67,23 @@ export default function Dashboard() {
                     setWaterIntake(0)
                 }
 
-                // Call backend for alerts
-                try {
-                    const res = await fetch('http://127.0.0.1:8000/alerts', {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json'
-                        },
-                        body: JSON.stringify({
-                            current_time: new Date().toISOString(),
-                            protein_intake: 0, // Placeholder
-                            protein_goal: profileData?.protein_goal || 150, // Default or fetched
-                            water_intake: currentWater,
-                            water_goal: profileData?.water_goal || 2000
-                        })
-                    })
-
-                    if (res.ok) {
-                        const data: AlertResponse = await res.json()
-                        setAlerts(data.alerts)
+                // Alerts compare today's intake with this user's usual pace (/progress curves)
+                if (selectedDate.toDateString() !== new Date().toDateString()) {
+                    setAlerts([])
+                } else {
+                    try {
+                        const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000'
+                        const res = await fetch(`${apiUrl}/progress/${user.id}`, { headers: await authHeaders() })
+
+                        if (res.ok) {
+                            const data: ProgressResponse = await res.json()
+                            setAlerts(Object.entries(BEHIND_MESSAGES)
+                                .filter(([key]) => data.nutrients[key as keyof ProgressResponse['nutrients']]?.status === 'behind')
+                                .map(([, message]) => message))
+                        }
+                    } catch (err) {
+                        console.error("Failed to fetch alerts", err)
                     }
-                } catch (err) {
-                    console.error("Failed to fetch alerts", err)
                 }
             } else {
                 router.push('/auth')
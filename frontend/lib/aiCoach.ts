@@ -1,3 +1,5 @@
+import type { ProgressResponse } from "../types";
+
 export type UserGoal = "fat_loss" | "muscle_gain" | "maintenance";
 
 export interface EvaluationInput {
@@ -9,6 +11,8 @@ export interface EvaluationInput {
     waterGoal: number;
     lastMealTime: string | Date | null;
     userGoal: UserGoal;
+    // GET /progress for today: how much of each goal this user usually has by now
+    progress?: ProgressResponse | null;
 }
 
 export type Status = "behind" | "on_track" | "ahead";
@@ -26,6 +30,19 @@ export interface EvaluationResult {
     water: NutrientStatus;
 }
 
+// Expected share without /progress: the backend's default curve (progress.py),
+// a linear ramp over waking hours from 07:00 to 22:00
+function defaultExpectedShare(): number {
+    const now = new Date();
+    const hour = now.getHours() + now.getMinutes() / 60;
+    return Math.min(Math.max((hour - 7) / (22 - 7), 0), 1);
+}
+
+// Expected shares that mark the late part of the user's own day (about 18:00
+// on the default curve, as in the backend alert job) and its end (about 21:00)
+export const LATE_DAY_SHARE = 0.75;
+const DAY_END_SHARE = 0.9;
+
 export function evaluateDailyHealth({
     caloriesConsumed,
     calorieGoal,
@@ -34,23 +51,22 @@ export function evaluateDailyHealth({
     waterConsumed,
     waterGoal,
     lastMealTime,
-    userGoal
+    userGoal,
+    progress
 }: EvaluationInput): EvaluationResult {
-    // 1. Get current hour
-    const currentHour = new Date().getHours();
-
-    // 2. Calculate expected progress based on time
-    // Using a linear assumption over 24 hours
-    const expectedRatio = currentHour / 24;
+    // 1. Expected progress by now, from the user's own curves when available
+    const fallbackShare = defaultExpectedShare();
+    const shareFor = (key: keyof ProgressResponse["nutrients"]) =>
+        progress?.nutrients[key]?.expected_share ?? fallbackShare;
 
-    const calculateStatus = (actual: number, goal: number): NutrientStatus => {
+    const calculateStatus = (actual: number, goal: number, expectedRatio: number): NutrientStatus => {
         // Handle edge case where goal is 0
         if (goal <= 0) return { status: 'on_track', actual, expected: 0, goal: 0 };
 
-        // 3. Calculate expected intake
+        // 2. Calculate expected intake
         const expected = goal * expectedRatio;
 
-        // 4. Compare actual vs expected
+        // 3. Compare actual vs expected
         let status: Status = 'on_track';
 
         if (expected > 0) {
@@ -64,7 +80,7 @@ export function evaluateDailyHealth({
                 status = 'on_track';
             }
         } else {
-            // If expected is 0 (e.g., midnight starts at 0), any consumption is 'ahead' or 0 is 'on_track'
+            // If expected is 0 (e.g., before the user's day starts), any consumption is 'ahead' or 0 is 'on_track'
             if (actual > 0) status = 'ahead';
             else status = 'on_track';
         }
@@ -73,9 +89,9 @@ export function evaluateDailyHealth({
     };
 
     return {
-        calories: calculateStatus(caloriesConsumed, calorieGoal),
-        protein: calculateStatus(proteinConsumed, proteinGoal),
-        water: calculateStatus(waterConsumed, waterGoal)
+        calories: calculateStatus(caloriesConsumed, calorieGoal, shareFor("calories")),
+        protein: calculateStatus(proteinConsumed, proteinGoal, shareFor("protein")),
+        water: calculateStatus(waterConsumed, waterGoal, shareFor("water"))
     };
 }
 
@@ -92,7 +108,8 @@ export function generateAlerts(
     lastMealTime: string | Date | null
 ): Alert[] {
     const alerts: Alert[] = [];
-    const currentHour = new Date().getHours();
+    // Late in the user's own day rather than after a fixed hour
+    const isLate = evaluation.calories.goal > 0 && evaluation.calories.expected >= evaluation.calories.goal * DAY_END_SHARE;
 
     // 1. Calories behind
     if (evaluation.calories.status === "behind") {
@@ -133,12 +150,12 @@ export function generateAlerts(
     }
 
     // 7. Under-eating late check
-    if (currentHour > 21 && evaluation.calories.actual < (evaluation.calories.goal * 0.5)) {
+    if (isLate && evaluation.calories.actual < (evaluation.calories.goal * 0.5)) {
         alerts.push({ type: "warning", message: "You may be under-eating today." });
     }
 
     // 8. Late high calorie check
-    if (currentHour > 21 && evaluation.calories.actual > (evaluation.calories.goal * 1.2)) {
+    if (isLate && evaluation.calories.actual > (evaluation.calories.goal * 1.2)) {
         alerts.push({ type: "warning", message: "High calorie intake late in the day." });
     }
 
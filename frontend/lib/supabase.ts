@@ -7,3 +7,10 @@ const supabaseAnonKey = process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY || ''
 
 
 export const supabase = createClient(supabaseUrl, supabaseAnonKey)
+
+// Authorization header for backend calls made on the user's behalf; the API
+// forwards the token to Supabase so RLS applies as it does for direct queries
+export async function authHeaders(): Promise<Record<string, string>> {
+    const { data: { session } } = await supabase.auth.getSession()
+    return session ? { Authorization: `Bearer ${session.access_token}` } : {}
+}
@@ -37,3 +37,26 @@ export interface DailyLog {
 export interface AlertResponse {
     alerts: string[]
 }
+
+export type PaceStatus = 'behind' | 'on_track' | 'ahead'
+
+export interface NutrientProgress {
+    status: PaceStatus
+    actual: number
+    expected: number
+    goal: number
+    // Share of the goal this user usually has by now
+    expected_share: number
+}
+
+// GET /progress/{user_id}
+export interface ProgressResponse {
+    date: string
+    local_time: string
+    nutrients: {
+        calories: NutrientProgress
+        protein: NutrientProgress
+        water: NutrientProgress
+    }
+    history_days: Record<string, number>
+}